@@ -3,15 +3,23 @@ from .routes.tiger import tiger_route
 from .routes.scoot import scoot_route
 from .routes.hello import hello_route
 from .routes.flight import flight_route
-from .routes.line_webhook import line_webhook_route
+from .routes.watch import watch_route
+from .util.lazy import LazyView
 
 api_blueprint = Blueprint("api", __name__)
 
+# LINE webhook 依賴 linebot SDK，匯入成本高；路由先註冊，第一次請求時才載入模組
+line_webhook_route = Blueprint("line_webhook", __name__)
+line_webhook_view = LazyView("api.routes.line_webhook.line_webhook")
+line_webhook_route.add_url_rule("/", view_func=line_webhook_view, methods=["POST"])
+line_webhook_route.add_url_rule("", view_func=line_webhook_view, methods=["POST"])
+
 # 註冊子路由
 api_blueprint.register_blueprint(flight_route, url_prefix="/flight")
 api_blueprint.register_blueprint(hello_route, url_prefix="/hello")
 api_blueprint.register_blueprint(tiger_route, url_prefix="/tiger")
 api_blueprint.register_blueprint(scoot_route, url_prefix="/scoot")
 api_blueprint.register_blueprint(line_webhook_route, url_prefix="/line_webhook")
+api_blueprint.register_blueprint(watch_route, url_prefix="/watch")
 
 api = api_blueprint
@@ -1,8 +1,29 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, fields as dataclass_fields
 from datetime import datetime
-from typing import Optional
+from typing import NamedTuple, Optional, Tuple
+import sys
 
-@dataclass
+# Python 3.10 以上使用 __slots__ 減少每筆航班的記憶體
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+class Segment(NamedTuple):
+    carrier: str
+    number: str
+    aircraft: str
+    departure: str
+    departure_at: str
+    arrival: str
+    arrival_at: str
+    duration: str
+
+
+class Itinerary(NamedTuple):
+    duration: str
+    segments: Tuple[Segment, ...]
+
+
+@dataclass(**_SLOTS)
 class Flight:
     flight_number: str
     departure: str
@@ -13,3 +34,67 @@ class Flight:
     currency: str
     airline: str
     available_seats: Optional[int] = None
+    cabin: Optional[str] = None
+    itineraries: Tuple[Itinerary, ...] = ()
+
+    @classmethod
+    def field_names(cls):
+        return [f.name for f in dataclass_fields(cls)]
+
+    @classmethod
+    def from_amadeus(cls, offer):
+        """將 Amadeus flight offer 正規化為精簡的 Flight（只保留顯示所需欄位）"""
+        itineraries = tuple(
+            Itinerary(
+                duration=itinerary.get("duration", ""),
+                segments=tuple(
+                    Segment(
+                        carrier=segment.get("carrierCode", ""),
+                        number=segment.get("number", ""),
+                        aircraft=(segment.get("aircraft") or {}).get("code", ""),
+                        departure=segment["departure"]["iataCode"],
+                        departure_at=segment["departure"]["at"],
+                        arrival=segment["arrival"]["iataCode"],
+                        arrival_at=segment["arrival"]["at"],
+                        duration=segment.get("duration", ""),
+                    )
+                    for segment in itinerary.get("segments", [])
+                ),
+            )
+            for itinerary in offer.get("itineraries", [])
+        )
+        outbound = itineraries[0].segments
+        traveler_pricings = offer.get("travelerPricings") or [{}]
+        fare_details = traveler_pricings[0].get("fareDetailsBySegment") or [{}]
+
+        return cls(
+            flight_number=f"{outbound[0].carrier}{outbound[0].number}",
+            departure=outbound[0].departure,
+            arrival=outbound[-1].arrival,
+            departure_time=datetime.fromisoformat(outbound[0].departure_at),
+            arrival_time=datetime.fromisoformat(outbound[-1].arrival_at),
+            price=float(offer["price"]["grandTotal"]),
+            currency=offer["price"].get("currency", ""),
+            airline=(offer.get("validatingAirlineCodes") or [outbound[0].carrier])[0],
+            available_seats=offer.get("numberOfBookableSeats"),
+            cabin=fare_details[0].get("cabin"),
+            itineraries=itineraries,
+        )
+
+    def to_dict(self, fields=None):
+        """轉為可序列化的 dict，fields 可指定只輸出部分欄位"""
+        result = {}
+        for name in fields or self.field_names():
+            value = getattr(self, name)
+            if isinstance(value, datetime):
+                value = value.isoformat()
+            elif name == "itineraries":
+                value = [
+                    {
+                        "duration": itinerary.duration,
+                        "segments": [s._asdict() for s in itinerary.segments],
+                    }
+                    for itinerary in value
+                ]
+            result[name] = value
+        return result
@@ -1,9 +1,20 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, jsonify, request
 from datetime import datetime
 from typing import List, Optional
-from amadeus import Client, ResponseError
-import os
-from api.util.search import search_flights, search_flights_simple
+import json
+from amadeus import ResponseError
+from api.util.amadeus_client import get_amadeus_client
+from api.util.price_history import PRICE_UNIT, price_trend
+from api.util.quota import QuotaExceededError
+from api.util.resilience import CircuitOpenError
+from api.util.search import (
+    parse_fields,
+    project_offers,
+    search_flights,
+    search_flights_calendar,
+    search_flights_simple,
+)
+from services.providers import FlightQuery, get_enabled_providers, search_all
 
 
 class FlightData:
@@ -24,16 +35,17 @@ class Passengers:
 # 初始化 Flask Blueprint
 flight_route = Blueprint("flight", __name__)
 
-# 初始化 Amadeus 客戶端
-amadeus = Client(
-    client_id=os.getenv("AMADEUS_API_KEY"),
-    client_secret=os.getenv("AMADEUS_API_SECRET"),
-)
-
 
 @flight_route.route("/")
 def hello_world():
-    offers = search_flights_simple(amadeus)
+    try:
+        offers = search_flights_simple(get_amadeus_client())
+    except (QuotaExceededError, CircuitOpenError) as e:
+        return (
+            jsonify({"error": str(e)}),
+            503,
+            {"Retry-After": str(e.retry_after)},
+        )
 
     return jsonify(
         {
@@ -62,11 +74,119 @@ def hello_world():
 @flight_route.route("/search", methods=["POST"])
 def search():
     data = request.get_json()
+    calendar = None
     try:
-        offers, search_criteria = search_flights(data, amadeus)
+        fields = parse_fields(request.args.get("fields") or data.get("fields"))
+        if data.get("date_window"):
+            offers, calendar, search_criteria = search_flights_calendar(
+                data, get_amadeus_client()
+            )
+        else:
+            offers, search_criteria = search_flights(data, get_amadeus_client())
     except ValueError as e:
         return jsonify({"error": str(e)}), 400
+    except (QuotaExceededError, CircuitOpenError) as e:
+        return (
+            jsonify({"error": str(e)}),
+            503,
+            {"Retry-After": str(e.retry_after)},
+        )
     except ResponseError as error:
         return jsonify({"error": str(error)}), 500
 
-    return jsonify({"data": offers, "search_criteria": search_criteria})
+    if fields:
+        offers = project_offers(offers, fields)
+
+    if wants_ndjson():
+        return stream_ndjson(offers, search_criteria, calendar)
+
+    result = {"data": offers, "search_criteria": search_criteria}
+    if calendar is not None:
+        result["calendar"] = calendar
+    return jsonify(result)
+
+
+@flight_route.route("/search/all", methods=["POST"])
+async def search_all_providers():
+    """
+    同時查詢所有啟用的資料來源（Amadeus、Google Flights、航空公司爬蟲），
+    逾時的來源只回報狀態，不影響其他來源的結果
+    """
+    data = request.get_json()
+    try:
+        query = FlightQuery.from_request(data)
+        providers = get_enabled_providers(data.get("providers"))
+        deadline = float(data["deadline"]) if data.get("deadline") else None
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    flights, statuses = await search_all(query, providers, deadline)
+    return jsonify(
+        {
+            "data": [f.to_dict() for f in flights],
+            "providers": statuses,
+            "search_criteria": query.to_dict(),
+        }
+    )
+
+
+def wants_ndjson():
+    best = request.accept_mimetypes.best_match(
+        ["application/json", "application/x-ndjson"]
+    )
+    return best == "application/x-ndjson"
+
+
+def stream_ndjson(offers, search_criteria, calendar=None):
+    """
+    以 NDJSON 逐筆輸出：第一行為搜尋條件（與日曆），之後每行一筆報價，
+    避免一次組出完整的 JSON 字串。
+    """
+
+    def generate():
+        header = {"search_criteria": search_criteria}
+        if calendar is not None:
+            header["calendar"] = calendar
+        yield json.dumps(header, ensure_ascii=False) + "\n"
+        for offer in offers:
+            yield json.dumps(offer, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+    return Response(generate(), mimetype="application/x-ndjson")
+
+
+@flight_route.route("/history")
+def history():
+    origin = request.args.get("origin", "")
+    destination = request.args.get("destination", "")
+    if not origin or not destination:
+        return jsonify({"error": "origin and destination are required"}), 400
+
+    try:
+        start = request.args.get("from")
+        end = request.args.get("to")
+        start = datetime.strptime(start, "%Y-%m-%d").date() if start else None
+        end = datetime.strptime(end, "%Y-%m-%d").date() if end else None
+        percentiles = [
+            float(p) for p in request.args.get("percentiles", "10,90").split(",") if p
+        ]
+        if not all(0 <= p <= 100 for p in percentiles):
+            return jsonify({"error": "Percentiles must be between 0 and 100"}), 400
+    except ValueError:
+        return jsonify({"error": "Invalid date or percentile format"}), 400
+
+    round_trip = request.args.get("round_trip", "false").lower() == "true"
+    trend = price_trend(origin, destination, round_trip, start, end, percentiles)
+    return jsonify(
+        {
+            "data": trend,
+            # 票價為每位成人的價格，不是搜尋結果的 grandTotal
+            "price_unit": PRICE_UNIT,
+            "search_criteria": {
+                "origin": origin.upper(),
+                "destination": destination.upper(),
+                "round_trip": round_trip,
+                "from": request.args.get("from"),
+                "to": request.args.get("to"),
+            },
+        }
+    )
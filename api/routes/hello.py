@@ -1,7 +1,6 @@
 from flask import Blueprint, jsonify, request
 from datetime import datetime
 from typing import List, Optional
-from fast_flights import FlightData, Passengers, create_filter, get_flights
 
 hello_route = Blueprint('hello', __name__)
 
@@ -29,6 +28,9 @@ def hello_world():
 
 @hello_route.route('/search', methods=['POST'])
 def search():
+    # fast_flights 匯入成本高，只在實際搜尋時載入
+    from fast_flights import FlightData, Passengers, create_filter, get_flights
+
     data = request.get_json()
     
     # 預設值設定
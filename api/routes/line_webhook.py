@@ -1,8 +1,9 @@
-from flask import Blueprint, jsonify, request, abort, Response
-from linebot import LineBotApi, WebhookHandler
-from linebot.exceptions import InvalidSignatureError
+from flask import jsonify, request
+from linebot import LineBotApi, WebhookParser
+from linebot.exceptions import InvalidSignatureError, LineBotApiError
 from linebot.models import (
     MessageEvent,
+    PostbackEvent,
     TextMessage,
     TextSendMessage,
     QuickReply,
@@ -11,55 +12,77 @@ from linebot.models import (
 )
 import os
 import logging
+import time
 from api.util.search import (
     search_flights,
+    search_flights_calendar,
 )
-from api.util.line import create_flight_flex_message
-from amadeus import Client
+from api.util.line import create_price_calendar_message, render_flex_page
+from api.util.amadeus_client import get_amadeus_client
+from api.util.quota import QuotaExceededError
+from api.util.resilience import CircuitOpenError
+from api.util.dispatcher import EventDispatcher
+from api.util.idempotency import create_event_index
+from api.util.log import bind, log_payload, new_request_id
+from api.util.metrics import record_upstream, register_stats, timed
+from api.util.state_store import (
+    SearchState,
+    create_result_store,
+    create_state_store,
+)
+from api.util.watchlist import get_watch_store
 from datetime import datetime
 import re
+import uuid
+from urllib.parse import parse_qs
 
 
-# 設定日誌
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-line_webhook_route = Blueprint("line_webhook", __name__)
-
-
 # 初始化時檢查環境變數
 try:
-    line_bot_api = LineBotApi(os.getenv("LINE_CHANNEL_ACCESS_TOKEN"))
-    handler = WebhookHandler(os.getenv("LINE_CHANNEL_SECRET"))
+    line_bot_api = LineBotApi(
+        os.getenv("LINE_CHANNEL_ACCESS_TOKEN"),
+        endpoint=os.getenv("LINE_API_ENDPOINT", LineBotApi.DEFAULT_API_ENDPOINT),
+    )
+    parser = WebhookParser(os.getenv("LINE_CHANNEL_SECRET"))
 except Exception as e:
     logger.error(f"Initialization error: {str(e)}")
     raise
 
+# 非同步模式：驗證簽章後立即回應，事件交由背景執行緒處理
+WEBHOOK_ASYNC = os.getenv("LINE_WEBHOOK_ASYNC", "false").lower() == "true"
+# reply token 的有效時間（秒），超過後改用 push message
+REPLY_TOKEN_TTL = int(os.getenv("LINE_REPLY_TOKEN_TTL", "60"))
+
+# 處理過的 webhook event ID（後端與對話狀態相同，無法開啟 SQLite 時改用 memory）
+event_index = create_event_index()
+register_stats("line_event_index", event_index.stats)
+
+event_dispatcher = EventDispatcher(
+    max_workers=int(os.getenv("LINE_WEBHOOK_WORKERS", "4")),
+    max_pending=int(os.getenv("LINE_WEBHOOK_QUEUE_SIZE", "100")),
+    event_timeout=float(os.getenv("LINE_EVENT_TIMEOUT", "20")),
+    event_index=event_index,
+)
+register_stats("line_dispatcher", event_dispatcher.stats)
 
-# 用戶搜尋狀態儲存
-user_states = {}
 
+# 搜尋結果暫存，供「更多結果」分頁時渲染後續頁面；後端與對話狀態相同（LINE_STATE_BACKEND）
+flex_result_cache = create_result_store()
+register_stats("line_result_cache", flex_result_cache.stats)
 
-class SearchState:
-    def __init__(self):
-        self.step = "init"
-        self.data = {
-            "trip": None,
-            "flight_data": [],
-            "passengers": {
-                "adults": 1,
-                "children": 0,
-                "infants_in_seat": 0,
-                "infants_on_lap": 0,
-            },
-            "seat": "economy",
-            "nonStop": None,  # 新增 nonStop 參數
-        }
+# 用戶搜尋狀態儲存（預設為同一主機 worker 共用的 SQLite）
+user_states = create_state_store()
 
 
-@line_webhook_route.route("/", methods=["POST"])
-@line_webhook_route.route("", methods=["POST"])
 def line_webhook():
+    """LINE webhook 入口，路由由 api 套件以 LazyView 註冊"""
+    with bind(request_id=new_request_id()):
+        return handle_webhook()
+
+
+def handle_webhook():
     # 檢查必要的請求頭
     if "X-Line-Signature" not in request.headers:
         logger.error("Missing X-Line-Signature header")
@@ -72,10 +95,18 @@ def line_webhook():
         logger.error("Empty request body")
         return jsonify({"error": "Empty request body"}), 400
 
-    logger.info(f"Received webhook body: {body}")
+    log_payload(logger, "Received webhook", body)
 
     try:
-        handler.handle(body, signature)
+        with timed("webhook_verify"):
+            events = parser.parse(body, signature)
+        if WEBHOOK_ASYNC:
+            if not event_dispatcher.submit(events):
+                logger.warning("Event queue is full, handling events inline")
+                event_dispatcher.dispatch(events)
+        else:
+            with timed("webhook_dispatch"):
+                event_dispatcher.dispatch(events)
     except InvalidSignatureError as e:
         logger.error(f"Invalid signature error: {str(e)}")
         return jsonify({"error": "Invalid signature"}), 400
@@ -86,53 +117,53 @@ def line_webhook():
     return "OK"
 
 
-@handler.add(MessageEvent, message=TextMessage)
+@event_dispatcher.add(MessageEvent, message=TextMessage)
 def handle_message(event):
     try:
-        if hasattr(event, "delivery_context") and event.delivery_context.is_redelivery:
-            return
-
         user_id = event.source.user_id
         message_text = event.message.text.strip().lower()
 
         if message_text == "search flights":
             # 初始化搜尋
-            user_states[user_id] = SearchState()
+            user_states.set(user_id, SearchState())
             quick_reply = QuickReply(
                 items=[
                     QuickReplyButton(action=MessageAction(label="單程", text="單程")),
                     QuickReplyButton(action=MessageAction(label="來回", text="來回")),
                 ]
             )
-            line_bot_api.reply_message(
-                event.reply_token,
+            send_reply(
+                event,
                 TextSendMessage(text="請選擇航程類型：", quick_reply=quick_reply),
             )
             return
 
-        if user_id not in user_states:
-            line_bot_api.reply_message(
-                event.reply_token,
+        if handle_watch_command(event, user_id, message_text):
+            return
+
+        state = user_states.get(user_id)
+        if state is None:
+            send_reply(
+                event,
                 TextSendMessage(text="請輸入 'search flights' 開始搜尋航班。"),
             )
             return
 
-        state = user_states[user_id]
-
         if state.step == "init":
             if message_text in ["單程", "來回"]:
                 state.data["trip"] = (
                     "one-way" if message_text == "單程" else "round-trip"
                 )
                 state.step = "nonstop"  # 改變下一步為詢問是否直飛
+                user_states.set(user_id, state)
                 quick_reply = QuickReply(
                     items=[
                         QuickReplyButton(action=MessageAction(label="是", text="是")),
                         QuickReplyButton(action=MessageAction(label="否", text="否")),
                     ]
                 )
-                line_bot_api.reply_message(
-                    event.reply_token,
+                send_reply(
+                    event,
                     TextSendMessage(
                         text="是否只搜尋直飛航班？", quick_reply=quick_reply
                     ),
@@ -143,13 +174,23 @@ def handle_message(event):
             if message_text in ["是", "否"]:
                 state.data["nonStop"] = "true" if message_text == "是" else "false"
                 state.step = "departure_date"
-                line_bot_api.reply_message(
-                    event.reply_token,
-                    TextSendMessage(text="請輸入出發日期 (YYYY-MM-DD)："),
+                user_states.set(user_id, state)
+                send_reply(
+                    event,
+                    TextSendMessage(
+                        text="請輸入出發日期 (YYYY-MM-DD)，"
+                        "或輸入日期區間 (YYYY-MM-DD~YYYY-MM-DD) 搜尋最便宜的日期："
+                    ),
                 )
             return
 
         if state.step == "departure_date":
+            date_range = DATE_RANGE_PATTERN.match(message_text)
+            if date_range:
+                # 彈性日期：以區間起日作為出發日，搜尋時逐日查詢
+                start, end = date_range.groups()
+                state.data["date_window"] = {"start": start, "end": end}
+                message_text = start
             if re.match(r"\d{4}-\d{2}-\d{2}", message_text):
                 flight_data = {
                     "date": message_text,
@@ -158,48 +199,55 @@ def handle_message(event):
                 }
                 state.data["flight_data"].append(flight_data)
                 state.step = "from_airport"
-                line_bot_api.reply_message(
-                    event.reply_token,
-                    TextSendMessage(text="請輸入出發機場代碼（如：TPE）："),
+                user_states.set(user_id, state)
+                send_reply(
+                    event,
+                    TextSendMessage(
+                        text="請輸入出發機場代碼（如：TPE，多個機場以逗號分隔如：TPE,TSA）："
+                    ),
                 )
             else:
-                line_bot_api.reply_message(
-                    event.reply_token,
+                send_reply(
+                    event,
                     TextSendMessage(text="日期格式不正確，請使用 YYYY-MM-DD 格式："),
                 )
             return
 
         if state.step == "from_airport":
-            if re.match(r"^[A-Z]{3}$", message_text.upper()):
+            if AIRPORT_PATTERN.match(message_text.upper()):
                 state.data["flight_data"][0]["from_airport"] = message_text.upper()
                 state.step = "to_airport"
-                line_bot_api.reply_message(
-                    event.reply_token,
-                    TextSendMessage(text="請輸入目的地機場代碼（如：NRT）："),
+                user_states.set(user_id, state)
+                send_reply(
+                    event,
+                    TextSendMessage(
+                        text="請輸入目的地機場代碼（如：NRT，或都會區代碼如：TYO）："
+                    ),
                 )
             else:
-                line_bot_api.reply_message(
-                    event.reply_token,
+                send_reply(
+                    event,
                     TextSendMessage(text="請輸入正確的機場代碼（3個大寫字母）："),
                 )
             return
 
         if state.step == "to_airport":
-            if re.match(r"^[A-Z]{3}$", message_text.upper()):
+            if AIRPORT_PATTERN.match(message_text.upper()):
                 state.data["flight_data"][0]["to_airport"] = message_text.upper()
                 if state.data["trip"] == "round-trip":
                     state.step = "return_date"
-                    line_bot_api.reply_message(
-                        event.reply_token,
+                    user_states.set(user_id, state)
+                    send_reply(
+                        event,
                         TextSendMessage(text="請輸入回程日期 (YYYY-MM-DD)："),
                     )
                 else:
                     state.step = "search"
-                    execute_search(event.reply_token, state.data)
-                    del user_states[user_id]
+                    execute_search(event, state.data)
+                    user_states.delete(user_id)
             else:
-                line_bot_api.reply_message(
-                    event.reply_token,
+                send_reply(
+                    event,
                     TextSendMessage(text="請輸入正確的機場代碼（3個大寫字母）："),
                 )
             return
@@ -213,11 +261,11 @@ def handle_message(event):
                 }
                 state.data["flight_data"].append(return_flight)
                 state.step = "search"
-                execute_search(event.reply_token, state.data)
-                del user_states[user_id]
+                execute_search(event, state.data)
+                user_states.delete(user_id)
             else:
-                line_bot_api.reply_message(
-                    event.reply_token,
+                send_reply(
+                    event,
                     TextSendMessage(text="日期格式不正確，請使用 YYYY-MM-DD 格式："),
                 )
             return
@@ -226,38 +274,174 @@ def handle_message(event):
         logger.error(f"Message handling error: {str(e)}")
         if not event.delivery_context.is_redelivery:
             try:
-                line_bot_api.reply_message(
-                    event.reply_token,
+                send_reply(
+                    event,
                     TextSendMessage(text="抱歉，處理您的請求時發生錯誤。請稍後再試。"),
                 )
             except Exception as reply_error:
                 logger.error(f"Error sending error message: {str(reply_error)}")
 
 
-def execute_search(reply_token, search_data):
-    try:
-        amadeus = Client(
-            client_id=os.getenv("AMADEUS_API_KEY"),
-            client_secret=os.getenv("AMADEUS_API_SECRET"),
+AIRPORT_PATTERN = re.compile(r"^[A-Z]{3}(,[A-Z]{3})*$")
+
+DATE_RANGE_PATTERN = re.compile(r"^(\d{4}-\d{2}-\d{2})\s*~\s*(\d{4}-\d{2}-\d{2})$")
+
+WATCH_PATTERN = re.compile(
+    r"^watch ([a-z]{3}) ([a-z]{3}) (\d{4}-\d{2}-\d{2})"
+    r"(?: (\d{4}-\d{2}-\d{2}))? (\d+(?:\.\d+)?)$"
+)
+
+
+def handle_watch_command(event, user_id, message_text):
+    """處理價格觀察指令，回傳是否已處理"""
+    match = WATCH_PATTERN.match(message_text)
+    if match:
+        origin, destination, departure_date, return_date, max_price = match.groups()
+        try:
+            watch = get_watch_store().add(
+                user_id=user_id,
+                origin=origin,
+                destination=destination,
+                departure_date=departure_date,
+                return_date=return_date,
+                max_price=max_price,
+            )
+        except ValueError as e:
+            send_reply(event, TextSendMessage(text=f"無法建立價格提醒：{str(e)}"))
+            return True
+        send_reply(
+            event,
+            TextSendMessage(
+                text=f"已建立價格提醒 #{watch.id}：{format_watch(watch)}，"
+                f"低於 TWD {watch.max_price:,.0f} 時通知您。"
+            ),
+        )
+        return True
+
+    if message_text == "watches":
+        watches = get_watch_store().list(user_id)
+        if not watches:
+            text = "目前沒有價格提醒。輸入 'watch TPE NRT YYYY-MM-DD 價格' 建立提醒。"
+        else:
+            text = "\n".join(
+                f"#{w.id} {format_watch(w)} ≤ TWD {w.max_price:,.0f}" for w in watches
+            )
+        send_reply(event, TextSendMessage(text=text))
+        return True
+
+    if message_text.startswith("unwatch "):
+        watch_id = message_text[len("unwatch ") :].strip().lstrip("#")
+        removed = watch_id.isdigit() and get_watch_store().remove(
+            user_id, int(watch_id)
         )
+        text = f"已取消價格提醒 #{watch_id}" if removed else "找不到這個價格提醒。"
+        send_reply(event, TextSendMessage(text=text))
+        return True
+
+    return False
+
+
+def format_watch(watch):
+    dates = watch.departure_date
+    if watch.return_date:
+        dates += f" ~ {watch.return_date}"
+    return f"{watch.origin} → {watch.destination} {dates}"
+
+
+def notify_watch_users(user_ids, watch, price):
+    """以 multicast 通知價格低於門檻的使用者（每次最多 500 人）"""
+    message = TextSendMessage(
+        text=f"✈️ 價格提醒：{format_watch(watch)} 目前最低價 TWD {price:,.0f}，"
+        "已達到您設定的價格。"
+    )
+    for i in range(0, len(user_ids), 500):
+        line_bot_api.multicast(user_ids[i : i + 500], message)
+
+
+def send_reply(event, messages):
+    """以 reply token 回覆，token 已過期或失效時改用 push message 傳送"""
+    age = time.time() - event.timestamp / 1000 if event.timestamp else 0
+    if age < REPLY_TOKEN_TTL:
+        try:
+            with timed("line_reply"):
+                line_bot_api.reply_message(event.reply_token, messages)
+            record_upstream("line", 200)
+            return
+        except LineBotApiError as e:
+            record_upstream("line", e.status_code)
+            if e.status_code != 400:
+                raise
+            logger.warning(f"Reply token rejected, falling back to push: {str(e)}")
+
+    try:
+        with timed("line_push"):
+            line_bot_api.push_message(event.source.sender_id, messages)
+    except LineBotApiError as e:
+        record_upstream("line", e.status_code)
+        raise
+    record_upstream("line", 200)
 
-        if not amadeus.client_id or not amadeus.client_secret:
-            raise ValueError("Amadeus API 認證資訊未設定")
 
-        offers, _ = search_flights(search_data, amadeus)
+@event_dispatcher.add(PostbackEvent)
+def handle_postback(event):
+    try:
+        params = parse_qs(event.postback.data)
+        if params.get("action") != ["more"]:
+            return
+
+        token = params.get("token", [""])[0]
+        start = int(params.get("start", ["0"])[0])
+        offers = flex_result_cache.get(token)
+        if offers is None:
+            send_reply(
+                event,
+                TextSendMessage(
+                    text="搜尋結果已過期，請輸入 'search flights' 重新搜尋。"
+                ),
+            )
+            return
+
+        flex_message, _ = render_flex_page(offers, start, token)
+        send_reply(event, flex_message)
+
+    except Exception as e:
+        logger.error(f"Postback handling error: {str(e)}")
+
+
+@timed("execute_search")
+def execute_search(event, search_data):
+    try:
+        messages = []
+        if search_data.get("date_window"):
+            offers, calendar, search_criteria = search_flights_calendar(
+                search_data, get_amadeus_client()
+            )
+            messages.append(create_price_calendar_message(calendar))
+        else:
+            offers, search_criteria = search_flights(search_data, get_amadeus_client())
 
         if not offers:
-            line_bot_api.reply_message(
-                reply_token,
+            send_reply(
+                event,
                 TextSendMessage(text="目前沒有找到符合的航班，請嘗試其他日期或航線。"),
             )
             return
 
-        flex_message = create_flight_flex_message(offers)
-        line_bot_api.reply_message(reply_token, flex_message)
+        # 只先渲染第一頁，其餘航班留在快取中，使用者點擊「更多結果」時再渲染
+        token = uuid.uuid4().hex[:16]
+        flex_message, next_start = render_flex_page(offers, 0, token)
+        if next_start is not None:
+            flex_result_cache.set(token, offers)
+        messages.append(flex_message)
+        if search_criteria.get("stale"):
+            messages.append(
+                TextSendMessage(text="航班資料來源暫時不穩定，以上為稍早查詢的結果。")
+            )
+        send_reply(event, messages)
 
+    except (QuotaExceededError, CircuitOpenError) as e:
+        logger.warning(f"Search rejected: {str(e)}")
+        send_reply(event, TextSendMessage(text="目前查詢人數較多，請稍後再試一次。"))
     except Exception as e:
         logger.error(f"Search execution error: {str(e)}")
-        line_bot_api.reply_message(
-            reply_token, TextSendMessage(text=f"搜尋航班時發生錯誤：{str(e)}")
-        )
+        send_reply(event, TextSendMessage(text=f"搜尋航班時發生錯誤：{str(e)}"))
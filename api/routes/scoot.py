@@ -1,11 +1,25 @@
 from flask import Blueprint, jsonify, request
 from datetime import datetime
+import threading
 from typing import List, Optional
 from api.models.flight import Flight  # 修改引用路徑
-from services.scrapers.scoot_scraper import ScootScraper
+from services.scrapers.exceptions import ScraperError
+from api.util.lazy import import_attr
 
 scoot_route = Blueprint("scoot", __name__)
-scoot_scraper = ScootScraper()
+_scoot_scraper = None
+_lock = threading.Lock()
+
+
+def get_scoot_scraper():
+    """第一次查詢時才建立爬蟲（連同 aiohttp 一起載入）"""
+    global _scoot_scraper
+    with _lock:
+        if _scoot_scraper is None:
+            _scoot_scraper = import_attr(
+                "services.scrapers.scoot_scraper.ScootScraper"
+            )()
+        return _scoot_scraper
 
 
 @scoot_route.route("/hello")
@@ -82,7 +96,11 @@ async def search_flights():
     date = datetime.strptime(request.args.get("date"), "%Y-%m-%d")
 
     try:
-        flights = await scoot_scraper.search_flights(from_airport, to_airport, date)
-        return jsonify({"flights": [vars(f) for f in flights]})
+        flights = await get_scoot_scraper().search_flights(
+            from_airport, to_airport, date
+        )
+        return jsonify({"flights": [f.to_dict() for f in flights]})
     except NotImplementedError:
         return jsonify({"message": "Scoot Airways search endpoint - Not implemented"})
+    except ScraperError as e:
+        return jsonify({"error": str(e)}), 502
@@ -1,11 +1,25 @@
 from flask import Blueprint, jsonify, request
 from datetime import datetime
-from services.scrapers.tiger_scraper import TigerScraper
+import threading
+from services.scrapers.exceptions import ScraperError
+from api.util.lazy import import_attr
 from ..models.flight import Flight
 
 
 tiger_route = Blueprint("tiger", __name__)
-tiger_scraper = TigerScraper()
+_tiger_scraper = None
+_lock = threading.Lock()
+
+
+def get_tiger_scraper():
+    """第一次查詢時才建立爬蟲（連同 aiohttp 一起載入）"""
+    global _tiger_scraper
+    with _lock:
+        if _tiger_scraper is None:
+            _tiger_scraper = import_attr(
+                "services.scrapers.tiger_scraper.TigerScraper"
+            )()
+        return _tiger_scraper
 
 
 @tiger_route.route("/search")
@@ -65,7 +79,11 @@ async def search_flights():
     date = datetime.strptime(request.args.get("date"), "%Y-%m-%d")
 
     try:
-        flights = await tiger_scraper.search_flights(from_airport, to_airport, date)
-        return jsonify({"flights": [vars(f) for f in flights]})
+        flights = await get_tiger_scraper().search_flights(
+            from_airport, to_airport, date
+        )
+        return jsonify({"flights": [f.to_dict() for f in flights]})
     except NotImplementedError:
         return jsonify({"message": "Tiger Airways search endpoint - Not implemented"})
+    except ScraperError as e:
+        return jsonify({"error": str(e)}), 502
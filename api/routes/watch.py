@@ -0,0 +1,79 @@
+import hashlib
+import hmac
+import os
+from functools import wraps
+
+from flask import Blueprint, jsonify, request
+from api.util.watchlist import get_watch_store
+
+watch_route = Blueprint("watch", __name__)
+
+# 未設定時停用 REST 介面，價格提醒只能透過 LINE Bot 指令管理
+WATCH_API_SECRET = os.getenv("WATCH_API_SECRET", "")
+
+
+def user_token(user_id):
+    """以 WATCH_API_SECRET 簽署的使用者 token，呼叫端以 Authorization: Bearer <token> 帶入"""
+    return hmac.new(
+        WATCH_API_SECRET.encode(), user_id.encode(), hashlib.sha256
+    ).hexdigest()
+
+
+def require_user(view):
+    """驗證 token 與 user_id 相符，並將 user_id 傳給 view"""
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not WATCH_API_SECRET:
+            return jsonify({"error": "Watch API is disabled"}), 403
+        if request.method == "POST":
+            user_id = (request.get_json(silent=True) or {}).get("user_id")
+        else:
+            user_id = request.args.get("user_id")
+        if not user_id or not isinstance(user_id, str):
+            return jsonify({"error": "user_id is required"}), 400
+        scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not hmac.compare_digest(
+            token.strip(), user_token(user_id)
+        ):
+            return jsonify({"error": "Invalid token"}), 401
+        return view(user_id, *args, **kwargs)
+
+    return wrapper
+
+
+@watch_route.route("/", methods=["POST"])
+@require_user
+def add_watch(user_id):
+    data = request.get_json()
+    try:
+        watch = get_watch_store().add(
+            user_id=user_id,
+            origin=data.get("origin"),
+            destination=data.get("destination"),
+            departure_date=data.get("departure_date"),
+            max_price=data.get("max_price"),
+            return_date=data.get("return_date"),
+            adults=data.get("adults", 1),
+            seat=data.get("seat", "economy"),
+            non_stop=data.get("nonStop", "false"),
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify({"data": watch.to_dict()}), 201
+
+
+@watch_route.route("/", methods=["GET"])
+@require_user
+def list_watches(user_id):
+    watches = get_watch_store().list(user_id)
+    return jsonify({"data": [w.to_dict() for w in watches]})
+
+
+@watch_route.route("/<int:watch_id>", methods=["DELETE"])
+@require_user
+def remove_watch(user_id, watch_id):
+    if not get_watch_store().remove(user_id, watch_id):
+        return jsonify({"error": "Watch not found"}), 404
+    return jsonify({"message": "Watch removed"})
@@ -1,3 +1,12 @@
+import logging
+import os
+from functools import lru_cache
+
+from .metrics import register_stats
+from .refdata import ReferenceDB
+
+logger = logging.getLogger(__name__)
+
 # 新增航空公司對照表
 AIRLINE_CODES = {
     "TW": "台灣虎航",
@@ -40,16 +49,38 @@ AIRCRAFT_CODES = {
     "77W": "波音 777-300ER",
     "772": "波音 777-200",
     "773": "波音 777-300",
-    "773": "波音 777-300",
     "330": "空巴 A330",
     "332": "空巴 A330-200",
     "346": "空巴 A340-600",
-    "359": "空巴 A350-900",
     "35K": "空巴 A350-1000",
     "380": "空巴 A380",
 }
 
+# 完整的 IATA/ICAO 航空公司與機型資料（python -m api.util.refdata build 產生），
+# 第一次查詢時才開啟；上方手動維護的中文名稱優先
+reference_db = ReferenceDB(
+    os.getenv("AIRLINE_DB_PATH", "data/refdata.bin"),
+    check_interval=float(os.getenv("AIRLINE_DB_CHECK_INTERVAL", "5")),
+)
+register_stats("airline_db", reference_db.stats, label="table")
+
+
+def lookup_airline(code, default=None):
+    """航空公司名稱：先查中文對照表，再查參考資料檔"""
+    name = AIRLINE_CODES.get(code) or reference_db.airline(code)
+    if name is None:
+        return f"其他航空({code})" if default is None else default
+    return name
 
+
+def lookup_aircraft(code, default=None):
+    name = AIRCRAFT_CODES.get(code) or reference_db.aircraft(code)
+    if name is None:
+        return f"其他機型({code})" if default is None else default
+    return name
+
+
+@lru_cache(maxsize=4096)
 def format_datetime(datetime_str):
     """格式化日期時間字串"""
     from datetime import datetime
@@ -58,6 +89,12 @@ def format_datetime(datetime_str):
     return dt.strftime("%Y-%m-%d %H:%M")
 
 
+@lru_cache(maxsize=1024)
+def format_duration(duration):
+    """將 ISO 8601 飛行時間（如 PT3H15M）轉為中文"""
+    return duration.replace("PT", "").replace("H", "小時").replace("M", "分鐘")
+
+
 def get_airline_info(segment):
     """安全地取得航空公司和機型資訊"""
     try:
@@ -73,10 +110,11 @@ def get_airline_info(segment):
         if not aircraft_code:
             aircraft_code = "未知機型"
 
-        airline_name = AIRLINE_CODES.get(carrier_code, f"其他航空({carrier_code})")
-        aircraft_type = AIRCRAFT_CODES.get(aircraft_code, f"其他機型({aircraft_code})")
-
-        return airline_name, aircraft_type, carrier_code
+        return (
+            lookup_airline(carrier_code),
+            lookup_aircraft(aircraft_code),
+            carrier_code,
+        )
     except Exception as e:
         logger.error(f"Error processing airline info: {str(e)}")
         return "未知航空", "未知機型", "N/A"
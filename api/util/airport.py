@@ -0,0 +1,42 @@
+import re
+
+# 都會區代碼對照表（僅收錄與機場代碼不重複的城市代碼）
+METRO_AIRPORTS = {
+    "TYO": ["NRT", "HND"],
+    "OSA": ["KIX", "ITM"],
+    "SPK": ["CTS", "OKD"],
+    "SEL": ["ICN", "GMP"],
+    "BJS": ["PEK", "PKX"],
+    "LON": ["LHR", "LGW", "STN", "LTN", "LCY"],
+    "PAR": ["CDG", "ORY"],
+    "NYC": ["JFK", "EWR", "LGA"],
+    "WAS": ["IAD", "DCA", "BWI"],
+    "CHI": ["ORD", "MDW"],
+    "YTO": ["YYZ", "YTZ"],
+    "MIL": ["MXP", "LIN", "BGY"],
+    "ROM": ["FCO", "CIA"],
+    "STO": ["ARN", "BMA"],
+}
+
+
+def expand_airports(value):
+    """
+    將機場輸入展開為機場代碼列表。
+    可接受單一代碼、以逗號或斜線分隔的字串、列表，以及都會區代碼（如 TYO）。
+    """
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = re.split(r"[,/\s]+", value)
+
+    airports = []
+    for code in value:
+        code = (code or "").strip().upper()
+        if not code:
+            continue
+        if not re.match(r"^[A-Z]{3}$", code):
+            raise ValueError(f"Invalid airport code: {code}")
+        for airport in METRO_AIRPORTS.get(code, [code]):
+            if airport not in airports:
+                airports.append(airport)
+    return airports
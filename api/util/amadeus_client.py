@@ -0,0 +1,214 @@
+import http.client
+import logging
+import os
+import threading
+import time
+from urllib.error import HTTPError
+from urllib.parse import urlsplit
+
+from amadeus import Client
+from amadeus.client.access_token import AccessToken
+from dotenv import load_dotenv
+
+from api.util.metrics import register_stats
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATH = "/v1/security/oauth2/token"
+
+
+class PooledHTTP:
+    """取代 urlopen 的 HTTP 呼叫器，每個執行緒保留一條持久連線以重用 TCP/TLS"""
+
+    def __init__(self, timeout=30):
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def __call__(self, request):
+        url = urlsplit(request.full_url)
+        path = url.path + ("?" + url.query if url.query else "")
+        headers = dict(request.header_items())
+
+        for attempt in range(2):
+            conn = self._connection(url.scheme, url.netloc)
+            try:
+                conn.request(
+                    request.get_method(), path, body=request.data, headers=headers
+                )
+                response = conn.getresponse()
+                break
+            except (http.client.HTTPException, OSError):
+                # 連線已被伺服器關閉或狀態異常，重新建立一次
+                self._discard(url.scheme, url.netloc)
+                if attempt:
+                    raise
+
+        if response.status >= 400:
+            # 與 urlopen 行為一致，讓 amadeus SDK 以相同方式解析錯誤
+            raise HTTPError(
+                request.full_url,
+                response.status,
+                response.reason,
+                response.headers,
+                response,
+            )
+        return response
+
+    def _connection(self, scheme, netloc):
+        connections = self._connections()
+        conn = connections.get((scheme, netloc))
+        if conn is None:
+            if scheme == "https":
+                conn = http.client.HTTPSConnection(netloc, timeout=self.timeout)
+            else:
+                conn = http.client.HTTPConnection(netloc, timeout=self.timeout)
+            connections[(scheme, netloc)] = conn
+        return conn
+
+    def _discard(self, scheme, netloc):
+        conn = self._connections().pop((scheme, netloc), None)
+        if conn is not None:
+            conn.close()
+
+    def _connections(self):
+        if not hasattr(self._local, "connections"):
+            self._local.connections = {}
+        return self._local.connections
+
+
+class AmadeusClientProvider:
+    """行程共用的 Amadeus 客戶端，在 access token 過期前於背景更新"""
+
+    def __init__(self, refresh_margin=300, retry_interval=30):
+        self.refresh_margin = refresh_margin
+        self.retry_interval = retry_interval
+        self._client = None
+        self._lock = threading.Lock()
+        self._token_lock = threading.Lock()
+        self._timer = None
+        self.token_fetches = 0
+        self.token_reuses = 0
+
+    def get_client(self):
+        with self._lock:
+            if self._client is None:
+                self._client = self._create_client()
+
+        token = self._client.access_token
+        if self._token_valid(token):
+            with self._lock:
+                self.token_reuses += 1
+        else:
+            self._refresh_token()
+        return self._client
+
+    def invalidate_token(self):
+        """伺服器回應 401 時清除 token，下一次 get_client 會重新取得"""
+        with self._lock:
+            if self._client is not None:
+                self._client.access_token.access_token = None
+                self._client.access_token.expires_at = 0
+
+    def stats(self):
+        with self._lock:
+            token = self._client.access_token if self._client else None
+            return {
+                "token_fetches": self.token_fetches,
+                "token_fetches_avoided": self.token_reuses,
+                "token_expires_in": (
+                    max(0, token.expires_at - int(time.time())) if token else 0
+                ),
+            }
+
+    def _create_client(self):
+        client_id = os.getenv("AMADEUS_API_KEY")
+        client_secret = os.getenv("AMADEUS_API_SECRET")
+        if not client_id or not client_secret:
+            raise ValueError("Amadeus API 認證資訊未設定")
+
+        http = PooledHTTP(timeout=int(os.getenv("AMADEUS_HTTP_TIMEOUT", "30")))
+        record_file = os.getenv("AMADEUS_RECORD_FILE")
+        if record_file:
+            # 錄製工具屬於開發用的 services.standin，只在啟用錄製時載入
+            from services.standin.recorder import Recorder, RecordingHTTP
+
+            http = RecordingHTTP(http, Recorder(record_file))
+
+        options = {}
+        # 指向本機替身伺服器等自訂主機，例如 AMADEUS_HOST=127.0.0.1 AMADEUS_SSL=false
+        if os.getenv("AMADEUS_HOST"):
+            options["host"] = os.getenv("AMADEUS_HOST")
+        options["port"] = int(os.getenv("AMADEUS_PORT", "443"))
+        options["ssl"] = os.getenv("AMADEUS_SSL", "true").lower() == "true"
+
+        client = Client(
+            client_id=client_id,
+            client_secret=client_secret,
+            hostname=os.getenv("AMADEUS_HOSTNAME", "test"),
+            http=http,
+            **options,
+        )
+        client.access_token = AccessToken(client)
+        return client
+
+    def _token_valid(self, token):
+        return (
+            token.access_token is not None
+            and int(time.time()) + AccessToken.TOKEN_BUFFER < token.expires_at
+        )
+
+    def _refresh_token(self):
+        with self._token_lock:
+            client = self._client
+            token = client.access_token
+            # 其他執行緒可能已在等待期間完成更新
+            if self._token_valid(token) and (
+                token.expires_at - int(time.time()) > self.refresh_margin
+            ):
+                return
+
+            response = client._unauthenticated_request(
+                "POST",
+                TOKEN_PATH,
+                {
+                    "grant_type": "client_credentials",
+                    "client_id": client.client_id,
+                    "client_secret": client.client_secret,
+                },
+            )
+            expires_in = int(response.result.get("expires_in", 0))
+            token.access_token = response.result.get("access_token")
+            token.expires_at = int(time.time()) + expires_in
+            with self._lock:
+                self.token_fetches += 1
+            # 效期不超過 refresh_margin 時，改在效期過半時更新，避免每秒重新取得 token
+            self._schedule_refresh(
+                max(expires_in - self.refresh_margin, expires_in / 2, 1)
+            )
+
+    def _background_refresh(self):
+        try:
+            self._refresh_token()
+        except Exception as e:
+            logger.error(f"Amadeus token refresh error: {str(e)}")
+            self._schedule_refresh(self.retry_interval)
+
+    def _schedule_refresh(self, delay):
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(delay, self._background_refresh)
+        self._timer.daemon = True
+        self._timer.start()
+
+
+amadeus_provider = AmadeusClientProvider(
+    refresh_margin=int(os.getenv("AMADEUS_TOKEN_REFRESH_MARGIN", "300"))
+)
+register_stats("amadeus", amadeus_provider.stats)
+
+
+def get_amadeus_client():
+    """取得行程共用的 Amadeus 客戶端"""
+    return amadeus_provider.get_client()
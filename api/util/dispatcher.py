@@ -0,0 +1,237 @@
+import contextvars
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+
+from api.util.log import bind
+
+logger = logging.getLogger(__name__)
+
+
+class KeyedSerialExecutor:
+    """
+    有界的執行緒池，同一個 key 的工作依提交順序逐一執行，不同 key 之間可並行。
+    某個 key 的工作完成後，下一個工作重新排到池的尾端，避免單一 key 佔住執行緒。
+    """
+
+    def __init__(self, max_workers=4, thread_name_prefix="keyed"):
+        self.max_workers = max_workers
+        self.thread_name_prefix = thread_name_prefix
+        # key -> 等待中的 (fn, args, future)；key 存在代表該 key 有工作正在執行
+        self._queues = {}
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def submit(self, key, fn, *args):
+        task = (fn, args, Future())
+        with self._lock:
+            queue = self._queues.get(key)
+            if queue is not None:
+                queue.append(task)
+                return task[2]
+            self._queues[key] = deque()
+        self._start(key, task)
+        return task[2]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "active_keys": len(self._queues),
+                "queued": sum(len(queue) for queue in self._queues.values()),
+            }
+
+    def _start(self, key, task):
+        try:
+            self._get_executor().submit(self._run, key, task)
+        except BaseException as e:
+            task[2].set_exception(e)
+            self._next(key)
+
+    def _run(self, key, task):
+        fn, args, future = task
+        if future.set_running_or_notify_cancel():
+            try:
+                future.set_result(fn(*args))
+            except BaseException as e:
+                future.set_exception(e)
+        self._next(key)
+
+    def _next(self, key):
+        with self._lock:
+            queue = self._queues[key]
+            if not queue:
+                del self._queues[key]
+                return
+            task = queue.popleft()
+        self._start(key, task)
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix=self.thread_name_prefix,
+                )
+            return self._executor
+
+
+class EventDispatcher:
+    """
+    將 LINE webhook 事件交給有界的執行緒池處理：不同使用者的事件並行，
+    同一使用者的事件依序執行（user_states 的狀態轉換依賴順序）。
+    有 event_index 時，相同 webhook event ID 的事件只會處理一次（LINE 重送或重複投遞）。
+    事件處理函式以 add() 註冊，依事件類別（與訊息類別）選擇。
+    """
+
+    def __init__(
+        self,
+        max_workers=4,
+        max_pending=100,
+        event_timeout=20,
+        event_index=None,
+    ):
+        self._handlers = {}  # (事件類別, 訊息類別或 None) -> 處理函式
+        self.event_timeout = event_timeout
+        self.event_index = event_index
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = KeyedSerialExecutor(
+            max_workers, thread_name_prefix="line-event"
+        )
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.slow_events = 0  # 執行時間超過 event_timeout 的事件
+        self.timeouts = 0  # dispatch 等待逾時、留在背景執行的事件
+
+    def add(self, event, message=None):
+        """
+        註冊事件處理函式的 decorator，例如 @dispatcher.add(MessageEvent, message=TextMessage)。
+        指定 message 時只處理該類訊息，否則處理該類別的所有事件。
+        """
+
+        def decorator(func):
+            self._handlers[(event, message)] = func
+            return func
+
+        return decorator
+
+    def submit(self, events):
+        """排入背景處理，立即返回；佇列已滿時回傳 False"""
+        if not self._slots.acquire(blocking=False):
+            return False
+        try:
+            futures = self._submit_events(events)
+        except Exception:
+            self._slots.release()
+            raise
+        if not futures:
+            self._slots.release()
+            return True
+
+        # 整批事件都處理完才釋放名額
+        remaining = [len(futures)]
+        lock = threading.Lock()
+
+        def release(_):
+            with lock:
+                remaining[0] -= 1
+                done = remaining[0] == 0
+            if done:
+                self._slots.release()
+
+        for future in futures:
+            future.add_done_callback(release)
+        return True
+
+    def dispatch(self, events):
+        """
+        處理一批事件並等待完成，總等待時間約為最慢的單一使用者事件鏈。
+        超過 event_timeout（依每位使用者的事件數累計）仍未完成的事件會在背景繼續執行。
+        """
+        futures = self._submit_events(events)
+        if not futures:
+            return
+        chain = {}
+        for event in events:
+            key = self._event_key(event)
+            chain[key] = chain.get(key, 0) + 1
+        _, pending = wait(futures, timeout=self.event_timeout * max(chain.values()))
+        if pending:
+            with self._lock:
+                self.timeouts += len(pending)
+            logger.warning(
+                f"{len(pending)} of {len(futures)} events still running after "
+                f"{self.event_timeout}s per event, continuing in background"
+            )
+
+    def stats(self):
+        with self._lock:
+            stats = {
+                "completed": self.completed,
+                "slow_events": self.slow_events,
+                "timeouts": self.timeouts,
+            }
+        stats.update(self._executor.stats())
+        return stats
+
+    def _submit_events(self, events):
+        futures = []
+        for event in events:
+            func = self._find_handler(event)
+            if func is None:
+                logger.info(f"No handler for {event.__class__.__name__}")
+                continue
+            event_id = getattr(event, "webhook_event_id", None)
+            if (
+                self.event_index is not None
+                and event_id
+                and not self.event_index.claim(event_id)
+            ):
+                logger.info(f"Duplicate webhook event {event_id} suppressed")
+                continue
+            # 每個事件在請求 context 的副本中執行，日誌會帶上 request_id
+            context = contextvars.copy_context()
+            futures.append(
+                self._executor.submit(
+                    self._event_key(event), context.run, self._handle, func, event
+                )
+            )
+        return futures
+
+    def _handle(self, func, event):
+        source = getattr(event, "source", None)
+        started = time.monotonic()
+        with bind(
+            event_id=getattr(event, "webhook_event_id", None),
+            user=getattr(source, "sender_id", None),
+        ):
+            try:
+                func(event)
+            except Exception as e:
+                logger.error(f"Event dispatch error: {str(e)}")
+            elapsed = time.monotonic() - started
+            slow = elapsed > self.event_timeout
+            if slow:
+                logger.warning(f"Event handling took {elapsed:.1f}s")
+        with self._lock:
+            self.completed += 1
+            self.slow_events += slow
+
+    def _event_key(self, event):
+        # 對話狀態以 user_id 儲存；沒有 user_id 的事件（例如群組事件）以來源或事件本身區分
+        source = getattr(event, "source", None)
+        return (
+            getattr(source, "user_id", None)
+            or getattr(source, "sender_id", None)
+            or getattr(event, "webhook_event_id", None)
+            or id(event)
+        )
+
+    def _find_handler(self, event):
+        message = getattr(event, "message", None)
+        if message is not None:
+            func = self._handlers.get((type(event), type(message)))
+            if func is not None:
+                return func
+        return self._handlers.get((type(event), None))
@@ -0,0 +1,140 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from api.util.state_store import open_store
+
+
+class MemoryEventIndex:
+    """
+    單一行程內的 webhook 事件索引：記錄 window 秒內處理過的事件 ID，
+    超過筆數上限時淘汰最舊的項目。
+    """
+
+    def __init__(self, window=3600, max_entries=100000):
+        self.window = window
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # event_id -> expires_at
+        self._lock = threading.Lock()
+        self.claimed = 0
+        self.duplicates = 0
+
+    def claim(self, event_id):
+        """第一次見到此事件時回傳 True，重複的事件回傳 False"""
+        now = time.monotonic()
+        with self._lock:
+            expires_at = self._entries.get(event_id)
+            if expires_at is not None and expires_at > now:
+                self.duplicates += 1
+                return False
+            self._entries.pop(event_id, None)
+            self._entries[event_id] = now + self.window
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self.claimed += 1
+            return True
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "claimed": self.claimed,
+                "duplicates": self.duplicates,
+            }
+
+
+class SqliteEventIndex:
+    """以 SQLite 保存處理過的事件 ID，讓多個 gunicorn worker 共用同一份索引"""
+
+    def __init__(self, path, window=3600, max_entries=100000, prune_interval=60):
+        self.path = path
+        self.window = window
+        self.max_entries = max_entries
+        self.prune_interval = prune_interval
+        self._local = threading.local()
+        self._last_prune = 0.0
+        self._lock = threading.Lock()
+        self.claimed = 0
+        self.duplicates = 0
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS webhook_events ("
+                "event_id TEXT PRIMARY KEY, "
+                "expires_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_webhook_events_expires_at "
+                "ON webhook_events (expires_at)"
+            )
+
+    def claim(self, event_id):
+        """INSERT OR IGNORE 只有一個 worker 能成功寫入，寫入成功者負責處理事件"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM webhook_events WHERE event_id = ? AND expires_at <= ?",
+                (event_id, now),
+            )
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO webhook_events (event_id, expires_at) "
+                "VALUES (?, ?)",
+                (event_id, now + self.window),
+            )
+        claimed = cursor.rowcount == 1
+        with self._lock:
+            if claimed:
+                self.claimed += 1
+            else:
+                self.duplicates += 1
+        if now - self._last_prune > self.prune_interval:
+            self._last_prune = now
+            self.prune()
+        return claimed
+
+    def prune(self):
+        """刪除過期項目，並在超過上限時移除最舊的項目"""
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM webhook_events WHERE expires_at <= ?", (time.time(),)
+            )
+            conn.execute(
+                "DELETE FROM webhook_events WHERE event_id IN ("
+                "SELECT event_id FROM webhook_events ORDER BY expires_at DESC "
+                "LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def stats(self):
+        row = self._connect().execute("SELECT COUNT(*) FROM webhook_events").fetchone()
+        with self._lock:
+            return {
+                "entries": row[0],
+                "claimed": self.claimed,
+                "duplicates": self.duplicates,
+            }
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+
+def create_event_index():
+    """
+    依環境變數建立 webhook 事件索引，後端與對話狀態相同（LINE_STATE_BACKEND）。
+    重送可能送到其他 worker，多 worker 部署需使用 SQLite 才能攔截；
+    LINE_EVENT_INDEX_DB 未設定時與對話狀態共用同一個資料庫檔案。
+    """
+    window = int(os.getenv("LINE_EVENT_INDEX_WINDOW", "3600"))
+    max_entries = int(os.getenv("LINE_EVENT_INDEX_MAX_ENTRIES", "100000"))
+    return open_store(
+        "webhook event index",
+        lambda: MemoryEventIndex(window=window, max_entries=max_entries),
+        lambda path: SqliteEventIndex(path, window=window, max_entries=max_entries),
+        path=os.getenv("LINE_EVENT_INDEX_DB"),
+    )
@@ -0,0 +1,61 @@
+"""
+延後載入：模組與 view 在第一次使用時才匯入，縮短 serverless 冷啟動時間。
+STARTUP_PROFILE=true 時記錄每個延後匯入的模組耗時。
+"""
+
+import importlib
+import logging
+import os
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+STARTUP_PROFILE = os.getenv("STARTUP_PROFILE", "false").lower() == "true"
+
+_lock = threading.RLock()
+
+
+def import_module(name):
+    """匯入模組；STARTUP_PROFILE 開啟時記錄第一次匯入的耗時"""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    with _lock:
+        if not STARTUP_PROFILE or name in sys.modules:
+            return importlib.import_module(name)
+        started = time.perf_counter()
+        module = importlib.import_module(name)
+        logger.info(
+            f"Lazy import {name}: {(time.perf_counter() - started) * 1000:.1f} ms"
+        )
+        return module
+
+
+def import_attr(import_name):
+    """依 'package.module.attr' 取得屬性"""
+    module_name, attr = import_name.rsplit(".", 1)
+    return getattr(import_module(module_name), attr)
+
+
+class LazyView:
+    """
+    Flask 延遲載入 view：路由在啟動時註冊，對應的模組在第一次請求時才匯入，
+    例如 LazyView("api.routes.line_webhook.line_webhook")。
+    """
+
+    def __init__(self, import_name):
+        self.import_name = import_name
+        self.__name__ = import_name.rsplit(".", 1)[-1]
+        self.__module__ = import_name.rsplit(".", 1)[0]
+        self._view = None
+
+    @property
+    def view(self):
+        if self._view is None:
+            self._view = import_attr(self.import_name)
+        return self._view
+
+    def __call__(self, *args, **kwargs):
+        return self.view(*args, **kwargs)
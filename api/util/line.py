@@ -2,13 +2,261 @@ from linebot.models import (
     FlexSendMessage,
     BubbleContainer,
     BoxComponent,
+    ButtonComponent,
+    CarouselContainer,
+    PostbackAction,
     TextComponent,
     SeparatorComponent,
+    TextSendMessage,
 )
-from .airline import format_datetime, get_airline_info, AIRLINE_CODES
+from .airline import format_datetime, format_duration, get_airline_info, lookup_airline
+from .metrics import timed
+import json
+import logging
+import os
+import threading
 
+logger = logging.getLogger(__name__)
 
+# LINE Flex carousel 限制：最多 12 個 bubble、JSON 大小 50 KB
+FLEX_MAX_BUBBLES = 12
+FLEX_MAX_BYTES = int(os.getenv("LINE_FLEX_MAX_BYTES", "50000"))
+# 每頁最多顯示的航班數（另保留一個「更多結果」bubble）
+FLEX_PAGE_SIZE = min(int(os.getenv("LINE_FLEX_PAGE_SIZE", "10")), FLEX_MAX_BUBBLES - 1)
+
+
+class RawFlexSendMessage:
+    """已組好 JSON 的 Flex 訊息，傳送時直接輸出，不需再建立 linebot model 物件"""
+
+    def __init__(self, payload):
+        self.payload = payload
+        self.alt_text = payload["altText"]
+        self.contents = payload["contents"]
+
+    def as_json_dict(self):
+        return self.payload
+
+
+class _FlexTemplates:
+    """
+    由 linebot model 產生一次各元件的 JSON 樣板，之後只替換文字與 contents，
+    因此欄位與順序與 create_flight_flex_message_models 的輸出完全相同。
+    """
+
+    def __init__(self):
+        self.airline = self._text(size="md", weight="bold")
+        self.aircraft = self._text(size="xs", color="#888888", margin="sm")
+        self.place = self._text(size="sm")
+        self.duration = self._text(size="xs", color="#888888")
+        self.price = self._text(size="lg", weight="bold", color="#1DB446")
+        self.tax_note = TextComponent(
+            text="*含稅價", size="xs", color="#888888"
+        ).as_json_dict()
+        self.separator = SeparatorComponent(margin="md").as_json_dict()
+        self.times_box = self._box(margin="sm", spacing="sm")
+        self.segments_box = self._box(margin="md", spacing="sm")
+        self.price_box = self._box(margin="md")
+        self.body = self._box()
+        self.bubble = self._roundtrip(
+            BubbleContainer(body=BoxComponent(layout="vertical", contents=[]))
+        )
+        self.message = FlexSendMessage(
+            alt_text="航班資訊", contents=CarouselContainer(contents=[])
+        ).as_json_dict()
+
+    @staticmethod
+    def _text(**kwargs):
+        return TextComponent(text="", **kwargs).as_json_dict()
+
+    @staticmethod
+    def _box(**kwargs):
+        return BoxComponent(layout="vertical", contents=[], **kwargs).as_json_dict()
+
+    @staticmethod
+    def _roundtrip(container):
+        # FlexSendMessage 會把 dict 重新解析為 model，樣板也經過同樣的轉換
+        return BubbleContainer.new_from_json_dict(
+            container.as_json_dict()
+        ).as_json_dict()
+
+
+_templates = None
+_templates_lock = threading.Lock()
+
+
+def _get_templates():
+    global _templates
+    if _templates is None:
+        with _templates_lock:
+            if _templates is None:
+                _templates = _FlexTemplates()
+    return _templates
+
+
+def _with(template, key, value):
+    component = template.copy()
+    component[key] = value
+    return component
+
+
+def render_flight_bubble(offer, t=None):
+    """直接輸出單一航班 bubble 的 JSON dict"""
+    t = t or _get_templates()
+    segments_contents = []
+    for itinerary in offer.get("itineraries", []):
+        for segment in itinerary.get("segments", []):
+            airline_name, aircraft_type, flight_number = get_airline_info(segment)
+            carrier_code = segment.get("carrierCode", "")
+            segments_contents.extend(
+                [
+                    _with(
+                        t.airline,
+                        "text",
+                        f"✈️ {airline_name}-{carrier_code}{segment.get('number', 'N/A')}",
+                    ),
+                    _with(t.aircraft, "text", f"機型: {aircraft_type}"),
+                    _with(
+                        t.times_box,
+                        "contents",
+                        [
+                            _with(
+                                t.place,
+                                "text",
+                                f"從 {segment['departure']['iataCode']} "
+                                f"{format_datetime(segment['departure']['at'])}",
+                            ),
+                            _with(
+                                t.place,
+                                "text",
+                                f"到 {segment['arrival']['iataCode']} "
+                                f"{format_datetime(segment['arrival']['at'])}",
+                            ),
+                            _with(
+                                t.duration,
+                                "text",
+                                f"飛行時間: {format_duration(segment['duration'])}",
+                            ),
+                        ],
+                    ),
+                    t.separator.copy(),
+                ]
+            )
+
+    price = f"總價: TWD {float(offer['price']['grandTotal']):,.0f}"
+    body = _with(
+        t.body,
+        "contents",
+        [
+            _with(t.segments_box, "contents", segments_contents),
+            _with(
+                t.price_box,
+                "contents",
+                [_with(t.price, "text", price), t.tax_note.copy()],
+            ),
+        ],
+    )
+    return _with(t.bubble, "body", body)
+
+
+@timed("flex_render")
 def create_flight_flex_message(offers):
+    """以預先產生的樣板輸出 Flex carousel，結果與 create_flight_flex_message_models 相同"""
+    t = _get_templates()
+    bubbles = [render_flight_bubble(offer, t) for offer in offers[:10]]
+    payload = t.message.copy()
+    payload["contents"] = _with(t.message["contents"], "contents", bubbles)
+    return RawFlexSendMessage(payload)
+
+
+def _json_size(value):
+    # 與 line-bot-sdk 送出時相同的序列化方式
+    return len(json.dumps(value).encode())
+
+
+def create_more_results_bubble(remaining, postback_data):
+    """「更多結果」bubble，點擊後以 postback 載入下一頁"""
+    return BubbleContainer(
+        body=BoxComponent(
+            layout="vertical",
+            contents=[
+                TextComponent(
+                    text=f"還有 {remaining} 筆航班",
+                    size="md",
+                    weight="bold",
+                    wrap=True,
+                )
+            ],
+        ),
+        footer=BoxComponent(
+            layout="vertical",
+            contents=[
+                ButtonComponent(
+                    style="primary",
+                    action=PostbackAction(
+                        label="更多結果", data=postback_data, display_text="更多結果"
+                    ),
+                )
+            ],
+        ),
+    ).as_json_dict()
+
+
+@timed("flex_render")
+def render_flex_page(offers, start=0, token=None, page_size=None, max_bytes=None):
+    """
+    從 offers[start:] 開始渲染一頁 Flex carousel，依 bubble 數與 JSON 大小上限分頁。
+    還有剩餘航班且有 token 時，附上「更多結果」postback bubble。
+    回傳 (訊息, 下一頁起始位置或 None)。
+    """
+    t = _get_templates()
+    page_size = page_size or FLEX_PAGE_SIZE
+    max_bytes = max_bytes or FLEX_MAX_BYTES
+
+    more_bubble = None
+    if token:
+        more_bubble = create_more_results_bubble(
+            len(offers), f"action=more&token={token}&start={len(offers)}"
+        )
+    # 預留外層訊息與「更多結果」bubble 的空間
+    budget = max_bytes - _json_size(t.message)
+    if more_bubble is not None:
+        budget -= _json_size(more_bubble) + 2
+
+    bubbles = []
+    index = start
+    while index < len(offers) and len(bubbles) < page_size:
+        bubble = render_flight_bubble(offers[index], t)
+        size = _json_size(bubble) + 2
+        if size > budget:
+            if not bubbles:
+                # 單一 bubble 就超過上限時略過，避免整則訊息傳送失敗
+                logger.warning(
+                    f"Skipped flight bubble {index}: {size} bytes exceeds "
+                    f"the {budget}-byte Flex budget"
+                )
+                index += 1
+                continue
+            break
+        bubbles.append(bubble)
+        budget -= size
+        index += 1
+
+    next_start = index if index < len(offers) else None
+    if next_start is not None and token:
+        bubbles.append(
+            create_more_results_bubble(
+                len(offers) - next_start,
+                f"action=more&token={token}&start={next_start}",
+            )
+        )
+
+    payload = t.message.copy()
+    payload["contents"] = _with(t.message["contents"], "contents", bubbles)
+    return RawFlexSendMessage(payload), next_start
+
+
+def create_flight_flex_message_models(offers):
+    """以 linebot model 物件組出 Flex carousel（原始實作，供比對與效能測試）"""
     bubbles = []
     for offer in offers[:10]:  # 限制最多顯示10筆
         segments_contents = []
@@ -63,7 +311,7 @@ def create_flight_flex_message(offers):
             "cabin"
         ].capitalize()
         airline_code = offer["validatingAirlineCodes"][0]
-        airline_name = AIRLINE_CODES.get(airline_code, airline_code)
+        airline_name = lookup_airline(airline_code, airline_code)
 
         bubble = BubbleContainer(
             body=BoxComponent(
@@ -110,3 +358,20 @@ def create_flight_flex_message(offers):
             "contents": [bubble.as_json_dict() for bubble in bubbles],
         },
     )
+
+
+def create_price_calendar_message(calendar):
+    """將彈性日期搜尋的每日最低價轉為文字訊息"""
+    prices = [day["min_price"] for day in calendar if day["min_price"] is not None]
+    cheapest = min(prices) if prices else None
+
+    lines = ["📅 每日最低價"]
+    for day in calendar:
+        date = day["date"][5:].replace("-", "/")
+        if day["min_price"] is None:
+            lines.append(f"{date}  無航班")
+            continue
+        mark = " ★" if day["min_price"] == cheapest else ""
+        lines.append(f"{date}  {day['currency']} {day['min_price']:,.0f}{mark}")
+
+    return TextSendMessage(text="\n".join(lines))
@@ -0,0 +1,198 @@
+"""
+非同步結構化日誌：請求執行緒只把紀錄放進佇列，格式化與寫出由背景 QueueListener 處理。
+
+- LOG_FORMAT=json（預設）輸出一行一筆 JSON，text 為一般文字格式
+- 透過 bind() 綁定的欄位（request_id、event_id 等）會跟著 contextvars 傳遞，
+  背景執行緒需以 contextvars.copy_context() 執行才能帶上
+- LINE 使用者 / 群組 / 聊天室 ID 在輸出前以雜湊取代
+- log_payload 依 LOG_BODY_SAMPLE_RATE 抽樣記錄請求內容，並截斷為 LOG_BODY_MAX_CHARS
+"""
+
+import atexit
+import contextvars
+import hashlib
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import threading
+import uuid
+from contextlib import contextmanager
+
+from api.util.metrics import register_stats
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_BODY_SAMPLE_RATE = float(os.getenv("LOG_BODY_SAMPLE_RATE", "0.01"))
+LOG_BODY_MAX_CHARS = int(os.getenv("LOG_BODY_MAX_CHARS", "512"))
+LOG_REDACT_IDS = os.getenv("LOG_REDACT_IDS", "true").lower() == "true"
+
+# LINE 的 userId / groupId / roomId：U、C、R 開頭加 32 個十六進位字元
+LINE_ID_PATTERN = re.compile(r"\b[UCR][0-9a-f]{32}\b")
+
+_context = contextvars.ContextVar("log_context", default={})
+
+# LogRecord 內建屬性，其餘屬性視為 extra 欄位輸出
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+def redact(text):
+    """以 sha256 前 8 碼取代 LINE ID，同一使用者仍可關聯"""
+    if not LOG_REDACT_IDS or not isinstance(text, str):
+        return text
+    return LINE_ID_PATTERN.sub(
+        lambda m: f"{m.group()[0]}:{hashlib.sha256(m.group().encode()).hexdigest()[:8]}",
+        text,
+    )
+
+
+def new_request_id():
+    return uuid.uuid4().hex[:16]
+
+
+def get_context():
+    return _context.get()
+
+
+@contextmanager
+def bind(**fields):
+    """在區塊內的日誌附加欄位（例如 request_id），離開時還原"""
+    token = _context.set({**_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+def truncate(text, limit=None):
+    limit = LOG_BODY_MAX_CHARS if limit is None else limit
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}...({len(text) - limit} more chars)"
+
+
+def log_payload(logger, message, body, sample_rate=None, **fields):
+    """
+    依抽樣率記錄請求內容（截斷後）。未被抽中的請求只在 DEBUG 記錄大小，
+    避免每個請求都序列化與寫出完整內容。
+    """
+    rate = LOG_BODY_SAMPLE_RATE if sample_rate is None else sample_rate
+    if rate > 0 and random.random() < rate and logger.isEnabledFor(logging.INFO):
+        logger.info(
+            message, extra={"body": truncate(body), "size": len(body), **fields}
+        )
+    elif logger.isEnabledFor(logging.DEBUG):
+        logger.debug(message, extra={"size": len(body), **fields})
+
+
+class _ContextQueueHandler(logging.handlers.QueueHandler):
+    """在呼叫端執行緒取得 contextvars 欄位與訊息文字，其餘交給背景執行緒"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        record.context = _context.get()
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # 寫出跟不上時丟棄，不讓請求執行緒等待 I/O
+            self.dropped += 1
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": redact(record.getMessage()),
+        }
+        entry.update(getattr(record, "context", None) or {})
+        for name, value in vars(record).items():
+            if name not in _RECORD_ATTRS and name != "context":
+                entry[name] = value
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        for name, value in entry.items():
+            if isinstance(value, str) and name not in ("level", "logger"):
+                entry[name] = redact(value)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s %(message)s")
+
+    def format(self, record):
+        text = super().format(record)
+        context = getattr(record, "context", None) or {}
+        extra = {
+            name: value
+            for name, value in vars(record).items()
+            if name not in _RECORD_ATTRS and name != "context"
+        }
+        fields = " ".join(f"{k}={v}" for k, v in {**context, **extra}.items())
+        return redact(f"{text} {fields}" if fields else text)
+
+
+_listener = None
+_queue_handler = None
+_lock = threading.Lock()
+
+
+def configure_logging():
+    """設定 root logger 使用佇列與背景寫出（可重複呼叫，只會設定一次）"""
+    global _listener, _queue_handler
+    with _lock:
+        if _listener is not None:
+            return
+        log_queue = queue.Queue(LOG_QUEUE_SIZE)
+        output = logging.StreamHandler()
+        output.setFormatter(
+            JsonFormatter() if LOG_FORMAT == "json" else TextFormatter()
+        )
+        _queue_handler = _ContextQueueHandler(log_queue)
+        root = logging.getLogger()
+        for existing in list(root.handlers):
+            root.removeHandler(existing)
+        root.addHandler(_queue_handler)
+        root.setLevel(LOG_LEVEL)
+        _listener = logging.handlers.QueueListener(log_queue, output)
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """停止背景執行緒並寫出佇列中剩餘的紀錄"""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def stats():
+    if _queue_handler is None:
+        return {"queued": 0, "dropped": 0}
+    return {
+        "queued": _queue_handler.queue.qsize(),
+        "dropped": _queue_handler.dropped,
+    }
+
+
+register_stats("logging", stats)
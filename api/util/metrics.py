@@ -0,0 +1,273 @@
+"""
+輕量的 Prometheus 格式指標：Counter、Gauge、Histogram 與分段計時。
+
+記錄只需一次加鎖與 bisect；各元件的 stats() 透過 register_stats 註冊，
+只在 /metrics 被讀取時才收集，沒有人抓取時幾乎沒有額外成本。
+METRICS_ENABLED=false 時 timed 不做任何事，/metrics 回傳 404。
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ContextDecorator
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+PREFIX = "flight_alarm_"
+
+# 延遲直方圖預設分組（秒）
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        (name, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+        for name, value in pairs
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = PREFIX + name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _header(self):
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+
+    def collect(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = self._header()
+        for labels, value in values:
+            lines.append(
+                f"{self.name}{_format_labels(self.labelnames, labels)} "
+                f"{_format_value(value)}"
+            )
+        return lines
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value, *labels):
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                # 各分組的計數（最後一格為 +Inf）、總和、次數
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def collect(self):
+        with self._lock:
+            values = sorted(
+                (labels, (list(counts), total, count))
+                for labels, (counts, total, count) in self._values.items()
+            )
+        lines = self._header()
+        bounds = self.buckets + (float("inf"),)
+        for labels, (counts, total, count) in values:
+            cumulative = 0
+            for bound, bucket_count in zip(bounds, counts):
+                cumulative += bucket_count
+                label_text = _format_labels(
+                    self.labelnames, labels, [("le", _format_value(float(bound)))]
+                )
+                lines.append(f"{self.name}_bucket{label_text} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(total)}")
+            lines.append(f"{self.name}_count{label_text} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._stats = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def register_stats(self, name, stats_fn, label="key"):
+        """
+        註冊回傳 dict 的 stats 函式，讀取 /metrics 時才呼叫。
+        數值輸出為 gauge；巢狀 dict 以 label 區分；字串值輸出為 {value="..."} 1。
+        """
+        with self._lock:
+            self._stats.append((name, stats_fn, label))
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics)
+            stats = list(self._stats)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.collect())
+        for name, stats_fn, label in stats:
+            try:
+                values = stats_fn()
+            except Exception:
+                continue
+            lines.extend(_stats_lines(PREFIX + name, values, label))
+        return "\n".join(lines) + "\n"
+
+
+def _stats_lines(prefix, values, label):
+    lines = []
+    for key, value in sorted(values.items()):
+        name = f"{prefix}_{key}"
+        if isinstance(value, bool):
+            samples = [("", int(value))]
+        elif isinstance(value, (int, float)):
+            samples = [("", value)]
+        elif isinstance(value, str):
+            samples = [(_format_labels(("value",), (value,)), 1)]
+        elif isinstance(value, dict):
+            samples = [
+                (_format_labels((label,), (k,)), v)
+                for k, v in sorted(value.items())
+                if isinstance(v, (int, float))
+            ]
+        else:
+            continue
+        if not samples:
+            continue
+        lines.append(f"# TYPE {name} gauge")
+        lines.extend(f"{name}{labels} {_format_value(v)}" for labels, v in samples)
+    return lines
+
+
+REGISTRY = Registry()
+
+stage_latency = REGISTRY.register(
+    Histogram(
+        "stage_duration_seconds",
+        "Time spent in each processing stage",
+        ("stage",),
+    )
+)
+stage_errors = REGISTRY.register(
+    Counter("stage_errors_total", "Stages that ended with an exception", ("stage",))
+)
+http_latency = REGISTRY.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "HTTP request latency by endpoint",
+        ("endpoint", "method"),
+    )
+)
+http_responses = REGISTRY.register(
+    Counter(
+        "http_responses_total",
+        "HTTP responses by endpoint and status",
+        ("endpoint", "status"),
+    )
+)
+http_in_flight = REGISTRY.register(
+    Gauge("http_requests_in_flight", "HTTP requests being handled", ("endpoint",))
+)
+upstream_responses = REGISTRY.register(
+    Counter(
+        "upstream_responses_total",
+        "Upstream API calls by service and status",
+        ("service", "status"),
+    )
+)
+upstream_in_flight = REGISTRY.register(
+    Gauge("upstream_requests_in_flight", "Upstream API calls in progress", ("service",))
+)
+
+
+class timed(ContextDecorator):
+    """記錄一個處理階段的耗時，可當作 with 區塊或裝飾器使用"""
+
+    def __init__(self, stage):
+        self.stage = stage
+        self._local = threading.local()
+
+    def __enter__(self):
+        if METRICS_ENABLED:
+            starts = getattr(self._local, "starts", None)
+            if starts is None:
+                starts = self._local.starts = []
+            starts.append(time.perf_counter())
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if METRICS_ENABLED:
+            elapsed = time.perf_counter() - self._local.starts.pop()
+            stage_latency.observe(elapsed, self.stage)
+            if exc_type is not None:
+                stage_errors.inc(self.stage)
+        return False
+
+
+def observe_stage(stage, elapsed):
+    """記錄已量測好的階段耗時（協程等無法使用 timed 的情況）"""
+    if METRICS_ENABLED:
+        stage_latency.observe(elapsed, stage)
+
+
+def record_upstream(service, status):
+    if METRICS_ENABLED:
+        upstream_responses.inc(service, str(status))
+
+
+def register_stats(name, stats_fn, label="key"):
+    REGISTRY.register_stats(name, stats_fn, label)
+
+
+def render_metrics():
+    return REGISTRY.render()
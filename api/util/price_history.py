@@ -0,0 +1,290 @@
+import fcntl
+import logging
+import os
+import threading
+import time
+from array import array
+from datetime import date
+
+logger = logging.getLogger(__name__)
+
+EPOCH = date(1970, 1, 1).toordinal()
+
+# 欄位名稱與 array 型別：航線、出發日（epoch 起算天數）、航空公司、航班號碼、票價、觀測時間
+COLUMNS = (
+    ("route", "I"),
+    ("departure_day", "i"),
+    ("carrier", "H"),
+    ("flights", "I"),
+    ("price", "f"),
+    ("observed_at", "I"),
+)
+
+# 以字典編碼的字串欄位
+DICTIONARIES = ("route", "carrier", "flights")
+
+
+class _Dictionary:
+    """字串 <-> 整數編號對照，以每行一筆的文字檔持久化"""
+
+    def __init__(self, path):
+        self.path = path
+        self.values = []
+        self.ids = {}
+        self._offset = 0
+
+    def refresh(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            f.seek(self._offset)
+            while True:
+                line = f.readline()
+                if not line.endswith("\n"):
+                    break
+                self._offset = f.tell()
+                self.ids[line[:-1]] = len(self.values)
+                self.values.append(line[:-1])
+
+    def encode(self, value):
+        """取得編號，新值會追加到檔案（呼叫端需持有寫入鎖）"""
+        value_id = self.ids.get(value)
+        if value_id is None:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(value + "\n")
+            self.refresh()
+            value_id = self.ids[value]
+        return value_id
+
+
+class PriceHistoryStore:
+    """
+    只追加的欄式票價紀錄，每個欄位是一個二進位檔。
+    每筆約 22 bytes，多個 worker 以檔案鎖保證各欄位對齊。
+    寫入只同步字串字典並追加到檔案；欄位在第一次查詢時才載入記憶體，之後只讀取新增的部分。
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.columns = {name: array(code) for name, code in COLUMNS}
+        self.dictionaries = {
+            name: _Dictionary(os.path.join(directory, f"{name}.txt"))
+            for name in DICTIONARIES
+        }
+        self._route_rows = {}  # route_id -> array 列索引
+        self._lock = threading.Lock()
+        self._lock_path = os.path.join(directory, ".lock")
+
+    def __len__(self):
+        return self._row_count()
+
+    def append(self, rows):
+        """rows: (route, departure_date, carrier, flights, price, observed_at) 列表"""
+        if not rows:
+            return
+        with self._lock, open(self._lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                for dictionary in self.dictionaries.values():
+                    dictionary.refresh()
+                new = {name: array(code) for name, code in COLUMNS}
+                for route, departure_date, carrier, flights, price, observed in rows:
+                    new["route"].append(self.dictionaries["route"].encode(route))
+                    new["departure_day"].append(
+                        date.fromisoformat(departure_date).toordinal() - EPOCH
+                    )
+                    new["carrier"].append(self.dictionaries["carrier"].encode(carrier))
+                    new["flights"].append(self.dictionaries["flights"].encode(flights))
+                    new["price"].append(price)
+                    new["observed_at"].append(int(observed))
+                # 先截掉先前中斷寫入留下的不完整列，新資料才會與其他欄位對齊
+                count = self._row_count()
+                for name, _ in COLUMNS:
+                    with open(self._column_path(name), "ab") as f:
+                        f.truncate(count * new[name].itemsize)
+                        new[name].tofile(f)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def query(self, route, start=None, end=None):
+        """回傳 {出發日: [票價...]}，只掃描該航線的列"""
+        with self._lock:
+            self._refresh()
+            route_id = self.dictionaries["route"].ids.get(route)
+            if route_id is None:
+                return {}
+            start_day = start.toordinal() - EPOCH if start else None
+            end_day = end.toordinal() - EPOCH if end else None
+            days = self.columns["departure_day"]
+            prices = self.columns["price"]
+
+            result = {}
+            for row in self._route_rows.get(route_id, ()):
+                day = days[row]
+                if start_day is not None and day < start_day:
+                    continue
+                if end_day is not None and day > end_day:
+                    continue
+                result.setdefault(day, []).append(prices[row])
+
+        return {
+            date.fromordinal(day + EPOCH).isoformat(): values
+            for day, values in sorted(result.items())
+        }
+
+    def _refresh(self):
+        """讀取其他行程新增的資料（呼叫端需持有 self._lock）"""
+        for dictionary in self.dictionaries.values():
+            dictionary.refresh()
+
+        count = len(self.columns["price"])
+        total = self._row_count()
+        if total <= count:
+            return
+
+        for name, _ in COLUMNS:
+            column = self.columns[name]
+            with open(self._column_path(name), "rb") as f:
+                f.seek(count * column.itemsize)
+                column.fromfile(f, total - count)
+
+        route_rows = self._route_rows
+        for row, route_id in enumerate(self.columns["route"][count:total], count):
+            rows = route_rows.get(route_id)
+            if rows is None:
+                rows = route_rows[route_id] = array("I")
+            rows.append(row)
+
+    def _row_count(self):
+        """檔案中各欄位都完整的列數（寫入中途中斷時以最短的欄位為準）"""
+        sizes = []
+        for name, _ in COLUMNS:
+            path = self._column_path(name)
+            itemsize = self.columns[name].itemsize
+            sizes.append(
+                os.path.getsize(path) // itemsize if os.path.exists(path) else 0
+            )
+        return min(sizes)
+
+    def _column_path(self, name):
+        return os.path.join(self.directory, f"{name}.bin")
+
+
+def percentile(sorted_values, pct):
+    """線性內插的百分位數"""
+    if not sorted_values:
+        return None
+    k = (len(sorted_values) - 1) * pct / 100
+    lower = int(k)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (
+        k - lower
+    )
+
+
+def route_key(origin, destination, round_trip=False):
+    route = f"{origin.upper()}-{destination.upper()}"
+    return f"{route}-{origin.upper()}" if round_trip else route
+
+
+# 紀錄的票價單位：每位成人的價格，不同人數的搜尋才能放在同一條趨勢比較
+PRICE_UNIT = "per_adult"
+
+
+def offer_rows(search_params, offers, observed_at=None):
+    """
+    將搜尋結果轉為紀錄列；票價為第一位旅客（成人）的價格（PRICE_UNIT），
+    單人時等同 grandTotal，多人時低於搜尋結果顯示的總價。
+    """
+    observed_at = observed_at or time.time()
+    route = route_key(
+        search_params["originLocationCode"],
+        search_params["destinationLocationCode"],
+        bool(search_params.get("returnDate")),
+    )
+    rows = []
+    for offer in offers:
+        segments = [
+            segment
+            for itinerary in offer.get("itineraries", [])
+            for segment in itinerary.get("segments", [])
+        ]
+        if not segments:
+            continue
+        carrier = (offer.get("validatingAirlineCodes") or [""])[0] or segments[0].get(
+            "carrierCode", ""
+        )
+        flights = "/".join(
+            f"{s.get('carrierCode', '')}{s.get('number', '')}" for s in segments
+        )
+        traveler_pricings = offer.get("travelerPricings") or []
+        if traveler_pricings:
+            price = float(traveler_pricings[0]["price"]["total"])
+        else:
+            price = float(offer["price"]["grandTotal"])
+        rows.append(
+            (
+                route,
+                search_params["departureDate"],
+                carrier,
+                flights,
+                price,
+                observed_at,
+            )
+        )
+    return rows
+
+
+price_history = None
+_store_lock = threading.Lock()
+
+PRICE_HISTORY_ENABLED = os.getenv("PRICE_HISTORY_ENABLED", "true").lower() == "true"
+
+
+def get_price_history():
+    global price_history
+    with _store_lock:
+        if price_history is None:
+            price_history = PriceHistoryStore(
+                os.getenv("PRICE_HISTORY_DIR", "price_history")
+            )
+    return price_history
+
+
+def record_offers(search_params, offers):
+    """記錄一次搜尋的所有報價，失敗時只記錄日誌不影響搜尋"""
+    if not PRICE_HISTORY_ENABLED or not offers:
+        return
+    try:
+        get_price_history().append(offer_rows(search_params, offers))
+    except Exception as e:
+        logger.error(f"Price history record error: {str(e)}")
+
+
+def price_trend(
+    origin,
+    destination,
+    round_trip=False,
+    start=None,
+    end=None,
+    percentiles=(10, 50, 90),
+):
+    """每日票價統計：筆數、最低、中位數與指定百分位數（單位為 PRICE_UNIT）"""
+    history = get_price_history().query(
+        route_key(origin, destination, round_trip), start, end
+    )
+    trend = []
+    for day, prices in history.items():
+        prices = sorted(prices)
+        stats = {
+            "date": day,
+            "count": len(prices),
+            "min": round(prices[0], 2),
+            "median": round(percentile(prices, 50), 2),
+            "max": round(prices[-1], 2),
+        }
+        for pct in percentiles:
+            stats[f"p{pct:g}"] = round(percentile(prices, pct), 2)
+        trend.append(stats)
+    return trend
@@ -0,0 +1,154 @@
+import heapq
+import itertools
+import os
+import threading
+import time
+
+from api.util.metrics import register_stats
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+
+# 數字越小越優先
+PRIORITIES = {INTERACTIVE: 0, BATCH: 1}
+
+
+class QuotaExceededError(Exception):
+    """排隊已滿或預估等待時間超過期限，呼叫端應稍後重試"""
+
+    def __init__(self, message, retry_after=1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class QuotaScheduler:
+    """
+    Amadeus API 的 token bucket 排程器。
+    - rate 為每秒可發出的請求數，burst 為可累積的最大 token 數
+    - 沒有 token 時依優先順序（interactive 優先於 batch）與先後排隊
+    - 排隊數有上限；預估等待超過期限的請求會直接拒絕，避免使用者空等
+    """
+
+    def __init__(self, rate=10.0, burst=None, max_queue=100, timeouts=None):
+        self.rate = rate
+        # 至少要能累積一個 token，否則永遠無法取得
+        self.burst = max(burst or rate, 1.0)
+        self.max_queue = max_queue
+        self.timeouts = {INTERACTIVE: 5.0, BATCH: 60.0}
+        self.timeouts.update(timeouts or {})
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._queue = []  # heap: (priority, seq, waiter)
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._granted = dict.fromkeys(PRIORITIES, 0)
+        self._rejected = dict.fromkeys(PRIORITIES, 0)
+        self._wait_total = dict.fromkeys(PRIORITIES, 0.0)
+        self._wait_max = dict.fromkeys(PRIORITIES, 0.0)
+
+    @property
+    def enabled(self):
+        return self.rate > 0
+
+    def acquire(self, priority=INTERACTIVE, timeout=None):
+        """取得一個 token，必要時排隊等待；無法在期限內取得時拋出 QuotaExceededError"""
+        if not self.enabled:
+            return 0.0
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority: {priority}")
+        timeout = self.timeouts[priority] if timeout is None else timeout
+        started = time.monotonic()
+
+        with self._cond:
+            self._refill(started)
+            if not self._queue and self._tokens >= 1:
+                self._tokens -= 1
+                self._record_grant(priority, 0.0)
+                return 0.0
+
+            level = PRIORITIES[priority]
+            ahead = sum(1 for p, _, _ in self._queue if p <= level)
+            estimated = (ahead + 1 - self._tokens) / self.rate
+            if len(self._queue) >= self.max_queue or estimated > timeout:
+                self._rejected[priority] += 1
+                raise QuotaExceededError(
+                    f"Amadeus quota exhausted ({priority}, "
+                    f"queue {len(self._queue)}, estimated wait {estimated:.1f}s)",
+                    retry_after=max(1, int(estimated + 0.5)),
+                )
+
+            waiter = object()
+            deadline = started + timeout
+            heapq.heappush(self._queue, (level, next(self._counter), waiter))
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if self._queue[0][2] is waiter and self._tokens >= 1:
+                        heapq.heappop(self._queue)
+                        self._tokens -= 1
+                        waited = now - started
+                        self._record_grant(priority, waited)
+                        self._cond.notify_all()
+                        return waited
+                    if now >= deadline:
+                        self._rejected[priority] += 1
+                        raise QuotaExceededError(
+                            f"Amadeus quota wait exceeded {timeout:.1f}s ({priority})"
+                        )
+                    wait = deadline - now
+                    if self._queue[0][2] is waiter:
+                        wait = min(wait, (1 - self._tokens) / self.rate)
+                    self._cond.wait(wait)
+            except BaseException:
+                if any(w is waiter for _, _, w in self._queue):
+                    self._queue = [e for e in self._queue if e[2] is not waiter]
+                    heapq.heapify(self._queue)
+                    self._cond.notify_all()
+                raise
+
+    def stats(self):
+        with self._cond:
+            self._refill(time.monotonic())
+            return {
+                "rate": self.rate,
+                "tokens": round(self._tokens, 2),
+                "queue_depth": len(self._queue),
+                "queue_depth_by_priority": {
+                    name: sum(1 for p, _, _ in self._queue if p == level)
+                    for name, level in PRIORITIES.items()
+                },
+                "granted": dict(self._granted),
+                "rejected": dict(self._rejected),
+                "wait_seconds_total": {
+                    name: round(value, 3) for name, value in self._wait_total.items()
+                },
+                "wait_seconds_max": {
+                    name: round(value, 3) for name, value in self._wait_max.items()
+                },
+            }
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _record_grant(self, priority, waited):
+        self._granted[priority] += 1
+        self._wait_total[priority] += waited
+        self._wait_max[priority] = max(self._wait_max[priority], waited)
+
+
+# token bucket 在每個行程各有一份；AMADEUS_RATE_LIMIT 是所有 worker 合計的上限，
+# 依 WEB_CONCURRENCY（gunicorn 的 worker 數）平均分配
+WORKERS = max(int(os.getenv("WEB_CONCURRENCY", "1")), 1)
+
+amadeus_quota = QuotaScheduler(
+    rate=float(os.getenv("AMADEUS_RATE_LIMIT", "10")) / WORKERS,
+    burst=float(os.getenv("AMADEUS_RATE_BURST", "0")) / WORKERS or None,
+    max_queue=int(os.getenv("AMADEUS_QUEUE_SIZE", "100")),
+    timeouts={
+        INTERACTIVE: float(os.getenv("AMADEUS_INTERACTIVE_TIMEOUT", "5")),
+        BATCH: float(os.getenv("AMADEUS_BATCH_TIMEOUT", "60")),
+    },
+)
+register_stats("amadeus_quota", amadeus_quota.stats, label="priority")
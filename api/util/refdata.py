@@ -0,0 +1,289 @@
+"""
+航空公司與機型參考資料：以唯讀 mmap 開啟的精簡二進位檔，開放定址雜湊表 O(1) 查詢。
+
+檔案由 CSV 產生（例如 OpenFlights airlines.dat 或自備的 IATA/ICAO 清單）：
+
+    python -m api.util.refdata build --airlines airlines.csv --aircraft aircraft.csv \\
+        --output data/refdata.bin
+    python -m api.util.refdata lookup airline BR
+
+CSV 需有標題列，iata / icao / code 欄位中有值的代碼都會建立索引，名稱取自 name 欄；
+有 active 欄位時，Y 的資料優先於已停用的同代碼資料。
+
+檔案格式（little-endian）：
+    header  : magic "FTRD", version u16, table_count u16
+    table[] : name 8s, slot_count u32, slots_offset u32, strings_offset u32, strings_size u32
+    slots   : key 4s（代碼，不足補 \\0，全 \\0 表示空位）, value_offset u32, value_length u16, pad
+    strings : UTF-8 名稱
+
+檔案只在第一次查詢時開啟；多個 worker 映射同一檔案時共用作業系統的分頁快取。
+檔案的 mtime 改變後（每 check_interval 秒檢查一次），下一次查詢會改用新檔案。
+"""
+
+import argparse
+import csv
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+import zlib
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"FTRD"
+VERSION = 1
+KEY_SIZE = 4
+EMPTY_KEY = b"\0" * KEY_SIZE
+
+_HEADER = struct.Struct("<4sHH")
+_TABLE = struct.Struct("<8sIIII")
+_SLOT = struct.Struct("<4sIH2x")
+
+CODE_FIELDS = ("iata", "icao", "code")
+NULL_VALUES = ("", "-", "\\N", "N/A")
+
+
+def encode_key(code):
+    key = code.strip().upper().encode("ascii")
+    if not 0 < len(key) <= KEY_SIZE:
+        raise ValueError(f"Code must be 1-{KEY_SIZE} ASCII characters: {code!r}")
+    return key.ljust(KEY_SIZE, b"\0")
+
+
+def _slot_count(entries):
+    # 負載率不超過 0.5，保證查詢時一定會遇到空位
+    count = 8
+    while count < entries * 2:
+        count *= 2
+    return count
+
+
+def build(tables, path):
+    """
+    將 {table_name: {code: name}} 寫成二進位檔。
+    先寫入暫存檔再 os.replace，執行中的 worker 重新載入時不會讀到寫到一半的檔案。
+    """
+    names = sorted(tables)
+    offset = _HEADER.size + _TABLE.size * len(names)
+    headers = []
+    sections = []
+    for name in names:
+        entries = {encode_key(code): value for code, value in tables[name].items()}
+        slot_count = _slot_count(len(entries))
+        slots = [None] * slot_count
+        strings = bytearray()
+        for key, value in sorted(entries.items()):
+            data = value.encode("utf-8")
+            index = zlib.crc32(key) & (slot_count - 1)
+            while slots[index] is not None:
+                index = (index + 1) & (slot_count - 1)
+            slots[index] = (key, len(strings), len(data))
+            strings += data
+        slot_bytes = b"".join(
+            _SLOT.pack(*(slot or (EMPTY_KEY, 0, 0))) for slot in slots
+        )
+        headers.append(
+            _TABLE.pack(
+                name.encode("ascii"),
+                slot_count,
+                offset,
+                offset + len(slot_bytes),
+                len(strings),
+            )
+        )
+        sections.append(slot_bytes + bytes(strings))
+        offset += len(slot_bytes) + len(strings)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, VERSION, len(names)))
+            f.writelines(headers)
+            f.writelines(sections)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def load_csv(path, name_field="name"):
+    """讀取 CSV 為 {code: name}，iata / icao / code 欄位都會建立索引"""
+    entries = {}
+    active = {}
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        reader = csv.DictReader(f)
+        fields = {field.lower(): field for field in reader.fieldnames or []}
+        code_fields = [fields[name] for name in CODE_FIELDS if name in fields]
+        if name_field.lower() not in fields or not code_fields:
+            raise ValueError(
+                f"{path} needs a {name_field} column and one of {', '.join(CODE_FIELDS)}"
+            )
+        name_column = fields[name_field.lower()]
+        active_column = fields.get("active")
+        for row in reader:
+            name = (row.get(name_column) or "").strip()
+            if name in NULL_VALUES:
+                continue
+            is_active = active_column is None or row.get(active_column) == "Y"
+            for field in code_fields:
+                code = (row.get(field) or "").strip().upper()
+                if code in NULL_VALUES or len(code) > KEY_SIZE or not code.isascii():
+                    continue
+                # 同代碼以營運中的資料優先，其次保留第一筆
+                if code not in entries or (is_active and not active[code]):
+                    entries[code] = name
+                    active[code] = is_active
+    return entries
+
+
+class _Snapshot:
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.mtime = os.fstat(f.fileno()).st_mtime_ns
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, table_count = _HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} reference file")
+        self.tables = {}
+        for i in range(table_count):
+            name, slot_count, slots_offset, strings_offset, _ = _TABLE.unpack_from(
+                self.mm, _HEADER.size + _TABLE.size * i
+            )
+            self.tables[name.rstrip(b"\0").decode("ascii")] = (
+                slot_count,
+                slots_offset,
+                strings_offset,
+            )
+        self._entries = None
+
+    def lookup(self, table, key):
+        info = self.tables.get(table)
+        if info is None:
+            return None
+        slot_count, slots_offset, strings_offset = info
+        mask = slot_count - 1
+        index = zlib.crc32(key) & mask
+        while True:
+            slot_key, value_offset, length = _SLOT.unpack_from(
+                self.mm, slots_offset + index * _SLOT.size
+            )
+            if slot_key == key:
+                start = strings_offset + value_offset
+                return self.mm[start : start + length].decode("utf-8")
+            if slot_key == EMPTY_KEY:
+                return None
+            index = (index + 1) & mask
+
+    def entries(self):
+        # 檔案內容不會改變，計算一次後快取
+        if self._entries is None:
+            self._entries = {
+                name: sum(
+                    _SLOT.unpack_from(self.mm, slots_offset + i * _SLOT.size)[0]
+                    != EMPTY_KEY
+                    for i in range(slot_count)
+                )
+                for name, (slot_count, slots_offset, _) in self.tables.items()
+            }
+        return self._entries
+
+
+class ReferenceDB:
+    """延遲開啟、依 mtime 自動重新載入的參考資料檔；檔案不存在時查詢一律回傳 None"""
+
+    def __init__(self, path, check_interval=5.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._snapshot = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+        self.reloads = 0
+
+    def lookup(self, table, code):
+        snapshot = self._current()
+        if snapshot is None or not code:
+            return None
+        try:
+            key = encode_key(code)
+        except (ValueError, UnicodeEncodeError):
+            return None
+        return snapshot.lookup(table, key)
+
+    def airline(self, code):
+        return self.lookup("airline", code)
+
+    def aircraft(self, code):
+        return self.lookup("aircraft", code)
+
+    def stats(self):
+        snapshot = self._current()
+        return {
+            "loaded": snapshot is not None,
+            "reloads": self.reloads,
+            "entries": snapshot.entries() if snapshot else {},
+        }
+
+    def _current(self):
+        now = time.monotonic()
+        checked_at = self._checked_at
+        if checked_at is not None and now - checked_at < self.check_interval:
+            return self._snapshot
+        with self._lock:
+            if self._checked_at is not None and now - self._checked_at < (
+                self.check_interval
+            ):
+                return self._snapshot
+            self._checked_at = now
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except OSError:
+                self._snapshot = None
+                return None
+            if self._snapshot is None or self._snapshot.mtime != mtime:
+                try:
+                    # 舊的 mmap 不主動關閉，仍在讀取的執行緒釋放後由 GC 回收
+                    self._snapshot = _Snapshot(self.path)
+                    self.reloads += 1
+                    logger.info(f"Loaded reference data from {self.path}")
+                except (OSError, ValueError, struct.error) as e:
+                    logger.error(f"Failed to load reference data: {str(e)}")
+            return self._snapshot
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Airline / aircraft reference data")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_parser = commands.add_parser("build", help="build the binary file from CSV")
+    build_parser.add_argument("--airlines", help="airline CSV")
+    build_parser.add_argument("--aircraft", help="aircraft type CSV")
+    build_parser.add_argument("--name-field", default="name")
+    build_parser.add_argument("--output", default="data/refdata.bin")
+    lookup_parser = commands.add_parser("lookup", help="look up a code")
+    lookup_parser.add_argument("table", choices=["airline", "aircraft"])
+    lookup_parser.add_argument("code")
+    lookup_parser.add_argument("--path", default="data/refdata.bin")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        tables = {}
+        if args.airlines:
+            tables["airline"] = load_csv(args.airlines, args.name_field)
+        if args.aircraft:
+            tables["aircraft"] = load_csv(args.aircraft, args.name_field)
+        if not tables:
+            parser.error("build needs --airlines and/or --aircraft")
+        build(tables, args.output)
+        counts = ", ".join(f"{name}: {len(rows)}" for name, rows in tables.items())
+        print(f"Wrote {args.output} ({counts}, {os.path.getsize(args.output)} bytes)")
+    else:
+        print(ReferenceDB(args.path).lookup(args.table, args.code))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import os
+import threading
+import time
+
+from api.util.metrics import register_stats
+
+
+class CircuitOpenError(Exception):
+    """上游服務斷路中，呼叫端應稍後重試"""
+
+    def __init__(self, name, retry_after=1):
+        super().__init__(f"{name} is temporarily unavailable")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    斷路器：連續失敗（或回應過慢）達門檻後斷路 reset_timeout 秒，
+    期間直接拒絕呼叫；時間到後放行一個試探請求，成功則恢復，失敗則再次斷路。
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self, name, failure_threshold=5, reset_timeout=30.0, slow_call_threshold=None
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.slow_call_threshold = slow_call_threshold
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.rejected = 0
+
+    def before_call(self):
+        """呼叫上游前檢查，斷路中拋出 CircuitOpenError"""
+        with self._lock:
+            if self.state == self.OPEN:
+                remaining = self._opened_at + self.reset_timeout - time.monotonic()
+                if remaining > 0:
+                    self.rejected += 1
+                    raise CircuitOpenError(self.name, max(1, int(remaining + 0.5)))
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN:
+                if self._probing:
+                    self.rejected += 1
+                    raise CircuitOpenError(self.name)
+                self._probing = True
+
+    def record_success(self, elapsed=None):
+        """elapsed 超過 slow_call_threshold 時視為失敗"""
+        if self.slow_call_threshold and elapsed and elapsed > self.slow_call_threshold:
+            self.record_failure()
+            return
+        with self._lock:
+            self.failures = 0
+            self.state = self.CLOSED
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.opened += 1
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def release(self):
+        """呼叫未送達上游（例如被配額拒絕）時釋放試探名額，不影響狀態"""
+        with self._lock:
+            self._probing = False
+
+    def stats(self):
+        with self._lock:
+            return {
+                "state": self.state,
+                "failures": self.failures,
+                "opened": self.opened,
+                "rejected": self.rejected,
+            }
+
+
+amadeus_breaker = CircuitBreaker(
+    "Amadeus",
+    failure_threshold=int(os.getenv("AMADEUS_BREAKER_FAILURES", "5")),
+    reset_timeout=float(os.getenv("AMADEUS_BREAKER_RESET", "30")),
+    slow_call_threshold=float(os.getenv("AMADEUS_SLOW_CALL_SECONDS", "10")) or None,
+)
+register_stats("amadeus_breaker", amadeus_breaker.stats)
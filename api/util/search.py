@@ -1,10 +1,32 @@
-from datetime import datetime
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 from typing import List, Optional
 from amadeus import Client, ResponseError
 from dotenv import load_dotenv
+from api.models.flight import Flight
+from api.util.airport import expand_airports
+from api.util.amadeus_client import amadeus_provider
+from api.util.metrics import (
+    record_upstream,
+    register_stats,
+    timed,
+    upstream_in_flight,
+)
+from api.util.price_history import record_offers
+from api.util.quota import BATCH, INTERACTIVE, QuotaExceededError, amadeus_quota
+from api.util.resilience import CircuitOpenError, amadeus_breaker
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 
 class FlightData:
     def __init__(self, date, from_airport, to_airport):
@@ -21,7 +43,323 @@ class Passengers:
         self.infants_on_lap = infants_on_lap
 
 
-def search_flights(data, amadeus: Client):
+class OfferCache:
+    """
+    航班搜尋結果快取：TTL 過期 + LRU 淘汰（依筆數與估計記憶體上限）。
+    stale_ttl > 0 時，過期項目會再保留 stale_ttl 秒，可透過 get_stale 取得。
+    """
+
+    def __init__(
+        self, ttl=300, max_entries=1024, max_bytes=64 * 1024 * 1024, stale_ttl=0
+    ):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (expires_at, size, offers)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.stale_hits = 0
+
+    @property
+    def enabled(self):
+        return self.ttl > 0 and self.max_entries > 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, _, offers = entry
+            now = time.monotonic()
+            if expires_at <= now:
+                if expires_at + self.stale_ttl <= now:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return offers
+
+    def get_stale(self, key):
+        """取得已過期但仍在 stale_ttl 寬限期內的結果"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, _, offers = entry
+            if expires_at + self.stale_ttl <= time.monotonic():
+                self._remove(key)
+                return None
+            self.stale_hits += 1
+            return offers
+
+    def set(self, key, offers):
+        if not self.enabled:
+            return
+        size = len(json.dumps(offers, separators=(",", ":")))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, size, offers)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "stale_hits": self.stale_hits,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+
+class StaleOffers(list):
+    """從過期快取取得的報價，回應時會標示 stale"""
+
+
+class SingleFlightTimeout(TimeoutError):
+    """等待同一查詢的結果超過呼叫端的期限"""
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """合併相同鍵的並行呼叫：只有第一個呼叫者實際執行，其餘等待同一結果"""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key, fn, timeout=None):
+        """timeout 為等待其他呼叫者結果的期限，逾時拋出 SingleFlightTimeout"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.executed += 1
+                leader = True
+
+        if not leader:
+            if not call.done.wait(timeout):
+                raise SingleFlightTimeout(
+                    f"Timed out after {timeout}s waiting for an identical search"
+                )
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def stats(self):
+        with self._lock:
+            return {
+                "in_flight": len(self._calls),
+                "executed": self.executed,
+                "coalesced": self.coalesced,
+            }
+
+
+# 全域搜尋快取，設定可由環境變數調整
+offer_cache = OfferCache(
+    ttl=int(os.getenv("SEARCH_CACHE_TTL", "300")),
+    max_entries=int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "1024")),
+    max_bytes=int(os.getenv("SEARCH_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+    stale_ttl=int(os.getenv("SEARCH_CACHE_STALE_TTL", "600")),
+)
+search_flight_group = SingleFlight()
+register_stats("search_cache", offer_cache.stats)
+register_stats("search_singleflight", search_flight_group.stats)
+
+# 背景更新過期快取的執行緒數
+SEARCH_REFRESH_WORKERS = int(os.getenv("SEARCH_REFRESH_WORKERS", "2"))
+_refresh_executor = None
+_refreshing = set()
+_refresh_lock = threading.Lock()
+
+# Amadeus HTTP 逾時（與 amadeus_client 相同設定），用於計算等待合併查詢的期限
+UPSTREAM_TIMEOUT = int(os.getenv("AMADEUS_HTTP_TIMEOUT", "30"))
+
+# 多組查詢（彈性日期等）同時送出的上限
+SEARCH_FANOUT_CONCURRENCY = int(os.getenv("SEARCH_FANOUT_CONCURRENCY", "4"))
+# 彈性日期最多可查詢的天數
+MAX_DATE_WINDOW_DAYS = int(os.getenv("SEARCH_MAX_DATE_WINDOW_DAYS", "31"))
+# 多機場搜尋最多可展開的航線組合數
+MAX_AIRPORT_PAIRS = int(os.getenv("SEARCH_MAX_AIRPORT_PAIRS", "12"))
+# 彈性日期搜尋的查詢總數（天數 × 航線組合數）上限
+MAX_CALENDAR_QUERIES = int(os.getenv("SEARCH_MAX_CALENDAR_QUERIES", "31"))
+
+
+def make_search_key(search_params):
+    """將搜尋參數正規化為快取鍵"""
+    normalized = []
+    for name, value in search_params.items():
+        if value is None:
+            continue
+        value = str(value)
+        if name in (
+            "originLocationCode",
+            "destinationLocationCode",
+            "currencyCode",
+            "travelClass",
+        ):
+            value = value.upper()
+        elif name == "nonStop":
+            value = value.lower()
+        normalized.append((name, value))
+    return tuple(sorted(normalized))
+
+
+def fetch_offers(
+    amadeus: Client, search_params, priority=INTERACTIVE, allow_stale=True
+):
+    """
+    查詢航班報價，相同參數在 TTL 內直接回傳快取結果，並行的相同查詢只呼叫一次。
+    實際呼叫 Amadeus 前需先向配額排程器取得 token，priority 為 interactive 或 batch。
+    快取剛過期（SEARCH_CACHE_STALE_TTL 內）時先回傳 StaleOffers 並在背景更新，
+    上游斷路且沒有可用的舊資料時拋出 CircuitOpenError。
+    """
+    key = make_search_key(search_params)
+    offers = offer_cache.get(key)
+    if offers is not None:
+        return offers
+
+    if allow_stale:
+        offers = offer_cache.get_stale(key)
+        if offers is not None:
+            refresh_in_background(amadeus, search_params, key)
+            return StaleOffers(offers)
+
+    # 只與相同優先權的查詢合併：互動查詢不會排在背景更新或 cron 等批次查詢之後，
+    # 等待時間也不超過自己呼叫上游所需的期限（配額等待 + HTTP 逾時）
+    try:
+        return search_flight_group.do(
+            (priority, key),
+            lambda: call_upstream(amadeus, search_params, key, priority),
+            timeout=amadeus_quota.timeouts[priority] + UPSTREAM_TIMEOUT,
+        )
+    except SingleFlightTimeout as e:
+        raise QuotaExceededError(str(e)) from e
+
+
+def call_upstream(amadeus: Client, search_params, key, priority):
+    """經過斷路器與配額排程器呼叫 Amadeus，成功後寫入快取與票價紀錄"""
+    amadeus_breaker.before_call()
+    try:
+        with timed("quota_wait"):
+            amadeus_quota.acquire(priority)
+        started = time.monotonic()
+        upstream_in_flight.inc("amadeus")
+        try:
+            with timed("amadeus"):
+                response = amadeus.shopping.flight_offers_search.get(**search_params)
+        finally:
+            upstream_in_flight.dec("amadeus")
+    except ResponseError as e:
+        status = getattr(e.response, "status_code", None)
+        record_upstream("amadeus", status or "error")
+        if is_upstream_failure(e):
+            amadeus_breaker.record_failure()
+        else:
+            amadeus_breaker.record_success()
+        if status == 401:
+            amadeus_provider.invalidate_token()
+        raise
+    except BaseException:
+        amadeus_breaker.release()
+        raise
+    record_upstream("amadeus", getattr(response, "status_code", None) or 200)
+    amadeus_breaker.record_success(time.monotonic() - started)
+
+    offer_cache.set(key, response.data)
+    record_offers(search_params, response.data)
+    return response.data
+
+
+def is_upstream_failure(error):
+    """連線錯誤、5xx 與 429 代表上游異常；其他 4xx 是請求本身的問題"""
+    status = getattr(getattr(error, "response", None), "status_code", None)
+    return status is None or status >= 500 or status == 429
+
+
+def refresh_in_background(amadeus: Client, search_params, key):
+    """在背景更新過期的快取，同一鍵同時只會有一個更新"""
+    global _refresh_executor
+    with _refresh_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+        if _refresh_executor is None:
+            _refresh_executor = ThreadPoolExecutor(
+                max_workers=SEARCH_REFRESH_WORKERS,
+                thread_name_prefix="search-refresh",
+            )
+
+    def refresh():
+        try:
+            search_flight_group.do(
+                (BATCH, key), lambda: call_upstream(amadeus, search_params, key, BATCH)
+            )
+        except (CircuitOpenError, QuotaExceededError) as e:
+            logger.info(f"Background refresh skipped: {str(e)}")
+        except Exception as e:
+            logger.error(f"Background refresh error: {str(e)}")
+        finally:
+            with _refresh_lock:
+                _refreshing.discard(key)
+
+    _refresh_executor.submit(contextvars.copy_context().run, refresh)
+
+
+def is_stale(offer_lists):
+    return any(isinstance(offers, StaleOffers) for offers in offer_lists)
+
+
+def build_search_params(data):
+    """將搜尋請求轉換為 Amadeus 搜尋參數與搜尋條件"""
     default_flight_data = [
         FlightData(
             date=datetime.now().strftime("%Y-%m-%d"),
@@ -102,9 +440,6 @@ def search_flights(data, amadeus: Client):
     if infants > 0:
         search_params["infants"] = infants
 
-    response = amadeus.shopping.flight_offers_search.get(**search_params)
-    offers = response.data
-
     search_criteria = {
         "flight_data": [
             {
@@ -119,9 +454,213 @@ def search_flights(data, amadeus: Client):
         "passengers": passengers.__dict__,
     }
 
+    return search_params, search_criteria
+
+
+def expand_search_params(search_params):
+    """
+    將多機場或都會區代碼展開為單一航線的搜尋參數列表，
+    例如 TPE,KHH → TYO 會展開成 TPE/KHH × NRT/HND 四組。
+    """
+    origins = expand_airports(search_params["originLocationCode"])
+    destinations = expand_airports(search_params["destinationLocationCode"])
+    if len(origins) <= 1 and len(destinations) <= 1:
+        return [search_params]
+
+    params_list = [
+        dict(search_params, originLocationCode=o, destinationLocationCode=d)
+        for o in origins
+        for d in destinations
+        if o != d
+    ]
+    if not params_list:
+        raise ValueError("Origin and destination airports must differ")
+    if len(params_list) > MAX_AIRPORT_PAIRS:
+        raise ValueError(f"Too many airport pairs (max {MAX_AIRPORT_PAIRS})")
+    return params_list
+
+
+def offer_fingerprint(offer):
+    """以各航段的航空公司、航班號碼、出發機場與起飛時間識別相同行程"""
+    return tuple(
+        (
+            segment.get("carrierCode"),
+            segment.get("number"),
+            segment.get("departure", {}).get("iataCode"),
+            segment.get("departure", {}).get("at"),
+        )
+        for itinerary in offer.get("itineraries", [])
+        for segment in itinerary.get("segments", [])
+    )
+
+
+def merge_offers(offer_lists):
+    """合併多組搜尋結果，相同行程只保留最便宜的報價，並依價格排序"""
+    merged = {}
+    for offers in offer_lists:
+        for offer in offers:
+            key = offer_fingerprint(offer)
+            if key not in merged or offer_price(offer) < offer_price(merged[key]):
+                merged[key] = offer
+    return sorted(merged.values(), key=offer_price)
+
+
+@timed("search_flights")
+def search_flights(data, amadeus: Client):
+    search_params, search_criteria = build_search_params(data)
+    params_list = expand_search_params(search_params)
+    if len(params_list) == 1:
+        offers = fetch_offers(amadeus, params_list[0])
+        stale = is_stale([offers])
+    else:
+        results = fan_out(amadeus, params_list)
+        raise_if_all_failed(results)
+        offers = merge_offers(offers for offers, _ in results if offers)
+        stale = is_stale(offers for offers, _ in results)
+    if stale:
+        search_criteria["stale"] = True
     return offers, search_criteria
 
 
+def fan_out(amadeus: Client, params_list, max_workers=None, priority=INTERACTIVE):
+    """並行查詢多組搜尋參數，依輸入順序回傳 (offers, error) 列表"""
+    if not params_list:
+        return []
+    max_workers = min(max_workers or SEARCH_FANOUT_CONCURRENCY, len(params_list))
+
+    def run(search_params):
+        try:
+            return fetch_offers(amadeus, search_params, priority), None
+        except Exception as e:
+            return None, e
+
+    if max_workers <= 1:
+        return [run(p) for p in params_list]
+    # 每個查詢在呼叫端 context 的副本中執行，日誌才會帶上 request_id
+    context = contextvars.copy_context()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(lambda p: context.copy().run(run, p), params_list))
+
+
+def raise_if_all_failed(results):
+    errors = [error for _, error in results if error is not None]
+    if errors and len(errors) == len(results):
+        raise errors[0]
+
+
+def offer_price(offer):
+    return float(offer["price"]["grandTotal"])
+
+
+def parse_date_window(date_window, default_start):
+    """解析彈性日期區間，回傳區間內的日期列表"""
+    if not isinstance(date_window, dict):
+        raise ValueError("date_window must be an object with start/end or days")
+    try:
+        start = datetime.strptime(date_window.get("start") or default_start, "%Y-%m-%d")
+        if date_window.get("end"):
+            end = datetime.strptime(date_window["end"], "%Y-%m-%d")
+        else:
+            end = start + timedelta(days=int(date_window.get("days", 7)) - 1)
+    except (TypeError, ValueError):
+        raise ValueError("date_window requires start/end dates in YYYY-MM-DD format")
+
+    days = (end - start).days + 1
+    if days < 1:
+        raise ValueError("date_window end must not be before start")
+    if days > MAX_DATE_WINDOW_DAYS:
+        raise ValueError(f"date_window cannot exceed {MAX_DATE_WINDOW_DAYS} days")
+    return [start + timedelta(days=i) for i in range(days)]
+
+
+def search_flights_calendar(data, amadeus: Client, max_results=10, max_workers=None):
+    """
+    彈性日期搜尋：在 date_window 區間內逐日並行查詢，
+    回傳最便宜的航班、每日最低價日曆與搜尋條件。
+    來回行程會維持原本的停留天數；多機場時每天會查詢所有航線組合。
+    """
+    search_params, search_criteria = build_search_params(data)
+    dates = parse_date_window(
+        data.get("date_window") or {}, search_params["departureDate"]
+    )
+
+    stay = None
+    if search_params.get("returnDate"):
+        stay = datetime.strptime(
+            search_params["returnDate"], "%Y-%m-%d"
+        ) - datetime.strptime(search_params["departureDate"], "%Y-%m-%d")
+
+    pairs = expand_search_params(search_params)
+    if len(dates) * len(pairs) > MAX_CALENDAR_QUERIES:
+        raise ValueError(
+            f"date_window of {len(dates)} days with {len(pairs)} airport pairs "
+            f"exceeds {MAX_CALENDAR_QUERIES} searches; "
+            f"use at most {max(MAX_CALENDAR_QUERIES // len(pairs), 1)} days"
+        )
+    params_list = []
+    for date in dates:
+        for pair in pairs:
+            params = dict(pair, departureDate=date.strftime("%Y-%m-%d"))
+            if stay is not None:
+                params["returnDate"] = (date + stay).strftime("%Y-%m-%d")
+            params_list.append(params)
+
+    results = fan_out(amadeus, params_list, max_workers=max_workers)
+    raise_if_all_failed(results)
+
+    calendar = []
+    offer_lists = []
+    for i in range(0, len(params_list), len(pairs)):
+        params = params_list[i]
+        day_results = results[i : i + len(pairs)]
+        day = {
+            "date": params["departureDate"],
+            "min_price": None,
+            "currency": search_params["currencyCode"],
+            "offers": 0,
+        }
+        if params.get("returnDate"):
+            day["return_date"] = params["returnDate"]
+
+        day_offers = [offer for offers, _ in day_results if offers for offer in offers]
+        if day_offers:
+            day["min_price"] = min(offer_price(offer) for offer in day_offers)
+            day["offers"] = len(day_offers)
+            offer_lists.append(day_offers)
+        elif any(error is not None for _, error in day_results):
+            day["error"] = next(str(e) for _, e in day_results if e is not None)
+        calendar.append(day)
+
+    all_offers = merge_offers(offer_lists)
+    search_criteria["date_window"] = {
+        "start": calendar[0]["date"],
+        "end": calendar[-1]["date"],
+    }
+    if is_stale(offers for offers, _ in results):
+        search_criteria["stale"] = True
+    return all_offers[:max_results], calendar, search_criteria
+
+
+def parse_fields(value):
+    """解析 fields 投影參數（逗號分隔字串或列表），未指定時回傳 None"""
+    if not value:
+        return None
+    if isinstance(value, str):
+        value = value.split(",")
+    fields = [name.strip() for name in value if name.strip()]
+    if "*" in fields:
+        return Flight.field_names()
+    invalid = [name for name in fields if name not in Flight.field_names()]
+    if invalid:
+        raise ValueError(f"Unknown fields: {', '.join(invalid)}")
+    return fields
+
+
+def project_offers(offers, fields):
+    """將原始報價正規化為 Flight 並只輸出指定欄位"""
+    return [Flight.from_amadeus(offer).to_dict(fields) for offer in offers]
+
+
 def search_flights_simple(amadeus: Client):
     try:
         search_params = {
@@ -136,6 +675,7 @@ def search_flights_simple(amadeus: Client):
             "nonStop": "true",
         }
 
+        amadeus_quota.acquire()
         response = amadeus.shopping.flight_offers_search.get(**search_params)
 
         if not response.data:
@@ -143,6 +683,9 @@ def search_flights_simple(amadeus: Client):
 
         return response.data
 
+    except (QuotaExceededError, CircuitOpenError):
+        # 交由路由回傳 503 與 Retry-After
+        raise
     except ResponseError as error:
         error_msg = error.response.body if hasattr(error, "response") else str(error)
         raise ValueError(f"航班搜尋錯誤: {error_msg}")
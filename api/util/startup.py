@@ -0,0 +1,67 @@
+"""
+冷啟動分析：以 python -X importtime 匯入指定模組，列出各模組的匯入耗時。
+
+    python -m api.util.startup
+    python -m api.util.startup --module api.routes.line_webhook --top 30
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$")
+
+
+def parse_importtime(text):
+    """解析 -X importtime 輸出，回傳 [(模組, 自身微秒, 累計微秒, 深度)]"""
+    entries = []
+    for line in text.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return entries
+
+
+def profile_import(module="app", env=None):
+    """在新的直譯器中匯入 module，回傳 (總耗時毫秒, 各模組耗時)"""
+    code = (
+        "import time\n"
+        "started = time.perf_counter()\n"
+        f"import {module}\n"
+        "print((time.perf_counter() - started) * 1000)\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        env=dict(os.environ, **(env or {})),
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return float(result.stdout.strip().splitlines()[-1]), parse_importtime(
+        result.stderr
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report per-module import time")
+    parser.add_argument("--module", default="app")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--sort", choices=["cumulative", "self"], default="cumulative")
+    args = parser.parse_args()
+
+    total_ms, entries = profile_import(args.module)
+    index = 2 if args.sort == "cumulative" else 1
+    print(f"import {args.module}: {total_ms:.1f} ms ({len(entries)} modules)")
+    print(f"{'self ms':>9} {'cumul ms':>9}  module")
+    for name, self_us, cumulative_us, _ in sorted(
+        entries, key=lambda e: e[index], reverse=True
+    )[: args.top]:
+        print(f"{self_us / 1000:>9.1f} {cumulative_us / 1000:>9.1f}  {name}")
+
+
+if __name__ == "__main__":
+    main()
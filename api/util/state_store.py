@@ -0,0 +1,226 @@
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class SearchState:
+    """LINE 對話中的航班搜尋狀態"""
+
+    __slots__ = ("step", "data")
+
+    def __init__(self, step="init", data=None):
+        self.step = step
+        self.data = data or {
+            "trip": None,
+            "flight_data": [],
+            "passengers": {
+                "adults": 1,
+                "children": 0,
+                "infants_in_seat": 0,
+                "infants_on_lap": 0,
+            },
+            "seat": "economy",
+            "nonStop": None,  # 新增 nonStop 參數
+        }
+
+    def dumps(self):
+        return json.dumps([self.step, self.data], separators=(",", ":"))
+
+    @classmethod
+    def loads(cls, raw):
+        step, data = json.loads(raw)
+        return cls(step, data)
+
+
+class MemoryStateStore:
+    """單一行程內的對話狀態（或其他以 key 儲存的資料）儲存，具備 TTL 與筆數上限"""
+
+    def __init__(self, ttl=1800, max_entries=10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # user_id -> (expires_at, state)
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires_at, state = entry
+            if expires_at <= time.monotonic():
+                del self._entries[user_id]
+                return None
+            return state
+
+    def set(self, user_id, state):
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self._entries[user_id] = (time.monotonic() + self.ttl, state)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        return {"entries": len(self)}
+
+
+class SqliteStateStore:
+    """
+    以 SQLite 檔案保存對話狀態，讓多個 gunicorn worker 共用。
+    table / dumps / loads 可改為儲存其他資料（例如搜尋結果分頁），預設為 SearchState。
+    """
+
+    def __init__(
+        self,
+        path,
+        ttl=1800,
+        max_entries=10000,
+        prune_interval=60,
+        table="user_states",
+        dumps=None,
+        loads=None,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.prune_interval = prune_interval
+        self.table = table
+        self._dumps = dumps or SearchState.dumps
+        self._loads = loads or SearchState.loads
+        self._local = threading.local()
+        self._last_prune = 0.0
+        with self._connect() as conn:
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "user_id TEXT PRIMARY KEY, "
+                "state TEXT NOT NULL, "
+                "expires_at REAL NOT NULL)"
+            )
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{table}_expires_at "
+                f"ON {table} (expires_at)"
+            )
+
+    def get(self, user_id):
+        row = (
+            self._connect()
+            .execute(
+                f"SELECT state FROM {self.table} WHERE user_id = ? AND expires_at > ?",
+                (user_id, time.time()),
+            )
+            .fetchone()
+        )
+        return self._loads(row[0]) if row else None
+
+    def set(self, user_id, state):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (user_id, state, expires_at) "
+                "VALUES (?, ?, ?)",
+                (user_id, self._dumps(state), now + self.ttl),
+            )
+        if now - self._last_prune > self.prune_interval:
+            self._last_prune = now
+            self.prune()
+
+    def delete(self, user_id):
+        with self._connect() as conn:
+            conn.execute(f"DELETE FROM {self.table} WHERE user_id = ?", (user_id,))
+
+    def prune(self):
+        """刪除過期狀態，並在超過上限時移除最舊的項目"""
+        with self._connect() as conn:
+            conn.execute(
+                f"DELETE FROM {self.table} WHERE expires_at <= ?", (time.time(),)
+            )
+            conn.execute(
+                f"DELETE FROM {self.table} WHERE user_id IN ("
+                f"SELECT user_id FROM {self.table} ORDER BY expires_at DESC "
+                "LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def __len__(self):
+        row = self._connect().execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()
+        return row[0]
+
+    def stats(self):
+        return {"entries": len(self)}
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+
+def default_state_db():
+    """未設定 LINE_STATE_DB 時使用暫存目錄：Vercel 等只有暫存目錄可寫入，同一主機的 worker 仍可共用"""
+    return os.getenv("LINE_STATE_DB") or os.path.join(
+        tempfile.gettempdir(), "flight_alarm_line.db"
+    )
+
+
+def open_store(name, memory_factory, sqlite_factory, path=None):
+    """
+    依 LINE_STATE_BACKEND 建立儲存，對話狀態、結果分頁與事件索引都由這裡決定後端。
+    SQLite 無法開啟時（例如唯讀檔案系統）改用 memory 並記錄警告，不讓 webhook 無法載入。
+    """
+    backend = os.getenv("LINE_STATE_BACKEND", "sqlite").lower()
+    if backend == "sqlite":
+        path = path or default_state_db()
+        try:
+            return sqlite_factory(path)
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(
+                f"Cannot open {name} database {path}, falling back to memory: {str(e)}"
+            )
+            return memory_factory()
+    if backend == "memory":
+        return memory_factory()
+    raise ValueError(f"Unknown LINE_STATE_BACKEND: {backend}")
+
+
+def create_state_store():
+    """依環境變數建立對話狀態儲存"""
+    ttl = int(os.getenv("LINE_STATE_TTL", "1800"))
+    max_entries = int(os.getenv("LINE_STATE_MAX_ENTRIES", "10000"))
+    return open_store(
+        "conversation state",
+        lambda: MemoryStateStore(ttl=ttl, max_entries=max_entries),
+        lambda path: SqliteStateStore(path, ttl=ttl, max_entries=max_entries),
+    )
+
+
+def create_result_store():
+    """建立 LINE 搜尋結果分頁的儲存（token -> 航班列表），與對話狀態使用相同後端"""
+    ttl = int(os.getenv("LINE_RESULT_TTL", "1800"))
+    max_entries = int(os.getenv("LINE_RESULT_MAX_ENTRIES", "1000"))
+    return open_store(
+        "search result",
+        lambda: MemoryStateStore(ttl=ttl, max_entries=max_entries),
+        lambda path: SqliteStateStore(
+            path,
+            ttl=ttl,
+            max_entries=max_entries,
+            table="search_results",
+            dumps=lambda offers: json.dumps(offers, separators=(",", ":")),
+            loads=json.loads,
+        ),
+    )
@@ -0,0 +1,301 @@
+import logging
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime
+from itertools import groupby
+
+from api.util.quota import BATCH
+from api.util.search import build_search_params, fetch_offers
+
+logger = logging.getLogger(__name__)
+
+# 決定同一組搜尋的欄位，相同的觀察項目只需查詢一次
+SEARCH_COLUMNS = (
+    "origin",
+    "destination",
+    "departure_date",
+    "return_date",
+    "adults",
+    "seat",
+    "non_stop",
+)
+
+
+class Watch:
+    __slots__ = (
+        "id",
+        "user_id",
+        "origin",
+        "destination",
+        "departure_date",
+        "return_date",
+        "adults",
+        "seat",
+        "non_stop",
+        "max_price",
+        "last_notified_price",
+    )
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def search_data(self):
+        """轉換為 search_flights 接受的請求格式"""
+        flight_data = [
+            {
+                "date": self.departure_date,
+                "from_airport": self.origin,
+                "to_airport": self.destination,
+            }
+        ]
+        if self.return_date:
+            flight_data.append(
+                {
+                    "date": self.return_date,
+                    "from_airport": self.destination,
+                    "to_airport": self.origin,
+                }
+            )
+        return {
+            "flight_data": flight_data,
+            "trip": "round-trip" if self.return_date else "one-way",
+            "seat": self.seat,
+            "passengers": {"adults": self.adults},
+            "nonStop": self.non_stop,
+        }
+
+
+def _validate_date(value, field):
+    try:
+        datetime.strptime(value, "%Y-%m-%d")
+    except (TypeError, ValueError):
+        raise ValueError(f"{field} must be in YYYY-MM-DD format")
+    return value
+
+
+def _validate_airport(value, field):
+    value = (value or "").upper()
+    if not re.match(r"^[A-Z]{3}$", value):
+        raise ValueError(f"{field} must be a 3-letter airport code")
+    return value
+
+
+def _search_key(watch):
+    return tuple(getattr(watch, name) for name in SEARCH_COLUMNS)
+
+
+class WatchStore:
+    """以 SQLite 保存價格觀察清單"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS watches ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "user_id TEXT NOT NULL, "
+                "origin TEXT NOT NULL, "
+                "destination TEXT NOT NULL, "
+                "departure_date TEXT NOT NULL, "
+                "return_date TEXT, "
+                "adults INTEGER NOT NULL DEFAULT 1, "
+                "seat TEXT NOT NULL DEFAULT 'economy', "
+                "non_stop TEXT NOT NULL DEFAULT 'false', "
+                "max_price REAL NOT NULL, "
+                "last_notified_price REAL, "
+                "created_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_watches_search ON watches ("
+                + ", ".join(SEARCH_COLUMNS)
+                + ")"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_watches_user ON watches (user_id)"
+            )
+
+    def add(
+        self,
+        user_id,
+        origin,
+        destination,
+        departure_date,
+        max_price,
+        return_date=None,
+        adults=1,
+        seat="economy",
+        non_stop="false",
+    ):
+        if not user_id:
+            raise ValueError("user_id is required")
+        origin = _validate_airport(origin, "origin")
+        destination = _validate_airport(destination, "destination")
+        departure_date = _validate_date(departure_date, "departure_date")
+        if return_date:
+            return_date = _validate_date(return_date, "return_date")
+        try:
+            max_price = float(max_price)
+            adults = int(adults)
+        except (TypeError, ValueError):
+            raise ValueError("max_price and adults must be numbers")
+        if max_price <= 0 or adults < 1:
+            raise ValueError("max_price and adults must be positive")
+        non_stop = str(non_stop).lower()
+
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT INTO watches (user_id, origin, destination, departure_date, "
+                "return_date, adults, seat, non_stop, max_price, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    user_id,
+                    origin,
+                    destination,
+                    departure_date,
+                    return_date,
+                    adults,
+                    seat,
+                    non_stop,
+                    max_price,
+                    time.time(),
+                ),
+            )
+        return self.get(cursor.lastrowid)
+
+    def get(self, watch_id):
+        row = (
+            self._connect()
+            .execute(self._select() + " WHERE id = ?", (watch_id,))
+            .fetchone()
+        )
+        return Watch(*row) if row else None
+
+    def list(self, user_id):
+        rows = self._connect().execute(
+            self._select() + " WHERE user_id = ? ORDER BY id", (user_id,)
+        )
+        return [Watch(*row) for row in rows]
+
+    def remove(self, user_id, watch_id):
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "DELETE FROM watches WHERE id = ? AND user_id = ?", (watch_id, user_id)
+            )
+        return cursor.rowcount > 0
+
+    def purge_expired(self, today):
+        """移除出發日已過的觀察項目"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "DELETE FROM watches WHERE departure_date < ?", (today,)
+            )
+        return cursor.rowcount
+
+    def groups(self):
+        """依搜尋參數分組，逐組產生 (搜尋條件, 觀察項目列表)"""
+        columns = ", ".join(SEARCH_COLUMNS)
+        rows = self._connect().execute(self._select() + f" ORDER BY {columns}, id")
+        watches = (Watch(*row) for row in rows)
+        for search_key, group in groupby(watches, key=_search_key):
+            yield search_key, list(group)
+
+    def mark_notified(self, watch_ids, price):
+        with self._connect() as conn:
+            conn.executemany(
+                "UPDATE watches SET last_notified_price = ? WHERE id = ?",
+                [(price, watch_id) for watch_id in watch_ids],
+            )
+
+    def _select(self):
+        return "SELECT " + ", ".join(Watch.__slots__) + " FROM watches"
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+
+watch_store = None
+_store_lock = threading.Lock()
+
+
+def default_watchlist_db():
+    """
+    未設定 WATCHLIST_DB 時使用暫存目錄（唯讀檔案系統上也能建立）。
+    暫存目錄不會跨實例共用、重新部署後也會清空，正式環境應指向持久化的共用路徑。
+    """
+    return os.getenv("WATCHLIST_DB") or os.path.join(
+        tempfile.gettempdir(), "flight_alarm_watchlist.db"
+    )
+
+
+def get_watch_store():
+    global watch_store
+    with _store_lock:
+        if watch_store is None:
+            watch_store = WatchStore(default_watchlist_db())
+    return watch_store
+
+
+def lowest_price(offers):
+    prices = [float(offer["price"]["grandTotal"]) for offer in offers]
+    return min(prices) if prices else None
+
+
+def run_price_watch(amadeus, notify):
+    """
+    執行價格觀察：相同搜尋參數的觀察項目只查詢一次，
+    再通知價格低於門檻（且比上次通知更低）的使用者。
+    notify(user_ids, watch, price) 負責實際傳送通知。
+    """
+    store = get_watch_store()
+    summary = {"groups": 0, "watches": 0, "notified": 0, "errors": 0}
+    summary["expired"] = store.purge_expired(datetime.now().strftime("%Y-%m-%d"))
+
+    for _, watches in store.groups():
+        summary["groups"] += 1
+        summary["watches"] += len(watches)
+        try:
+            search_params, _ = build_search_params(watches[0].search_data())
+            offers = fetch_offers(amadeus, search_params, BATCH, allow_stale=False)
+            price = lowest_price(offers)
+        except Exception as e:
+            logger.error(f"Price watch search error: {str(e)}")
+            summary["errors"] += 1
+            continue
+
+        if price is None:
+            continue
+
+        matched = [
+            w
+            for w in watches
+            if price <= w.max_price
+            and (w.last_notified_price is None or price < w.last_notified_price)
+        ]
+        if not matched:
+            continue
+
+        try:
+            notify(sorted({w.user_id for w in matched}), matched[0], price)
+        except Exception as e:
+            logger.error(f"Price watch notify error: {str(e)}")
+            summary["errors"] += 1
+            continue
+
+        store.mark_notified([w.id for w in matched], price)
+        summary["notified"] += len(matched)
+
+    return summary
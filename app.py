@@ -1,10 +1,29 @@
-from flask import Flask, send_file, jsonify, request, abort
+import time
+
+# 冷啟動計時從第一個匯入開始
+_import_started = time.perf_counter()
+
+from flask import Flask, Response, send_file, jsonify, request, abort, g
 from flask_swagger_ui import get_swaggerui_blueprint
 from api import api_blueprint
+from api.util.amadeus_client import get_amadeus_client
+from api.util.lazy import STARTUP_PROFILE, import_attr
+from api.util.log import configure_logging
+from api.util.metrics import (
+    METRICS_ENABLED,
+    http_in_flight,
+    http_latency,
+    http_responses,
+    render_metrics,
+)
+from api.util.watchlist import run_price_watch
 from dotenv import load_dotenv
+import hmac
+import logging
 import os
 
 load_dotenv()
+configure_logging()
 
 app = Flask(__name__)
 
@@ -14,6 +33,40 @@ def home():
     return jsonify(message="Hello Flight Alarm")
 
 
+# 請求延遲、狀態碼與處理中請求數
+@app.before_request
+def start_request_metrics():
+    if METRICS_ENABLED:
+        g.metrics_endpoint = request.endpoint or "unmatched"
+        g.metrics_started = time.perf_counter()
+        http_in_flight.inc(g.metrics_endpoint)
+
+
+@app.after_request
+def record_response_metrics(response):
+    if METRICS_ENABLED and "metrics_started" in g:
+        http_responses.inc(g.metrics_endpoint, str(response.status_code))
+    return response
+
+
+@app.teardown_request
+def finish_request_metrics(exc):
+    if METRICS_ENABLED and "metrics_started" in g:
+        http_latency.observe(
+            time.perf_counter() - g.metrics_started,
+            g.metrics_endpoint,
+            request.method,
+        )
+        http_in_flight.dec(g.metrics_endpoint)
+
+
+@app.route("/metrics")
+def metrics():
+    if not METRICS_ENABLED:
+        abort(404)
+    return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
+
+
 # 註冊 API blueprint
 app.register_blueprint(api_blueprint, url_prefix="/api")
 
@@ -32,13 +85,35 @@ def send_swagger_yml():
     return send_file("swagger.yml")
 
 
+def cron_authorized():
+    """
+    設定 CRON_SECRET 時需帶 Authorization: Bearer <CRON_SECRET>（Vercel Cron 會自動帶上），
+    未設定時只接受本機呼叫。
+    """
+    secret = os.getenv("CRON_SECRET")
+    if secret:
+        return hmac.compare_digest(
+            request.headers.get("Authorization", ""), f"Bearer {secret}"
+        )
+    return request.remote_addr in ["127.0.0.1", "localhost"]
+
+
 # Cron job 路由
 @app.route("/cron-job")
 def cron_job():
-    if request.remote_addr not in ["127.0.0.1", "localhost"]:
+    if not cron_authorized():
         abort(403)
 
-    return jsonify(message="Cron job executed")
+    notify_watch_users = import_attr("api.routes.line_webhook.notify_watch_users")
+    summary = run_price_watch(get_amadeus_client(), notify_watch_users)
+    return jsonify(message="Cron job executed", summary=summary)
+
+
+if STARTUP_PROFILE:
+    logging.getLogger(__name__).info(
+        f"App initialized in {(time.perf_counter() - _import_started) * 1000:.1f} ms "
+        "(python -m api.util.startup for per-module import times)"
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,55 @@
+"""
+Flex carousel 渲染效能比較：linebot model 物件 vs. 預先產生的 JSON 樣板。
+
+    python -m benchmarks.bench_flex
+"""
+
+import argparse
+import json
+import timeit
+
+from api.util.airline import format_datetime, format_duration
+from api.util.line import (
+    create_flight_flex_message,
+    create_flight_flex_message_models,
+)
+from services.standin.fixtures import make_offers
+
+
+def dumps(message):
+    return json.dumps(message.as_json_dict(), ensure_ascii=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--offers", type=int, default=10)
+    parser.add_argument("--number", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    offers = make_offers(args.offers)
+    expected = dumps(create_flight_flex_message_models(offers))
+    actual = dumps(create_flight_flex_message(offers))
+    if expected != actual:
+        raise SystemExit("Fast renderer output differs from linebot model renderer")
+
+    results = {}
+    for name, render in (
+        ("models", create_flight_flex_message_models),
+        ("templates", create_flight_flex_message),
+    ):
+        format_datetime.cache_clear()
+        format_duration.cache_clear()
+        # 模擬實際傳送：渲染後轉為 JSON
+        timer = timeit.Timer(lambda: dumps(render(offers)))
+        best = min(timer.repeat(repeat=args.repeat, number=args.number))
+        results[name] = best / args.number * 1000
+
+    print(f"{args.offers} bubbles, {len(expected.encode())} bytes, output identical")
+    for name, ms in results.items():
+        print(f"{name:>10}: {ms:8.3f} ms/carousel")
+    print(f"{'speedup':>10}: {results['models'] / results['templates']:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""效能測試共用工具：計時統計、測試環境設定與 Amadeus 替身客戶端"""
+
+import os
+import tempfile
+import threading
+import time
+import timeit
+from types import SimpleNamespace
+
+from services.standin.fixtures import make_offers
+
+
+def configure_environment():
+    """
+    在匯入 app 之前呼叫：使用假憑證、暫存資料目錄，並關閉配額限制，
+    讓壓測只量測本服務的處理時間。已設定的環境變數不會被覆寫。
+    """
+    workdir = tempfile.mkdtemp(prefix="flight-bench-")
+    defaults = {
+        "AMADEUS_API_KEY": "bench",
+        "AMADEUS_API_SECRET": "bench",
+        "LINE_CHANNEL_ACCESS_TOKEN": "bench",
+        "LINE_CHANNEL_SECRET": "bench-secret",
+        "AMADEUS_RATE_LIMIT": "0",
+        "LINE_STATE_BACKEND": "memory",
+        "WATCHLIST_DB": os.path.join(workdir, "watchlist.db"),
+        "PRICE_HISTORY_DIR": os.path.join(workdir, "price_history"),
+    }
+    for name, value in defaults.items():
+        os.environ.setdefault(name, value)
+    return workdir
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round((len(sorted_values) - 1) * pct)))
+    return sorted_values[index]
+
+
+def measure(fn, number=1000, repeat=5):
+    """以 timeit 量測，回傳每次呼叫的微秒數（取各輪最佳與中位數）與每秒次數"""
+    timer = timeit.Timer(fn)
+    runs = sorted(t / number * 1e6 for t in timer.repeat(repeat=repeat, number=number))
+    best = runs[0]
+    return {
+        "unit": "us",
+        "best_us": round(best, 3),
+        "median_us": round(percentile(runs, 0.5), 3),
+        "ops_per_sec": round(1e6 / best, 1),
+    }
+
+
+def latency_stats(latencies, elapsed, errors=0):
+    """latencies 為秒數列表，回傳吞吐量與百分位延遲（毫秒）"""
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.5) * 1000, 3) if latencies else None,
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3) if latencies else None,
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3) if latencies else None,
+    }
+
+
+class StubFlightOffersSearch:
+    """以擬真資料回應 flight_offers_search.get，latency 模擬上游耗時"""
+
+    def __init__(self, latency=0.0, count=10):
+        self.latency = latency
+        self.count = count
+        self.calls = 0
+        self._offers = {}
+        self._lock = threading.Lock()
+
+    def get(self, **params):
+        key = tuple(sorted(params.items()))
+        with self._lock:
+            self.calls += 1
+            offers = self._offers.get(key)
+            if offers is None:
+                offers = self._offers[key] = make_offers(self.count, params)
+        if self.latency:
+            time.sleep(self.latency)
+        return SimpleNamespace(data=offers)
+
+
+def stub_amadeus_client(latency=0.0, count=10):
+    search = StubFlightOffersSearch(latency, count)
+    return SimpleNamespace(shopping=SimpleNamespace(flight_offers_search=search))
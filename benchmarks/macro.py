@@ -0,0 +1,183 @@
+"""
+端到端壓測：以多執行緒透過 WSGI app 呼叫 /api/flight/search 與 /api/line_webhook，
+Amadeus 與 LINE API 皆以替身取代，逐步提高並行數。
+
+    python -m benchmarks.macro --concurrency 1,4,16 --duration 3 --upstream-latency 0.05
+"""
+
+import argparse
+import base64
+import hashlib
+import hmac
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import date, timedelta
+
+from benchmarks.common import configure_environment, latency_stats, stub_amadeus_client
+
+CONVERSATION = ["search flights", "來回", "否", None, "TPE", "NRT", None]
+
+
+def departure_dates(count=60):
+    start = date.today() + timedelta(days=30)
+    return [(start + timedelta(days=i)).isoformat() for i in range(count)]
+
+
+def line_event_body(user_id, text):
+    return json.dumps(
+        {
+            "destination": "Ubench",
+            "events": [
+                {
+                    "type": "message",
+                    "mode": "active",
+                    "timestamp": int(time.time() * 1000),
+                    "source": {"type": "user", "userId": user_id},
+                    "webhookEventId": uuid.uuid4().hex,
+                    "deliveryContext": {"isRedelivery": False},
+                    "replyToken": uuid.uuid4().hex,
+                    "message": {"id": "1", "type": "text", "text": text},
+                }
+            ],
+        },
+        ensure_ascii=False,
+    )
+
+
+def sign(body, secret):
+    digest = hmac.new(secret.encode(), body.encode(), hashlib.sha256).digest()
+    return base64.b64encode(digest).decode()
+
+
+class LineSink:
+    """取代 LineBotApi 的傳送方法：序列化訊息（與實際傳送相同的成本）後計數"""
+
+    def __init__(self):
+        self.sent = 0
+        self.bytes = 0
+        self._lock = threading.Lock()
+
+    def send(self, to, messages, *args, **kwargs):
+        if not isinstance(messages, (list, tuple)):
+            messages = [messages]
+        payload = json.dumps([m.as_json_dict() for m in messages])
+        with self._lock:
+            self.sent += 1
+            self.bytes += len(payload)
+
+    def install(self, line_bot_api):
+        line_bot_api.reply_message = self.send
+        line_bot_api.push_message = self.send
+        line_bot_api.multicast = self.send
+
+
+def run_load(app, concurrency, duration, request_fn):
+    """concurrency 個執行緒在 duration 秒內反覆呼叫 request_fn(client, worker, i)"""
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker(worker_id):
+        client = app.test_client()
+        local, local_errors, i = [], 0, 0
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            ok = request_fn(client, worker_id, i)
+            local.append(time.perf_counter() - started)
+            local_errors += 0 if ok else 1
+            i += 1
+        with lock:
+            latencies.extend(local)
+            errors[0] += local_errors
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latency_stats(latencies, time.perf_counter() - started, errors[0])
+
+
+def run(levels=(1, 4, 16), duration=3.0, upstream_latency=0.05, cache=False):
+    configure_environment()
+    import api.routes.flight as flight_routes
+    import api.routes.line_webhook as line_webhook
+    from api.util.search import offer_cache
+    from app import app
+
+    amadeus = stub_amadeus_client(latency=upstream_latency)
+    flight_routes.get_amadeus_client = lambda: amadeus
+    line_webhook.get_amadeus_client = lambda: amadeus
+    sink = LineSink()
+    sink.install(line_webhook.line_bot_api)
+    if not cache:
+        offer_cache.ttl = 0
+    secret = os.environ["LINE_CHANNEL_SECRET"]
+    dates = departure_dates()
+
+    def flight_search(client, worker, i):
+        day = dates[(worker * 7 + i) % len(dates)]
+        response = client.post(
+            "/api/flight/search",
+            json={
+                "flight_data": [
+                    {"date": day, "from_airport": "TPE", "to_airport": "NRT"}
+                ],
+                "trip": "one-way",
+                "nonStop": "false",
+            },
+        )
+        return response.status_code == 200
+
+    def webhook(client, worker, i):
+        # 每位虛擬使用者重複完整的來回搜尋對話，最後一則訊息觸發搜尋與 Flex 渲染
+        step = i % len(CONVERSATION)
+        day = dates[(worker + i // len(CONVERSATION)) % (len(dates) - 5)]
+        text = CONVERSATION[step]
+        if text is None:
+            text = day if step == 3 else dates[dates.index(day) + 5]
+        body = line_event_body(f"Ubench{worker:04d}", text)
+        response = client.post(
+            "/api/line_webhook",
+            data=body.encode(),
+            headers={
+                "Content-Type": "application/json",
+                "X-Line-Signature": sign(body, secret),
+            },
+        )
+        return response.status_code == 200
+
+    results = {}
+    for name, request_fn in (("flight_search", flight_search), ("webhook", webhook)):
+        for concurrency in levels:
+            results[f"macro.{name}.c{concurrency}"] = run_load(
+                app, concurrency, duration, request_fn
+            )
+    results["macro.meta"] = {
+        "upstream_latency_ms": upstream_latency * 1000,
+        "upstream_calls": amadeus.shopping.flight_offers_search.calls,
+        "line_messages_sent": sink.sent,
+        "cache": cache,
+    }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--concurrency", default="1,4,16")
+    parser.add_argument("--duration", type=float, default=3.0)
+    parser.add_argument("--upstream-latency", type=float, default=0.05)
+    parser.add_argument("--cache", action="store_true")
+    args = parser.parse_args()
+    levels = [int(n) for n in args.concurrency.split(",")]
+    results = run(levels, args.duration, args.upstream_latency, args.cache)
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
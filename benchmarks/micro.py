@@ -0,0 +1,84 @@
+"""
+單一函式的微基準：搜尋參數建立、航空公司資訊、日期格式化與 Flex 渲染。
+
+    python -m benchmarks.micro
+"""
+
+import argparse
+import json
+
+from benchmarks.common import configure_environment, measure
+from services.standin.fixtures import make_offers
+
+SEARCH_REQUEST = {
+    "flight_data": [
+        {"date": "2025-01-10", "from_airport": "TPE", "to_airport": "NRT"},
+        {"date": "2025-01-15", "from_airport": "NRT", "to_airport": "TPE"},
+    ],
+    "trip": "round-trip",
+    "seat": "economy",
+    "passengers": {"adults": 2, "children": 1},
+    "nonStop": "false",
+}
+
+
+def run(quick=False):
+    configure_environment()
+    from api.util.airline import format_datetime, get_airline_info
+    from api.util.line import create_flight_flex_message
+    from api.util.search import build_search_params, merge_offers
+
+    scale = 10 if quick else 1
+    offers = make_offers(10, max_stops=2)
+    segments = [
+        segment
+        for offer in offers
+        for itinerary in offer["itineraries"]
+        for segment in itinerary["segments"]
+    ]
+    timestamps = [segment["departure"]["at"] for segment in segments]
+    batches = [make_offers(20, seed=seed) for seed in range(4)]
+
+    def airline_info():
+        for segment in segments:
+            get_airline_info(segment)
+
+    def datetimes_cold():
+        format_datetime.cache_clear()
+        for value in timestamps:
+            format_datetime(value)
+
+    def datetimes_warm():
+        for value in timestamps:
+            format_datetime(value)
+
+    def flex_message():
+        message = create_flight_flex_message(offers)
+        json.dumps(message.as_json_dict(), ensure_ascii=False)
+
+    cases = {
+        "build_search_params": (lambda: build_search_params(SEARCH_REQUEST), 20000),
+        f"get_airline_info[{len(segments)}]": (airline_info, 5000),
+        f"format_datetime_cold[{len(timestamps)}]": (datetimes_cold, 2000),
+        f"format_datetime_warm[{len(timestamps)}]": (datetimes_warm, 20000),
+        "create_flight_flex_message[10]": (flex_message, 500),
+        "merge_offers[4x20]": (lambda: merge_offers(batches), 1000),
+    }
+    return {
+        f"micro.{name}": measure(fn, number=max(1, number // scale))
+        for name, (fn, number) in cases.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--quick", action="store_true")
+    args = parser.parse_args()
+    for name, stats in run(args.quick).items():
+        print(
+            f"{name:<45} {stats['best_us']:>12.3f} us {stats['ops_per_sec']:>12.1f}/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+執行效能測試並輸出 JSON 結果，可與基準值比較，退步超過容許範圍時以非零狀態結束。
+
+    python -m benchmarks.run --output bench.json
+    python -m benchmarks.run --save-baseline benchmarks/baseline.json
+    python -m benchmarks.run --compare benchmarks/baseline.json --tolerance 0.15
+
+基準值需在固定的機器上產生；不同機器的數字不可直接比較。
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+
+# 越高越好的指標；其餘以 _ms / _us 結尾的指標越低越好
+HIGHER_IS_BETTER = ("ops_per_sec", "rps")
+LOWER_IS_BETTER = ("best_us", "p50_ms", "p95_ms")
+
+
+def git_revision():
+    try:
+        return (
+            subprocess.check_output(
+                ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL
+            )
+            .decode()
+            .strip()
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, tolerance):
+    """回傳 (指標, 基準值, 目前值, 變化比例, 是否退步) 列表"""
+    rows = []
+    for name, stats in baseline.get("results", {}).items():
+        current = results.get(name)
+        if not isinstance(stats, dict) or current is None:
+            continue
+        for metric, base in stats.items():
+            value = current.get(metric)
+            if not isinstance(base, (int, float)) or not isinstance(
+                value, (int, float)
+            ):
+                continue
+            if metric not in HIGHER_IS_BETTER + LOWER_IS_BETTER or not base:
+                continue
+            change = (value - base) / base
+            if metric in HIGHER_IS_BETTER:
+                regressed = change < -tolerance
+            else:
+                regressed = change > tolerance
+            rows.append((f"{name}.{metric}", base, value, change, regressed))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--suite", choices=["all", "micro", "macro"], default="all")
+    parser.add_argument("--quick", action="store_true", help="shorter runs")
+    parser.add_argument("--concurrency", default="1,4,16")
+    parser.add_argument("--duration", type=float, default=3.0)
+    parser.add_argument("--upstream-latency", type=float, default=0.05)
+    parser.add_argument("--output", help="write results JSON to this file")
+    parser.add_argument("--save-baseline", help="write results as a new baseline")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    args = parser.parse_args()
+
+    results = {}
+    if args.suite in ("all", "micro"):
+        from benchmarks import micro
+
+        results.update(micro.run(quick=args.quick))
+    if args.suite in ("all", "macro"):
+        from benchmarks import macro
+
+        results.update(
+            macro.run(
+                levels=[int(n) for n in args.concurrency.split(",")],
+                duration=1.0 if args.quick else args.duration,
+                upstream_latency=args.upstream_latency,
+            )
+        )
+
+    report = {
+        "meta": {
+            "timestamp": int(time.time()),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "suite": args.suite,
+            "quick": args.quick,
+        },
+        "results": results,
+    }
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(output + "\n")
+    if not args.output and not args.save_baseline:
+        print(output)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        rows = compare(results, baseline, args.tolerance)
+        regressions = [row for row in rows if row[4]]
+        for name, base, value, change, regressed in rows:
+            flag = "REGRESSION" if regressed else ""
+            print(f"{name:<60} {base:>12} {value:>12} {change:>+8.1%} {flag}")
+        if regressions:
+            print(f"{len(regressions)} metric(s) regressed beyond {args.tolerance:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
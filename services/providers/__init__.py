@@ -0,0 +1,13 @@
+from .aggregator import merge_flights, search_all
+from .base import FlightProvider, FlightQuery
+from .registry import get_enabled_providers, get_provider, register_provider
+
+__all__ = [
+    "FlightProvider",
+    "FlightQuery",
+    "get_enabled_providers",
+    "get_provider",
+    "merge_flights",
+    "register_provider",
+    "search_all",
+]
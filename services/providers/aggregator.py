@@ -0,0 +1,81 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+
+from api.util.metrics import observe_stage, record_upstream
+from .registry import get_enabled_providers
+
+logger = logging.getLogger(__name__)
+
+SEARCH_DEADLINE = float(os.getenv("FLIGHT_SEARCH_DEADLINE", "15"))
+
+
+def flight_key(flight):
+    """
+    以每一段航班的航班號碼與起飛時間識別相同行程，來回票的去程與回程都納入比對；
+    沒有航段資料的來源以航班號碼（沒有時改用航空公司）與起飛時間視為單一航段。
+    """
+    if flight.itineraries:
+        return tuple(
+            (
+                f"{segment.carrier}{segment.number}",
+                datetime.fromisoformat(segment.departure_at),
+            )
+            for itinerary in flight.itineraries
+            for segment in itinerary.segments
+        )
+    return ((flight.flight_number or flight.airline, flight.departure_time),)
+
+
+def merge_flights(flight_lists):
+    """合併多個來源的結果，相同航班只保留最便宜的報價，並依價格排序"""
+    merged = {}
+    for flights in flight_lists:
+        for flight in flights:
+            key = flight_key(flight)
+            if key not in merged or flight.price < merged[key].price:
+                merged[key] = flight
+    return sorted(merged.values(), key=lambda f: f.price)
+
+
+async def _search_provider(provider, query, timeout):
+    started = time.monotonic()
+    flights = []
+    try:
+        flights = await asyncio.wait_for(provider.search(query), timeout)
+        status = {"status": "ok", "count": len(flights)}
+    except asyncio.TimeoutError:
+        status = {"status": "timeout"}
+    except NotImplementedError:
+        status = {"status": "unsupported"}
+    except Exception as e:
+        logger.error(f"Flight provider {provider.name} error: {str(e)}")
+        status = {"status": "error", "error": str(e)}
+    elapsed = time.monotonic() - started
+    status["elapsed_ms"] = round(elapsed * 1000)
+    record_upstream(provider.name, status["status"])
+    observe_stage(f"provider_{provider.name}", elapsed)
+    return flights, status
+
+
+async def search_all(query, providers=None, deadline=None):
+    """
+    並行查詢所有啟用的資料來源。每個來源的逾時不超過 deadline，
+    總耗時由 deadline 決定；逾時或失敗的來源不影響其他來源的結果。
+    回傳 (合併後的 Flight 列表, {來源名稱: 狀態})。
+    """
+    if providers is None:
+        providers = get_enabled_providers()
+    deadline = deadline or SEARCH_DEADLINE
+    results = await asyncio.gather(
+        *(
+            _search_provider(provider, query, min(provider.timeout, deadline))
+            for provider in providers
+        )
+    )
+    statuses = {
+        provider.name: status for provider, (_, status) in zip(providers, results)
+    }
+    return merge_flights(flights for flights, _ in results), statuses
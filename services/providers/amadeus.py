@@ -0,0 +1,20 @@
+from typing import List
+
+from api.models.flight import Flight
+from api.util.amadeus_client import get_amadeus_client
+from api.util.search import search_flights
+
+from .base import FlightProvider, FlightQuery, run_blocking
+
+
+class AmadeusProvider(FlightProvider):
+    """Amadeus Flight Offers Search，沿用快取、single-flight 與多機場展開"""
+
+    name = "amadeus"
+
+    async def search(self, query: FlightQuery) -> List[Flight]:
+        return await run_blocking(self._search, query)
+
+    def _search(self, query):
+        offers, _ = search_flights(query.to_request(), get_amadeus_client())
+        return [Flight.from_amadeus(offer) for offer in offers]
@@ -0,0 +1,131 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import List, Optional
+
+from api.models.flight import Flight
+from api.util.airport import expand_airports
+from api.util.search import build_search_params
+
+PROVIDER_WORKERS = int(os.getenv("FLIGHT_PROVIDER_WORKERS", "8"))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """
+    同步 SDK 共用的執行緒池。不使用事件迴圈的預設 executor，
+    避免 asyncio.run 結束時等待逾時仍在執行的查詢。
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=PROVIDER_WORKERS, thread_name_prefix="flight-provider"
+            )
+    return _executor
+
+
+async def run_blocking(fn, *args):
+    """在共用執行緒池執行阻塞呼叫"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), fn, *args)
+
+
+@dataclass(frozen=True)
+class FlightQuery:
+    origin: str
+    destination: str
+    departure_date: str
+    return_date: Optional[str] = None
+    adults: int = 1
+    children: int = 0
+    infants_in_seat: int = 0
+    infants_on_lap: int = 0
+    seat: str = "economy"
+    non_stop: bool = True
+
+    @classmethod
+    def from_request(cls, data):
+        """由 /api/flight/search 的請求格式建立查詢（驗證規則與 Amadeus 搜尋相同）"""
+        search_params, search_criteria = build_search_params(data)
+        passengers = search_criteria["passengers"]
+        return cls(
+            origin=search_params["originLocationCode"].upper(),
+            destination=search_params["destinationLocationCode"].upper(),
+            departure_date=search_params["departureDate"],
+            return_date=search_params.get("returnDate"),
+            adults=passengers["adults"],
+            children=passengers["children"],
+            infants_in_seat=passengers["infants_in_seat"],
+            infants_on_lap=passengers["infants_on_lap"],
+            seat=search_criteria["seat"],
+            non_stop=search_params["nonStop"] == "true",
+        )
+
+    @property
+    def trip(self):
+        return "round-trip" if self.return_date else "one-way"
+
+    def airport_pairs(self):
+        """展開多機場與都會區代碼，回傳 (出發, 抵達) 列表"""
+        return [
+            (origin, destination)
+            for origin in expand_airports(self.origin)
+            for destination in expand_airports(self.destination)
+            if origin != destination
+        ]
+
+    def to_request(self):
+        """轉換為 search_flights 接受的請求格式"""
+        flight_data = [
+            {
+                "date": self.departure_date,
+                "from_airport": self.origin,
+                "to_airport": self.destination,
+            }
+        ]
+        if self.return_date:
+            flight_data.append(
+                {
+                    "date": self.return_date,
+                    "from_airport": self.destination,
+                    "to_airport": self.origin,
+                }
+            )
+        return {
+            "flight_data": flight_data,
+            "trip": self.trip,
+            "seat": self.seat,
+            "passengers": {
+                "adults": self.adults,
+                "children": self.children,
+                "infants_in_seat": self.infants_in_seat,
+                "infants_on_lap": self.infants_on_lap,
+            },
+            "nonStop": "true" if self.non_stop else "false",
+        }
+
+    def to_dict(self):
+        return asdict(self)
+
+
+class FlightProvider:
+    """
+    航班資料來源的共同介面：search(query) 為 coroutine，回傳 Flight 列表。
+    不支援的查詢應拋出 NotImplementedError。
+    """
+
+    name = "provider"
+
+    def __init__(self, timeout=10.0):
+        self.timeout = timeout
+
+    async def search(self, query: FlightQuery) -> List[Flight]:
+        raise NotImplementedError
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.name} timeout={self.timeout}>"
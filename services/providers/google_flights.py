@@ -0,0 +1,121 @@
+import asyncio
+import logging
+import re
+from datetime import datetime, timedelta
+from typing import List
+
+from api.models.flight import Flight
+
+from .base import FlightProvider, FlightQuery, run_blocking
+
+logger = logging.getLogger(__name__)
+
+TIME_PATTERN = re.compile(r"(\d{1,2}):(\d{2})\s*([AP]M)", re.IGNORECASE)
+
+# fast_flights 回傳的價格字串只有貨幣符號
+CURRENCY_SYMBOLS = (
+    ("NT$", "TWD"),
+    ("HK$", "HKD"),
+    ("US$", "USD"),
+    ("$", "USD"),
+    ("¥", "JPY"),
+    ("€", "EUR"),
+    ("£", "GBP"),
+    ("₩", "KRW"),
+)
+
+
+def parse_time(value, day):
+    """將 '6:05 PM on Mon, Jan 1' 之類的字串與日期組成 datetime"""
+    match = TIME_PATTERN.search(value or "")
+    if not match:
+        return None
+    hour, minute, meridiem = int(match.group(1)), int(match.group(2)), match.group(3)
+    hour = hour % 12 + (12 if meridiem.upper() == "PM" else 0)
+    return datetime.combine(day, datetime.min.time()).replace(hour=hour, minute=minute)
+
+
+def parse_price(value):
+    """回傳 (價格, 幣別)，無法解析時價格為 None"""
+    value = (value or "").strip()
+    digits = re.sub(r"[^\d.]", "", value)
+    if not digits:
+        return None, ""
+    for symbol, currency in CURRENCY_SYMBOLS:
+        if value.startswith(symbol):
+            return float(digits), currency
+    return float(digits), ""
+
+
+def to_flights(result, origin, destination, departure_date):
+    """盡量將 fast_flights 的結果轉換為 Flight，缺少時間或價格的航班略過"""
+    day = datetime.strptime(departure_date, "%Y-%m-%d").date()
+    flights = []
+    for item in getattr(result, "flights", None) or []:
+        departure_time = parse_time(getattr(item, "departure", ""), day)
+        price, currency = parse_price(getattr(item, "price", ""))
+        if departure_time is None or price is None:
+            continue
+        arrival_time = parse_time(getattr(item, "arrival", ""), day) or departure_time
+        ahead = re.sub(r"[^\d-]", "", getattr(item, "arrival_time_ahead", "") or "")
+        if ahead:
+            arrival_time += timedelta(days=int(ahead))
+        elif arrival_time < departure_time:
+            arrival_time += timedelta(days=1)
+        flights.append(
+            Flight(
+                flight_number="",  # Google Flights 結果不含航班號碼
+                departure=origin,
+                arrival=destination,
+                departure_time=departure_time,
+                arrival_time=arrival_time,
+                price=price,
+                currency=currency,
+                airline=getattr(item, "name", ""),
+            )
+        )
+    return flights
+
+
+class FastFlightsProvider(FlightProvider):
+    """透過 fast_flights 查詢 Google Flights（只支援單程）"""
+
+    name = "fast_flights"
+
+    async def search(self, query: FlightQuery) -> List[Flight]:
+        if query.return_date:
+            # 結果只含去程航班與價格，無法與來回總價比較
+            raise NotImplementedError(f"{self.name} does not quote round trips")
+        results = await asyncio.gather(
+            *(
+                run_blocking(self._search, query, origin, destination)
+                for origin, destination in query.airport_pairs()
+            )
+        )
+        return [flight for flights in results for flight in flights]
+
+    def _search(self, query, origin, destination):
+        # 延後載入，未啟用此來源時不需要安裝 fast_flights
+        from fast_flights import FlightData, Passengers, create_filter, get_flights
+
+        flight_data = [
+            FlightData(
+                date=query.departure_date,
+                from_airport=origin,
+                to_airport=destination,
+            )
+        ]
+        result = get_flights(
+            create_filter(
+                flight_data=flight_data,
+                trip=query.trip,
+                seat=query.seat,
+                passengers=Passengers(
+                    adults=query.adults,
+                    children=query.children,
+                    infants_in_seat=query.infants_in_seat,
+                    infants_on_lap=query.infants_on_lap,
+                ),
+            )
+        )
+        return to_flights(result, origin, destination, query.departure_date)
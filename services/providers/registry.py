@@ -0,0 +1,77 @@
+import os
+import threading
+
+from api.util.lazy import import_attr
+
+from .amadeus import AmadeusProvider
+from .google_flights import FastFlightsProvider
+from .scrapers import ScraperProvider
+
+DEFAULT_PROVIDERS = "amadeus,fast_flights,tiger,scoot"
+DEFAULT_TIMEOUT = float(os.getenv("FLIGHT_PROVIDER_TIMEOUT", "10"))
+
+_factories = {}  # name -> factory(timeout) -> FlightProvider
+_providers = {}
+_lock = threading.Lock()
+
+
+def register_provider(name, factory):
+    """註冊資料來源，factory 接受 timeout 參數並回傳 FlightProvider"""
+    with _lock:
+        _factories[name] = factory
+        _providers.pop(name, None)
+
+
+def provider_timeout(name):
+    """個別來源可用 FLIGHT_PROVIDER_TIMEOUT_<NAME> 覆寫逾時秒數"""
+    value = os.getenv(f"FLIGHT_PROVIDER_TIMEOUT_{name.upper()}")
+    return float(value) if value else DEFAULT_TIMEOUT
+
+
+def get_provider(name):
+    with _lock:
+        provider = _providers.get(name)
+        if provider is None:
+            factory = _factories.get(name)
+            if factory is None:
+                raise ValueError(f"Unknown flight provider: {name}")
+            provider = _providers[name] = factory(timeout=provider_timeout(name))
+    return provider
+
+
+def enabled_provider_names():
+    value = os.getenv("FLIGHT_PROVIDERS", DEFAULT_PROVIDERS)
+    return [name.strip().lower() for name in value.split(",") if name.strip()]
+
+
+def get_enabled_providers(names=None):
+    """依 FLIGHT_PROVIDERS（或指定名稱）回傳資料來源，只允許已啟用的來源"""
+    enabled = enabled_provider_names()
+    if names is None:
+        names = enabled
+    names = [name.strip().lower() for name in names]
+    disabled = [name for name in names if name not in enabled]
+    if disabled:
+        raise ValueError(f"Flight provider not enabled: {', '.join(disabled)}")
+    return [get_provider(name) for name in dict.fromkeys(names)]
+
+
+register_provider("amadeus", AmadeusProvider)
+register_provider("fast_flights", FastFlightsProvider)
+
+
+def scraper_factory(name, import_name):
+    """爬蟲來源在第一次查詢時才匯入（aiohttp 匯入成本高）"""
+
+    def factory(timeout):
+        return ScraperProvider(name, import_attr(import_name)(), timeout=timeout)
+
+    return factory
+
+
+register_provider(
+    "tiger", scraper_factory("tiger", "services.scrapers.tiger_scraper.TigerScraper")
+)
+register_provider(
+    "scoot", scraper_factory("scoot", "services.scrapers.scoot_scraper.ScootScraper")
+)
@@ -0,0 +1,29 @@
+import asyncio
+from datetime import datetime
+from typing import List
+
+from api.models.flight import Flight
+
+from .base import FlightProvider, FlightQuery
+
+
+class ScraperProvider(FlightProvider):
+    """包裝 services.scrapers 的航空公司爬蟲（只查詢去程）"""
+
+    def __init__(self, name, scraper, timeout=10.0):
+        super().__init__(timeout)
+        self.name = name
+        self.scraper = scraper
+
+    async def search(self, query: FlightQuery) -> List[Flight]:
+        if query.return_date:
+            # 只有單程票價，無法與來回總價比較
+            raise NotImplementedError(f"{self.name} does not quote round trips")
+        date = datetime.strptime(query.departure_date, "%Y-%m-%d")
+        results = await asyncio.gather(
+            *(
+                self.scraper.search_flights(origin, destination, date)
+                for origin, destination in query.airport_pairs()
+            )
+        )
+        return [flight for flights in results for flight in flights]
@@ -1,3 +1,18 @@
-from .tiger_scraper import TigerScraper
+import importlib
 
-__all__ = ['TigerScraper']
+# 延後載入：爬蟲模組依賴 api.models，而 api 套件初始化時又會載入爬蟲，
+# 直接匯入會造成循環引用（例如單獨執行 fixture_server 時）
+_EXPORTS = {
+    "BaseScraper": ".base",
+    "ScootScraper": ".scoot_scraper",
+    "ScraperError": ".exceptions",
+    "TigerScraper": ".tiger_scraper",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
@@ -0,0 +1,187 @@
+import asyncio
+import os
+import random
+import threading
+from datetime import datetime
+from typing import List
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from api.models.flight import Flight
+from .exceptions import ScraperError, ScraperHTTPError, ScraperParseError
+
+# 暫時性錯誤，可重試
+RETRY_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def get_scraper_loop():
+    """
+    所有爬蟲共用的背景事件迴圈。Flask 的 async view 每個請求都會建立新的迴圈，
+    在固定的迴圈上執行才能讓 session 與連線池跨請求重複使用。
+    """
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=_loop.run_forever, name="scraper-loop", daemon=True
+            ).start()
+    return _loop
+
+
+async def run_in_scraper_loop(coro):
+    """在背景迴圈執行 coroutine；取消呼叫端時也會取消背景工作"""
+    loop = get_scraper_loop()
+    if asyncio.get_running_loop() is loop:
+        return await coro
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+
+class BaseScraper:
+    """
+    航空公司爬蟲共用的非同步 HTTP 引擎：
+    - 在共用的背景迴圈上維持一個 aiohttp session（連線池），所有查詢共用連線
+    - 每個主機的並行請求數上限，避免大量查詢時被航空公司封鎖
+    - 暫時性錯誤以指數退避加隨機抖動重試
+    子類別設定 airline、base_url_env、default_base_url，並實作 fetch_flights。
+    """
+
+    airline = ""
+    base_url_env = ""
+    default_base_url = ""
+
+    def __init__(
+        self,
+        base_url=None,
+        max_per_host=None,
+        max_connections=None,
+        retries=None,
+        backoff=None,
+        timeout=None,
+    ):
+        self.base_url = (
+            base_url or os.getenv(self.base_url_env) or self.default_base_url
+        ).rstrip("/")
+        self.max_per_host = max_per_host or int(os.getenv("SCRAPER_MAX_PER_HOST", "10"))
+        self.max_connections = max_connections or int(
+            os.getenv("SCRAPER_MAX_CONNECTIONS", "100")
+        )
+        self.retries = (
+            retries if retries is not None else int(os.getenv("SCRAPER_RETRIES", "3"))
+        )
+        self.backoff = backoff or float(os.getenv("SCRAPER_BACKOFF", "0.5"))
+        self.max_backoff = 10.0
+        self.timeout = timeout or float(os.getenv("SCRAPER_TIMEOUT", "10"))
+        self._session = None
+        self._semaphores = {}  # host -> Semaphore
+        self.requests = 0
+        self.retried = 0
+        self.failures = 0
+
+    async def search_flights(
+        self, from_airport: str, to_airport: str, date: datetime
+    ) -> List[Flight]:
+        return await run_in_scraper_loop(
+            self.fetch_flights(from_airport, to_airport, date)
+        )
+
+    async def fetch_flights(
+        self, from_airport: str, to_airport: str, date: datetime
+    ) -> List[Flight]:
+        raise NotImplementedError
+
+    async def search_many(self, routes):
+        """
+        並行查詢多組 (出發, 抵達, 日期)，依輸入順序回傳 (flights, error) 列表；
+        實際並行數由每個主機的上限控制。
+        """
+
+        async def run(route):
+            try:
+                return await self.search_flights(*route), None
+            except ScraperError as e:
+                return None, e
+
+        return await asyncio.gather(*(run(route) for route in routes))
+
+    async def fetch_json(self, path, params=None):
+        return await self._fetch(path, params, "json")
+
+    async def fetch_text(self, path, params=None):
+        return await self._fetch(path, params, "text")
+
+    async def close(self):
+        async def close_session():
+            session, self._session = self._session, None
+            if session is not None:
+                await session.close()
+
+        await run_in_scraper_loop(close_session())
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "retries": self.retried,
+            "failures": self.failures,
+        }
+
+    async def _fetch(self, path, params, parse):
+        url = f"{self.base_url}{path}"
+        semaphore = self._semaphore(urlsplit(url).netloc)
+        for attempt in range(self.retries + 1):
+            retry_after = None
+            try:
+                async with semaphore:
+                    self.requests += 1
+                    async with self._get_session().get(url, params=params) as response:
+                        if response.status >= 400:
+                            retry_after = response.headers.get("Retry-After")
+                            raise ScraperHTTPError(response.status, url)
+                        if parse == "json":
+                            return await response.json(content_type=None)
+                        return await response.text()
+            except ScraperHTTPError as e:
+                error = e
+                if e.status not in RETRY_STATUSES:
+                    break
+            except ValueError as e:
+                self.failures += 1
+                raise ScraperParseError(f"Invalid JSON from {url}: {str(e)}")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = ScraperError(f"{type(e).__name__} from {url}: {str(e)}")
+
+            if attempt < self.retries:
+                self.retried += 1
+                await asyncio.sleep(self._delay(attempt, retry_after))
+
+        self.failures += 1
+        raise error
+
+    def _delay(self, attempt, retry_after=None):
+        """指數退避加完整抖動；伺服器有指定 Retry-After 時優先採用"""
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.max_backoff)
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2**attempt))
+
+    def _get_session(self):
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.max_connections,
+                    limit_per_host=self.max_per_host,
+                    ttl_dns_cache=300,
+                ),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={"User-Agent": "Mozilla/5.0 (flight-ticket-alarm)"},
+            )
+        return self._session
+
+    def _semaphore(self, host):
+        semaphore = self._semaphores.get(host)
+        if semaphore is None:
+            semaphore = self._semaphores[host] = asyncio.Semaphore(self.max_per_host)
+        return semaphore
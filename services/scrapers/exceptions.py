@@ -0,0 +1,13 @@
+class ScraperError(Exception):
+    """爬蟲查詢失敗（重試後仍無法取得資料）"""
+
+
+class ScraperHTTPError(ScraperError):
+    def __init__(self, status, url):
+        super().__init__(f"HTTP {status} from {url}")
+        self.status = status
+        self.url = url
+
+
+class ScraperParseError(ScraperError):
+    """航空公司頁面格式與預期不符"""
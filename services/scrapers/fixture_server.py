@@ -0,0 +1,90 @@
+"""
+離線測試用的航空公司頁面伺服器。
+
+依請求路徑回傳 fixtures/ 下錄製的頁面，並以查詢參數代換頁面中的
+$origin、$destination、${date}，同一份頁面可以回應任意航線。
+
+    python -m services.scrapers.fixture_server --port 8081 --latency 0.05
+    TIGER_BASE_URL=http://127.0.0.1:8081/tiger
+    SCOOT_BASE_URL=http://127.0.0.1:8081/scoot
+"""
+
+import argparse
+import asyncio
+import os
+import random
+from string import Template
+
+from aiohttp import web
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+CONTENT_TYPES = {".json": "application/json", ".html": "text/html"}
+
+
+def find_fixture(root, path):
+    """/tiger/api/availability → fixtures/tiger/api/availability(.json|.html)"""
+    base = os.path.normpath(os.path.join(root, path.lstrip("/")))
+    if not base.startswith(os.path.abspath(root)):
+        return None
+    for candidate in [base] + [base + ext for ext in CONTENT_TYPES]:
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+
+def create_app(root=FIXTURE_DIR, latency=0.0, error_rate=0.0):
+    """latency 為每個請求的延遲秒數，error_rate 為回傳 503 的機率（測試重試用）"""
+    root = os.path.abspath(root)
+    templates = {}
+
+    async def serve(request):
+        if latency:
+            await asyncio.sleep(latency)
+        if error_rate and random.random() < error_rate:
+            return web.Response(status=503, headers={"Retry-After": "0"})
+
+        path = find_fixture(root, request.path)
+        if path is None:
+            return web.Response(status=404, text="fixture not found")
+        if path not in templates:
+            with open(path, "r", encoding="utf-8") as f:
+                templates[path] = Template(f.read())
+        content_type = CONTENT_TYPES.get(os.path.splitext(path)[1], "text/plain")
+        return web.Response(
+            text=templates[path].safe_substitute(request.query),
+            content_type=content_type,
+        )
+
+    app = web.Application()
+    app.router.add_get("/{path:.*}", serve)
+    return app
+
+
+async def start_fixture_server(host="127.0.0.1", port=0, **kwargs):
+    """在目前事件迴圈啟動伺服器，回傳 (runner, base_url)；結束時呼叫 runner.cleanup()"""
+    runner = web.AppRunner(create_app(**kwargs), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://{host}:{port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve recorded airline pages")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--root", default=FIXTURE_DIR)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    web.run_app(
+        create_app(args.root, args.latency, args.error_rate),
+        host=args.host,
+        port=args.port,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,86 @@
 from datetime import datetime
+from html.parser import HTMLParser
 from typing import List
+import re
 from api.models.flight import Flight
+from .base import BaseScraper
+from .exceptions import ScraperParseError
 
-class ScootScraper:
-    async def search_flights(self, from_airport: str, to_airport: str, date: datetime) -> List[Flight]:
-        raise NotImplementedError("Tiger Airways search endpoint - Not implemented")
+
+class _FlightCardParser(HTMLParser):
+    """收集 <div class="flight-card" data-*> 的屬性與其中 class="fare" / "seats" 的文字"""
+
+    def __init__(self):
+        super().__init__()
+        self.cards = []
+        self._field = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        classes = (attrs.get("class") or "").split()
+        if "flight-card" in classes:
+            self.cards.append(
+                {k[5:]: v for k, v in attrs.items() if k.startswith("data-")}
+            )
+        elif self.cards and ("fare" in classes or "seats" in classes):
+            self._field = "fare" if "fare" in classes else "seats"
+            if attrs.get("data-currency"):
+                self.cards[-1]["currency"] = attrs["data-currency"]
+
+    def handle_endtag(self, tag):
+        self._field = None
+
+    def handle_data(self, data):
+        if self._field and data.strip():
+            self.cards[-1][self._field] = (
+                self.cards[-1].get(self._field, "") + data.strip()
+            )
+
+
+class ScootScraper(BaseScraper):
+    """酷航：解析航班選擇頁面的 HTML"""
+
+    airline = "TR"
+    base_url_env = "SCOOT_BASE_URL"
+    default_base_url = "https://www.flyscoot.com"
+    select_path = "/en/book/select-flight"
+
+    async def fetch_flights(
+        self, from_airport: str, to_airport: str, date: datetime
+    ) -> List[Flight]:
+        html = await self.fetch_text(
+            self.select_path,
+            {
+                "origin": from_airport.upper(),
+                "destination": to_airport.upper(),
+                "date": date.strftime("%Y-%m-%d"),
+            },
+        )
+        return self.parse(html)
+
+    def parse(self, html) -> List[Flight]:
+        parser = _FlightCardParser()
+        parser.feed(html)
+        flights = []
+        try:
+            for card in parser.cards:
+                fare = re.sub(r"[^\d.]", "", card.get("fare", ""))
+                if not fare:  # 已售完
+                    continue
+                seats = re.sub(r"\D", "", card.get("seats", ""))
+                flights.append(
+                    Flight(
+                        flight_number=card["flight"].replace(" ", ""),
+                        departure=card["origin"],
+                        arrival=card["destination"],
+                        departure_time=datetime.fromisoformat(card["departure"]),
+                        arrival_time=datetime.fromisoformat(card["arrival"]),
+                        price=float(fare),
+                        currency=card.get("currency", "TWD"),
+                        airline=self.airline,
+                        available_seats=int(seats) if seats else None,
+                    )
+                )
+        except (KeyError, ValueError) as e:
+            raise ScraperParseError(f"Unexpected Scoot response: {str(e)}")
+        return flights
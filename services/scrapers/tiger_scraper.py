@@ -1,7 +1,56 @@
 from datetime import datetime
 from typing import List
 from api.models.flight import Flight
+from .base import BaseScraper
+from .exceptions import ScraperParseError
 
-class TigerScraper:
-    async def search_flights(self, from_airport: str, to_airport: str, date: datetime) -> List[Flight]:
-        raise NotImplementedError("Tiger Airways search endpoint - Not implemented")
+
+class TigerScraper(BaseScraper):
+    """台灣虎航：查詢航班 JSON，每個航班取最便宜且有座位的票價"""
+
+    airline = "IT"
+    base_url_env = "TIGER_BASE_URL"
+    default_base_url = "https://www.tigerairtw.com"
+    availability_path = "/api/availability"
+
+    async def fetch_flights(
+        self, from_airport: str, to_airport: str, date: datetime
+    ) -> List[Flight]:
+        data = await self.fetch_json(
+            self.availability_path,
+            {
+                "origin": from_airport.upper(),
+                "destination": to_airport.upper(),
+                "date": date.strftime("%Y-%m-%d"),
+            },
+        )
+        return self.parse(data)
+
+    def parse(self, data) -> List[Flight]:
+        try:
+            currency = data.get("currency", "TWD")
+            flights = []
+            for journey in data.get("journeys", []):
+                fares = [
+                    f for f in journey.get("fares", []) if f.get("seatsLeft", 1) > 0
+                ]
+                if not fares:
+                    continue
+                fare = min(fares, key=lambda f: float(f["price"]))
+                flights.append(
+                    Flight(
+                        flight_number=journey["flightNumber"].replace(" ", ""),
+                        departure=journey["origin"],
+                        arrival=journey["destination"],
+                        departure_time=datetime.fromisoformat(journey["departure"]),
+                        arrival_time=datetime.fromisoformat(journey["arrival"]),
+                        price=float(fare["price"]),
+                        currency=currency,
+                        airline=self.airline,
+                        available_seats=fare.get("seatsLeft"),
+                        cabin=fare.get("class"),
+                    )
+                )
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            raise ScraperParseError(f"Unexpected Tiger Airways response: {str(e)}")
+        return flights
@@ -0,0 +1,141 @@
+"""擬真的 Amadeus flight offer 資料，供替身伺服器與效能測試使用"""
+
+import random
+from datetime import datetime, timedelta
+
+CARRIERS = ["BR", "CI", "JX", "JL", "NH", "TR", "MM", "IT", "CX", "KE"]
+AIRCRAFT = ["789", "77W", "333", "359", "32N", "321", "738", "773"]
+
+
+def make_segment(segment_id, origin, destination, departure, carrier, rng):
+    duration = timedelta(minutes=rng.randint(90, 300))
+    arrival = departure + duration
+    hours, minutes = divmod(int(duration.total_seconds() // 60), 60)
+    return {
+        "departure": {
+            "iataCode": origin,
+            "terminal": "2",
+            "at": departure.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "arrival": {
+            "iataCode": destination,
+            "terminal": "1",
+            "at": arrival.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "carrierCode": carrier,
+        "number": str(rng.randint(10, 999)),
+        "aircraft": {"code": rng.choice(AIRCRAFT)},
+        "operating": {"carrierCode": carrier},
+        "duration": f"PT{hours}H{minutes}M" if minutes else f"PT{hours}H",
+        "id": str(segment_id),
+        "numberOfStops": 0,
+        "blacklistedInEU": False,
+    }
+
+
+def make_itinerary(origin, destination, day, stops, segment_ids, rng):
+    carrier = rng.choice(CARRIERS)
+    hubs = ["HKG", "ICN", "MNL", "BKK"]
+    airports = [origin] + rng.sample(hubs, stops) + [destination]
+    departure = datetime.strptime(day, "%Y-%m-%d") + timedelta(
+        hours=rng.randint(6, 20), minutes=rng.choice([0, 15, 30, 45])
+    )
+    segments = []
+    for leg in range(len(airports) - 1):
+        segment = make_segment(
+            next(segment_ids),
+            airports[leg],
+            airports[leg + 1],
+            departure,
+            carrier,
+            rng,
+        )
+        segments.append(segment)
+        departure = datetime.strptime(
+            segment["arrival"]["at"], "%Y-%m-%dT%H:%M:%S"
+        ) + timedelta(minutes=rng.randint(60, 180))
+    return {"duration": "PT8H30M", "segments": segments}
+
+
+def make_offer(offer_id, params, rng, max_stops=1):
+    segment_ids = iter(range(1, 100))
+    origin = params.get("originLocationCode", "TPE")
+    destination = params.get("destinationLocationCode", "NRT")
+    itineraries = [
+        make_itinerary(
+            origin,
+            destination,
+            params.get("departureDate", "2025-01-10"),
+            rng.randint(0, max_stops),
+            segment_ids,
+            rng,
+        )
+    ]
+    if params.get("returnDate"):
+        itineraries.append(
+            make_itinerary(
+                destination,
+                origin,
+                params["returnDate"],
+                rng.randint(0, max_stops),
+                segment_ids,
+                rng,
+            )
+        )
+
+    price = rng.randint(3000, 30000)
+    segments = [s for it in itineraries for s in it["segments"]]
+    return {
+        "type": "flight-offer",
+        "id": str(offer_id),
+        "source": "GDS",
+        "instantTicketingRequired": False,
+        "nonHomogeneous": False,
+        "oneWay": False,
+        "lastTicketingDate": params.get("departureDate", "2025-01-10"),
+        "numberOfBookableSeats": rng.randint(1, 9),
+        "itineraries": itineraries,
+        "price": {
+            "currency": "TWD",
+            "total": f"{price}.00",
+            "base": f"{price - 1200}.00",
+            "fees": [{"amount": "0.00", "type": "SUPPLIER"}],
+            "grandTotal": f"{price}.00",
+        },
+        "pricingOptions": {"fareType": ["PUBLISHED"], "includedCheckedBagsOnly": True},
+        "validatingAirlineCodes": [segments[0]["carrierCode"]],
+        "travelerPricings": [
+            {
+                "travelerId": "1",
+                "fareOption": "STANDARD",
+                "travelerType": "ADULT",
+                "price": {
+                    "currency": "TWD",
+                    "total": f"{price}.00",
+                    "base": f"{price - 1200}.00",
+                },
+                "fareDetailsBySegment": [
+                    {
+                        "segmentId": s["id"],
+                        "cabin": "ECONOMY",
+                        "fareBasis": "VLOWTW",
+                        "class": "V",
+                        "includedCheckedBags": {"weight": 23, "weightUnit": "KG"},
+                    }
+                    for s in segments
+                ],
+            }
+        ],
+    }
+
+
+def make_offers(count=10, params=None, seed=42, max_stops=1):
+    """產生 count 筆報價；預設為 TPE ⇄ NRT 來回，含轉機航段"""
+    params = params or {
+        "originLocationCode": "TPE",
+        "destinationLocationCode": "NRT",
+        "departureDate": "2025-01-10",
+        "returnDate": "2025-01-15",
+    }
+    rng = random.Random(seed)
+    return [make_offer(i + 1, params, rng, max_stops) for i in range(count)]
@@ -0,0 +1,101 @@
+"""
+錄製 Amadeus 實際流量為 JSON Lines fixture，供 services.standin.server 重播。
+
+設定 AMADEUS_RECORD_FILE 後，amadeus_client 會以 RecordingHTTP 包裝 HTTP 呼叫器，
+每個 API 回應寫成一行：
+
+    {"service": "amadeus", "method": "GET", "path": "/v2/shopping/flight-offers",
+     "params": {...}, "status": 200, "elapsed_ms": 812, "body": {...},
+     "recorded_at": 1735000000}
+
+Token 端點與 Authorization 標頭不會被記錄。
+"""
+
+import io
+import json
+import threading
+import time
+from urllib.error import HTTPError
+from urllib.parse import parse_qsl, urlsplit
+
+SKIP_PATHS = ("/v1/security/oauth2/token",)
+
+
+class Recorder:
+    """以附加模式寫入 JSON Lines，多執行緒共用"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.recorded = 0
+
+    def record(self, entry):
+        line = json.dumps(entry, ensure_ascii=False, separators=(",", ":"))
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+            self.recorded += 1
+
+
+class _RecordedResponse:
+    """已讀取內容的回應，提供 amadeus SDK 解析所需的介面"""
+
+    def __init__(self, status, headers, body):
+        self.status = status
+        self._headers = headers
+        self._body = body
+
+    def getheaders(self):
+        return self._headers
+
+    def read(self):
+        return self._body
+
+
+def _decode(body):
+    try:
+        return json.loads(body)
+    except ValueError:
+        return body.decode("utf-8", "replace")
+
+
+class RecordingHTTP:
+    """包裝 HTTP 呼叫器（PooledHTTP 或 urlopen），將回應寫入 Recorder"""
+
+    def __init__(self, http, recorder):
+        self.http = http
+        self.recorder = recorder
+
+    def __call__(self, request):
+        url = urlsplit(request.full_url)
+        if url.path in SKIP_PATHS:
+            return self.http(request)
+
+        started = time.monotonic()
+        try:
+            response = self.http(request)
+        except HTTPError as e:
+            body = e.read()
+            self._record(request, url, e.code, started, body)
+            raise HTTPError(
+                request.full_url, e.code, e.reason, e.headers, io.BytesIO(body)
+            )
+
+        body = response.read()
+        status = getattr(response, "status", None) or response.getcode()
+        self._record(request, url, status, started, body)
+        return _RecordedResponse(status, response.getheaders(), body)
+
+    def _record(self, request, url, status, started, body):
+        entry = {
+            "service": "amadeus",
+            "method": request.get_method(),
+            "path": url.path,
+            "params": dict(parse_qsl(url.query)),
+            "status": status,
+            "elapsed_ms": round((time.monotonic() - started) * 1000),
+            "body": _decode(body),
+            "recorded_at": int(time.time()),
+        }
+        if request.data:
+            entry["request_body"] = _decode(request.data)
+        self.recorder.record(entry)
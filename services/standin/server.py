@@ -0,0 +1,257 @@
+"""
+本機替身伺服器：模擬 Amadeus 與 LINE Messaging API，不需要正式憑證即可測試與壓測。
+
+    python -m services.standin.server --port 8090 --fixtures amadeus.jsonl \\
+        --latency 0.3 --jitter 0.2 --error-rate 0.02 --token-ttl 300
+
+    AMADEUS_HOST=127.0.0.1 AMADEUS_PORT=8090 AMADEUS_SSL=false
+    LINE_API_ENDPOINT=http://127.0.0.1:8090
+
+- Amadeus：核發會過期的 access token；flight-offers 優先回傳錄製的回應
+  （services.standin.recorder 產生的 JSON Lines），沒有對應錄製時產生擬真報價
+- LINE：接收 reply / push / multicast 訊息並保留在記憶體，
+  重複使用的 reply token 會回傳 400（與正式環境相同）
+- GET /standin/stats、GET|DELETE /standin/line/messages 供測試檢查
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+import zlib
+
+from aiohttp import web
+
+from services.standin.fixtures import make_offers
+
+OFFERS_PATH = "/v2/shopping/flight-offers"
+
+
+def fixture_key(path, params):
+    return path, tuple(sorted((k, str(v)) for k, v in params.items()))
+
+
+def load_fixtures(path):
+    """讀取錄製的 JSON Lines，回傳 {(path, params): [entry, ...]}"""
+    fixtures = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            entry = json.loads(line)
+            if entry.get("service", "amadeus") != "amadeus":
+                continue
+            key = fixture_key(entry["path"], entry.get("params", {}))
+            fixtures.setdefault(key, []).append(entry)
+    return fixtures
+
+
+def amadeus_json(body, status=200):
+    # amadeus SDK 只接受不含 charset 的 Content-Type
+    return web.Response(
+        body=json.dumps(body, separators=(",", ":")).encode(),
+        status=status,
+        headers={"Content-Type": "application/vnd.amadeus+json"},
+    )
+
+
+def amadeus_error(status, code, title):
+    return amadeus_json(
+        {"errors": [{"status": status, "code": code, "title": title}]}, status
+    )
+
+
+class Standin:
+    def __init__(
+        self,
+        fixtures=None,
+        latency=0.0,
+        jitter=0.0,
+        error_rate=0.0,
+        error_status=500,
+        token_ttl=1799,
+        offers=10,
+        replay_latency=False,
+    ):
+        self.fixtures = fixtures or {}
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.token_ttl = token_ttl
+        self.offers = offers
+        self.replay_latency = replay_latency
+        self.tokens = {}  # access_token -> expires_at
+        self.used_reply_tokens = set()
+        self.line_messages = []
+        self.counters = {
+            "tokens_issued": 0,
+            "token_rejected": 0,
+            "searches": 0,
+            "replayed": 0,
+            "synthesized": 0,
+            "injected_errors": 0,
+            "line_requests": 0,
+        }
+
+    async def token(self, request):
+        form = await request.post()
+        if form.get("grant_type") != "client_credentials":
+            return amadeus_error(400, 38187, "Invalid grant type")
+        access_token = uuid.uuid4().hex
+        self.tokens[access_token] = time.time() + self.token_ttl
+        self.counters["tokens_issued"] += 1
+        return amadeus_json(
+            {
+                "type": "amadeusOAuth2Token",
+                "username": "standin",
+                "application_name": "standin",
+                "client_id": form.get("client_id", ""),
+                "token_type": "Bearer",
+                "access_token": access_token,
+                "expires_in": self.token_ttl,
+                "state": "approved",
+                "scope": "",
+            }
+        )
+
+    async def flight_offers(self, request):
+        error = self._check_token(request)
+        if error is not None:
+            return error
+        self.counters["searches"] += 1
+        params = dict(request.query)
+        if request.method == "POST":
+            params = await request.json()
+
+        entries = self.fixtures.get(fixture_key(OFFERS_PATH, params))
+        entry = random.choice(entries) if entries else None
+        if entry and self.replay_latency:
+            await asyncio.sleep(entry.get("elapsed_ms", 0) / 1000)
+        else:
+            await self._delay()
+
+        if self.error_rate and random.random() < self.error_rate:
+            self.counters["injected_errors"] += 1
+            return amadeus_error(self.error_status, 141, "SYSTEM ERROR HAS OCCURRED")
+
+        if entry is not None:
+            self.counters["replayed"] += 1
+            return amadeus_json(entry["body"], entry.get("status", 200))
+
+        self.counters["synthesized"] += 1
+        seed = zlib.crc32(repr(fixture_key(OFFERS_PATH, params)).encode())
+        data = make_offers(int(params.get("max", self.offers)), params, seed=seed)
+        return amadeus_json(
+            {"meta": {"count": len(data)}, "data": data, "dictionaries": {}}
+        )
+
+    async def line_message(self, request):
+        if not request.headers.get("Authorization", "").startswith("Bearer "):
+            return web.json_response(
+                {"message": "Authentication failed. No valid channel access token"},
+                status=401,
+            )
+        self.counters["line_requests"] += 1
+        body = await request.json()
+        kind = request.match_info["kind"]
+        if kind == "reply":
+            reply_token = body.get("replyToken")
+            if not reply_token or reply_token in self.used_reply_tokens:
+                return web.json_response({"message": "Invalid reply token"}, status=400)
+            self.used_reply_tokens.add(reply_token)
+        await self._delay()
+        self.line_messages.append({"type": kind, "received_at": time.time(), **body})
+        return web.json_response({})
+
+    async def get_line_messages(self, request):
+        return web.json_response(self.line_messages)
+
+    async def clear_line_messages(self, request):
+        self.line_messages.clear()
+        return web.json_response({})
+
+    async def stats(self, request):
+        return web.json_response(self.counters)
+
+    def _check_token(self, request):
+        header = request.headers.get("Authorization", "")
+        token = header[7:] if header.startswith("Bearer ") else None
+        expires_at = self.tokens.get(token)
+        if expires_at is None:
+            self.counters["token_rejected"] += 1
+            return amadeus_error(401, 38191, "Invalid access token")
+        if expires_at <= time.time():
+            self.counters["token_rejected"] += 1
+            return amadeus_error(401, 38192, "Access token expired")
+        return None
+
+    async def _delay(self):
+        delay = self.latency + (random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def create_app(**kwargs):
+    standin = Standin(**kwargs)
+    app = web.Application()
+    app["standin"] = standin
+    app.router.add_post("/v1/security/oauth2/token", standin.token)
+    app.router.add_get(OFFERS_PATH, standin.flight_offers)
+    app.router.add_post(OFFERS_PATH, standin.flight_offers)
+    app.router.add_post("/v2/bot/message/{kind}", standin.line_message)
+    app.router.add_get("/standin/line/messages", standin.get_line_messages)
+    app.router.add_delete("/standin/line/messages", standin.clear_line_messages)
+    app.router.add_get("/standin/stats", standin.stats)
+    return app
+
+
+async def start_standin(host="127.0.0.1", port=0, **kwargs):
+    """在目前事件迴圈啟動替身伺服器，回傳 (runner, base_url)"""
+    runner = web.AppRunner(create_app(**kwargs), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://{host}:{port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Amadeus / LINE stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--fixtures", help="recorded JSON Lines file")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--token-ttl", type=int, default=1799)
+    parser.add_argument("--offers", type=int, default=10)
+    parser.add_argument(
+        "--replay-latency",
+        action="store_true",
+        help="sleep for each fixture's recorded elapsed_ms",
+    )
+    args = parser.parse_args()
+    web.run_app(
+        create_app(
+            fixtures=load_fixtures(args.fixtures) if args.fixtures else None,
+            latency=args.latency,
+            jitter=args.jitter,
+            error_rate=args.error_rate,
+            error_status=args.error_status,
+            token_ttl=args.token_ttl,
+            offers=args.offers,
+            replay_latency=args.replay_latency,
+        ),
+        host=args.host,
+        port=args.port,
+        access_log=None,
+    )
+
+
+if __name__ == "__main__":
+    main()
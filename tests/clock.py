@@ -0,0 +1,14 @@
+class FakeClock:
+    """取代模組中的 time，測試可直接推進時間"""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
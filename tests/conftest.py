@@ -0,0 +1,11 @@
+import os
+import sys
+
+# 測試不需要真實憑證，也不連線到 Amadeus / LINE
+os.environ.setdefault("AMADEUS_API_KEY", "test")
+os.environ.setdefault("AMADEUS_API_SECRET", "test")
+os.environ.setdefault("LINE_CHANNEL_ACCESS_TOKEN", "test")
+os.environ.setdefault("LINE_CHANNEL_SECRET", "test")
+os.environ.setdefault("PRICE_HISTORY_ENABLED", "false")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
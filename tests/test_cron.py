@@ -0,0 +1,40 @@
+import pytest
+
+import app as app_module
+
+
+@pytest.fixture
+def client(monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        app_module, "run_price_watch", lambda amadeus, notify: calls.append(1) or {}
+    )
+    monkeypatch.setattr(app_module, "get_amadeus_client", lambda: None)
+    monkeypatch.setattr(app_module, "import_attr", lambda name: None)
+    client = app_module.app.test_client()
+    client.calls = calls
+    return client
+
+
+def test_cron_requires_secret_when_configured(client, monkeypatch):
+    monkeypatch.setenv("CRON_SECRET", "s3cret")
+
+    assert client.get("/cron-job").status_code == 403
+    assert (
+        client.get("/cron-job", headers={"Authorization": "Bearer wrong"}).status_code
+        == 403
+    )
+    response = client.get("/cron-job", headers={"Authorization": "Bearer s3cret"})
+
+    assert response.status_code == 200
+    assert client.calls == [1]
+
+
+def test_cron_without_secret_only_accepts_local_calls(client, monkeypatch):
+    monkeypatch.delenv("CRON_SECRET", raising=False)
+
+    remote = client.get("/cron-job", environ_base={"REMOTE_ADDR": "203.0.113.5"})
+    local = client.get("/cron-job", environ_base={"REMOTE_ADDR": "127.0.0.1"})
+
+    assert remote.status_code == 403
+    assert local.status_code == 200
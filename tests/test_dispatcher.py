@@ -0,0 +1,145 @@
+import threading
+import time
+
+from api.util.dispatcher import EventDispatcher, KeyedSerialExecutor
+from api.util.idempotency import MemoryEventIndex
+
+
+class Source:
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.sender_id = user_id
+
+
+class TextMessage:
+    def __init__(self, text):
+        self.text = text
+
+
+class ImageMessage:
+    pass
+
+
+class MessageEvent:
+    def __init__(self, user_id, message, event_id=None):
+        self.source = Source(user_id)
+        self.message = message
+        self.webhook_event_id = event_id
+
+
+class PostbackEvent:
+    def __init__(self, user_id, event_id=None):
+        self.source = Source(user_id)
+        self.webhook_event_id = event_id
+
+
+def test_handlers_are_selected_by_event_and_message_class():
+    dispatcher = EventDispatcher(max_workers=2)
+    handled = []
+
+    @dispatcher.add(MessageEvent, message=TextMessage)
+    def on_text(event):
+        handled.append(("text", event.message.text))
+
+    @dispatcher.add(MessageEvent)
+    def on_message(event):
+        handled.append(("message", type(event.message).__name__))
+
+    @dispatcher.add(PostbackEvent)
+    def on_postback(event):
+        handled.append(("postback", event.source.user_id))
+
+    dispatcher.dispatch([MessageEvent("Ua", TextMessage("hi"))])
+    dispatcher.dispatch([MessageEvent("Ua", ImageMessage())])
+    dispatcher.dispatch([PostbackEvent("Ub")])
+
+    assert handled == [
+        ("text", "hi"),
+        ("message", "ImageMessage"),
+        ("postback", "Ub"),
+    ]
+
+
+def test_events_run_in_order_per_user_and_concurrently_across_users():
+    dispatcher = EventDispatcher(max_workers=4)
+    handled = {"Ua": [], "Ub": []}
+    active = set()
+    overlap = threading.Event()
+    lock = threading.Lock()
+
+    @dispatcher.add(MessageEvent, message=TextMessage)
+    def on_text(event):
+        user_id = event.source.user_id
+        with lock:
+            active.add(user_id)
+            if len(active) > 1:
+                overlap.set()
+        time.sleep(0.01)
+        handled[user_id].append(int(event.message.text))
+        with lock:
+            active.discard(user_id)
+
+    events = [
+        MessageEvent(user_id, TextMessage(str(i)))
+        for i in range(5)
+        for user_id in ("Ua", "Ub")
+    ]
+    dispatcher.dispatch(events)
+
+    assert handled == {"Ua": [0, 1, 2, 3, 4], "Ub": [0, 1, 2, 3, 4]}
+    assert overlap.is_set()
+    assert dispatcher.stats()["completed"] == 10
+
+
+def test_duplicate_event_ids_are_handled_once():
+    dispatcher = EventDispatcher(event_index=MemoryEventIndex())
+    handled = []
+
+    @dispatcher.add(PostbackEvent)
+    def on_postback(event):
+        handled.append(event.webhook_event_id)
+
+    dispatcher.dispatch([PostbackEvent("Ua", "e1"), PostbackEvent("Ua", "e1")])
+    dispatcher.dispatch([PostbackEvent("Ua", "e1"), PostbackEvent("Ua", "e2")])
+
+    assert handled == ["e1", "e2"]
+
+
+def test_handler_errors_do_not_stop_later_events():
+    dispatcher = EventDispatcher()
+    handled = []
+
+    @dispatcher.add(PostbackEvent)
+    def on_postback(event):
+        if event.webhook_event_id == "bad":
+            raise RuntimeError("boom")
+        handled.append(event.webhook_event_id)
+
+    dispatcher.dispatch([PostbackEvent("Ua", "bad"), PostbackEvent("Ua", "ok")])
+
+    assert handled == ["ok"]
+
+
+def test_submit_returns_false_when_pending_batches_are_full():
+    dispatcher = EventDispatcher(max_workers=1, max_pending=1)
+    release = threading.Event()
+
+    @dispatcher.add(PostbackEvent)
+    def on_postback(event):
+        release.wait(5)
+
+    assert dispatcher.submit([PostbackEvent("Ua")])
+    assert not dispatcher.submit([PostbackEvent("Ub")])
+    release.set()
+
+
+def test_keyed_executor_preserves_submission_order_per_key():
+    executor = KeyedSerialExecutor(max_workers=3)
+    results = []
+    futures = [
+        executor.submit(i % 2, lambda i=i: results.append(i) or i) for i in range(20)
+    ]
+
+    assert [f.result(5) for f in futures] == list(range(20))
+    assert [i for i in results if i % 2 == 0] == list(range(0, 20, 2))
+    assert [i for i in results if i % 2 == 1] == list(range(1, 20, 2))
@@ -0,0 +1,79 @@
+import pytest
+
+import app as app_module
+from api.routes import flight
+from api.util.quota import QuotaExceededError
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(flight, "get_amadeus_client", lambda: None)
+    return app_module.app.test_client()
+
+
+def test_sample_search_returns_503_when_quota_is_exhausted(client, monkeypatch):
+    def search_flights_simple(amadeus):
+        raise QuotaExceededError("Amadeus quota exhausted", retry_after=3)
+
+    monkeypatch.setattr(flight, "search_flights_simple", search_flights_simple)
+
+    response = client.get("/api/flight/")
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "3"
+
+
+def test_quota_error_is_not_wrapped_by_sample_search(monkeypatch):
+    from api.util import search
+
+    def acquire(priority="interactive", timeout=None):
+        raise QuotaExceededError("Amadeus quota exhausted")
+
+    monkeypatch.setattr(search.amadeus_quota, "acquire", acquire)
+
+    with pytest.raises(QuotaExceededError):
+        search.search_flights_simple(None)
+
+
+def test_search_all_runs_the_async_view(client, monkeypatch):
+    from datetime import datetime
+
+    from api.models.flight import Flight
+    from services.providers.base import FlightProvider
+
+    class StubProvider(FlightProvider):
+        name = "stub"
+
+        async def search(self, query):
+            return [
+                Flight(
+                    "BR198",
+                    query.origin,
+                    query.destination,
+                    datetime(2099, 12, 1, 8),
+                    datetime(2099, 12, 1, 12),
+                    4000.0,
+                    "TWD",
+                    "BR",
+                )
+            ]
+
+    monkeypatch.setattr(
+        flight, "get_enabled_providers", lambda names=None: [StubProvider()]
+    )
+
+    response = client.post(
+        "/api/flight/search/all",
+        json={
+            "flight_data": [
+                {"date": "2099-12-01", "from_airport": "TPE", "to_airport": "NRT"}
+            ],
+            "trip": "one-way",
+            "seat": "economy",
+            "passengers": {"adults": 1},
+        },
+    )
+
+    assert response.status_code == 200
+    assert response.json["providers"]["stub"]["status"] == "ok"
+    assert response.json["data"][0]["flight_number"] == "BR198"
@@ -0,0 +1,112 @@
+import json
+
+import pytest
+
+from api.util import search
+from api.util.search import OfferCache
+from tests.clock import FakeClock
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(search, "time", clock)
+    return clock
+
+
+def offers(n, padding=""):
+    return [{"id": str(i), "padding": padding} for i in range(n)]
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = OfferCache(ttl=10)
+    cache.set("k", offers(1))
+
+    clock.advance(9)
+    assert cache.get("k") == offers(1)
+    clock.advance(1)
+    assert cache.get("k") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted_first(clock):
+    cache = OfferCache(ttl=60, max_entries=2)
+    cache.set("a", offers(1))
+    cache.set("b", offers(1))
+    cache.get("a")
+    cache.set("c", offers(1))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_byte_cap_evicts_until_under_budget(clock):
+    entry = offers(1, padding="x" * 100)
+    size = len(json.dumps(entry, separators=(",", ":")))
+    cache = OfferCache(ttl=60, max_bytes=size * 2)
+    for key in ("a", "b", "c"):
+        cache.set(key, entry)
+
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["bytes"] == size * 2
+    assert cache.get("a") is None
+
+
+def test_entry_larger_than_the_cap_is_not_cached(clock):
+    cache = OfferCache(ttl=60, max_bytes=10)
+    cache.set("k", offers(1, padding="x" * 100))
+
+    assert cache.get("k") is None
+    assert cache.stats()["bytes"] == 0
+
+
+def test_replacing_a_key_keeps_the_byte_count_accurate(clock):
+    cache = OfferCache(ttl=60)
+    cache.set("k", offers(1, padding="x" * 100))
+    cache.set("k", offers(1))
+
+    assert cache.stats()["bytes"] == len(json.dumps(offers(1), separators=(",", ":")))
+
+
+def test_stale_entries_are_served_only_within_the_grace_period(clock):
+    cache = OfferCache(ttl=10, stale_ttl=30)
+    cache.set("k", offers(1))
+
+    clock.advance(15)
+    assert cache.get("k") is None
+    assert cache.get_stale("k") == offers(1)
+
+    clock.advance(30)
+    assert cache.get_stale("k") is None
+    assert cache.stats()["stale_hits"] == 1
+
+
+def test_fetch_offers_returns_stale_results_and_refreshes(clock, monkeypatch):
+    cache = OfferCache(ttl=10, stale_ttl=30)
+    monkeypatch.setattr(search, "offer_cache", cache)
+    refreshed = []
+    monkeypatch.setattr(
+        search,
+        "refresh_in_background",
+        lambda amadeus, params, key: refreshed.append(key),
+    )
+    params = {"originLocationCode": "TPE", "destinationLocationCode": "NRT"}
+    key = search.make_search_key(params)
+    cache.set(key, offers(1))
+
+    clock.advance(15)
+    result = search.fetch_offers(None, params)
+
+    assert isinstance(result, search.StaleOffers)
+    assert result == offers(1)
+    assert refreshed == [key]
+
+
+def test_disabled_cache_stores_nothing(clock):
+    cache = OfferCache(ttl=0)
+    cache.set("k", offers(1))
+
+    assert cache.get("k") is None
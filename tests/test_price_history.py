@@ -0,0 +1,119 @@
+import multiprocessing
+import os
+from datetime import date
+
+import pytest
+
+from api.util import price_history
+from api.util.price_history import PRICE_UNIT, PriceHistoryStore, offer_rows
+
+
+def append_rows(directory, carrier, count):
+    store = PriceHistoryStore(directory)
+    for i in range(count):
+        store.append([("TPE-NRT", "2099-12-01", carrier, f"{carrier}1", 100.0 + i, i)])
+
+
+def test_rows_appended_by_other_processes_are_visible(tmp_path):
+    directory = str(tmp_path)
+    reader = PriceHistoryStore(directory)
+    assert reader.query("TPE-NRT") == {}
+
+    context = multiprocessing.get_context("fork")
+    workers = [
+        context.Process(target=append_rows, args=(directory, carrier, 50))
+        for carrier in ("BR", "CI", "JX")
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+        assert worker.exitcode == 0
+
+    prices = reader.query("TPE-NRT")["2099-12-01"]
+    assert len(prices) == 150
+    assert sorted(prices) == sorted([100.0 + i for i in range(50)] * 3)
+    assert len(reader) == 150
+
+
+def test_append_does_not_load_columns_into_memory(tmp_path):
+    store = PriceHistoryStore(str(tmp_path))
+    store.append([("TPE-NRT", "2099-12-01", "BR", "BR198", 100.0, 0)])
+
+    assert len(store.columns["price"]) == 0
+    assert store.query("TPE-NRT") == {"2099-12-01": [100.0]}
+    assert len(store.columns["price"]) == 1
+
+
+def test_interrupted_write_is_truncated_before_the_next_append(tmp_path):
+    store = PriceHistoryStore(str(tmp_path))
+    store.append([("TPE-NRT", "2099-12-01", "BR", "BR198", 100.0, 0)])
+    with open(os.path.join(str(tmp_path), "price.bin"), "ab") as f:
+        f.write(b"\0\0\0\0")  # 只寫入部分欄位就中斷
+
+    store.append([("TPE-NRT", "2099-12-02", "CI", "CI100", 90.0, 1)])
+
+    assert PriceHistoryStore(str(tmp_path)).query("TPE-NRT") == {
+        "2099-12-01": [100.0],
+        "2099-12-02": [90.0],
+    }
+
+
+def test_query_filters_by_route_and_date_range(tmp_path):
+    store = PriceHistoryStore(str(tmp_path))
+    store.append(
+        [
+            ("TPE-NRT", "2099-12-01", "BR", "BR198", 100.0, 0),
+            ("TPE-NRT", "2099-12-05", "BR", "BR198", 120.0, 0),
+            ("TPE-KIX", "2099-12-01", "CI", "CI100", 80.0, 0),
+        ]
+    )
+
+    assert store.query("TPE-NRT", start=date(2099, 12, 2)) == {"2099-12-05": [120.0]}
+    assert store.query("TPE-KIX") == {"2099-12-01": [80.0]}
+
+
+def test_offer_rows_record_the_per_adult_price():
+    offer = {
+        "itineraries": [{"segments": [{"carrierCode": "BR", "number": "198"}]}],
+        "price": {"grandTotal": "8000.00"},
+        "travelerPricings": [{"price": {"total": "4000.00"}}] * 2,
+    }
+    search_params = {
+        "originLocationCode": "TPE",
+        "destinationLocationCode": "NRT",
+        "departureDate": "2099-12-01",
+        "adults": 2,
+    }
+
+    [row] = offer_rows(search_params, [offer], observed_at=1)
+
+    assert PRICE_UNIT == "per_adult"
+    assert row == ("TPE-NRT", "2099-12-01", "BR", "BR198", 4000.0, 1)
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    import app as app_module
+
+    store = PriceHistoryStore(str(tmp_path))
+    store.append([("TPE-NRT", "2099-12-01", "BR", "BR198", 100.0, 0)])
+    monkeypatch.setattr(price_history, "price_history", store)
+    return app_module.app.test_client()
+
+
+def test_history_reports_the_price_unit(client):
+    response = client.get("/api/flight/history?origin=TPE&destination=NRT")
+
+    assert response.status_code == 200
+    assert response.json["price_unit"] == "per_adult"
+    assert response.json["data"][0]["min"] == 100.0
+
+
+@pytest.mark.parametrize("percentiles", ["150", "-1", "nan", "abc"])
+def test_history_rejects_invalid_percentiles(client, percentiles):
+    response = client.get(
+        f"/api/flight/history?origin=TPE&destination=NRT&percentiles={percentiles}"
+    )
+
+    assert response.status_code == 400
@@ -0,0 +1,81 @@
+import threading
+import time
+
+import pytest
+
+from api.util.quota import BATCH, INTERACTIVE, QuotaExceededError, QuotaScheduler
+
+
+def test_burst_is_granted_without_waiting():
+    quota = QuotaScheduler(rate=1, burst=3)
+
+    assert [quota.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert quota.stats()["granted"][INTERACTIVE] == 3
+
+
+def test_request_is_rejected_when_the_estimated_wait_exceeds_its_deadline():
+    quota = QuotaScheduler(rate=1, burst=1)
+    quota.acquire()
+
+    started = time.monotonic()
+    with pytest.raises(QuotaExceededError) as error:
+        quota.acquire(INTERACTIVE, timeout=0.1)
+
+    assert time.monotonic() - started < 0.5
+    assert error.value.retry_after >= 1
+    assert quota.stats()["rejected"][INTERACTIVE] == 1
+
+
+def test_request_waits_for_a_token_within_its_deadline():
+    quota = QuotaScheduler(rate=20, burst=1)
+    quota.acquire()
+
+    waited = quota.acquire(INTERACTIVE, timeout=1)
+
+    assert 0 < waited < 0.5
+
+
+def test_full_queue_rejects_immediately():
+    quota = QuotaScheduler(rate=2, burst=1, max_queue=1)
+    quota.acquire()
+    waiter = threading.Thread(target=quota.acquire, args=(BATCH, 5))
+    waiter.start()
+    while quota.stats()["queue_depth"] == 0:
+        time.sleep(0.001)
+
+    with pytest.raises(QuotaExceededError):
+        quota.acquire(INTERACTIVE, timeout=5)
+    waiter.join()
+
+
+def test_interactive_requests_are_served_before_queued_batch_requests():
+    quota = QuotaScheduler(rate=10, burst=1)
+    quota.acquire()
+    order = []
+
+    def acquire(priority):
+        quota.acquire(priority, timeout=5)
+        order.append(priority)
+
+    batch = threading.Thread(target=acquire, args=(BATCH,))
+    batch.start()
+    while quota.stats()["queue_depth"] == 0:
+        time.sleep(0.001)
+    interactive = threading.Thread(target=acquire, args=(INTERACTIVE,))
+    interactive.start()
+    batch.join()
+    interactive.join()
+
+    assert order == [INTERACTIVE, BATCH]
+
+
+def test_zero_rate_disables_the_limit():
+    quota = QuotaScheduler(rate=0)
+
+    assert all(quota.acquire() == 0.0 for _ in range(100))
+
+
+def test_small_burst_share_can_still_acquire():
+    quota = QuotaScheduler(rate=0.5, burst=0.5)
+
+    assert quota.acquire() == 0.0
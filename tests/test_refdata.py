@@ -0,0 +1,90 @@
+import os
+
+import pytest
+
+from api.util import airline
+from api.util.refdata import ReferenceDB, build, load_csv
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "refdata.bin")
+    build(
+        {
+            "airline": {"BR": "EVA Air", "EVA": "EVA Air", "LH": "Lufthansa"},
+            "aircraft": {"359": "Airbus A350-900", "B38M": "Boeing 737 MAX 8"},
+        },
+        path,
+    )
+    return path
+
+
+def test_lookup_is_case_insensitive_and_misses_return_none(db_path):
+    db = ReferenceDB(db_path)
+
+    assert db.airline("br") == "EVA Air"
+    assert db.airline("EVA") == "EVA Air"
+    assert db.aircraft("B38M") == "Boeing 737 MAX 8"
+    assert db.airline("ZZ") is None
+    assert db.airline("") is None
+    assert db.airline("TOOLONG") is None
+    assert db.airline("長榮") is None
+    assert db.lookup("missing_table", "BR") is None
+
+
+def test_every_key_is_found_in_a_large_table(tmp_path):
+    path = str(tmp_path / "refdata.bin")
+    codes = {f"{i:04d}": f"name {i}" for i in range(5000)}
+    build({"airline": codes}, path)
+    db = ReferenceDB(path)
+
+    assert all(db.airline(code) == name for code, name in codes.items())
+    assert db.stats()["entries"] == {"airline": 5000}
+
+
+def test_missing_file_returns_none(tmp_path):
+    db = ReferenceDB(str(tmp_path / "missing.bin"))
+
+    assert db.airline("BR") is None
+    assert db.stats() == {"loaded": False, "reloads": 0, "entries": {}}
+
+
+def test_rebuilt_file_is_reloaded(db_path):
+    db = ReferenceDB(db_path, check_interval=0)
+    assert db.airline("ZZ") is None
+
+    build({"airline": {"ZZ": "Zed Air"}}, db_path)
+    stat = os.stat(db_path)
+    os.utime(db_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert db.airline("ZZ") == "Zed Air"
+    assert db.reloads == 2
+
+
+def test_corrupt_file_is_ignored(tmp_path):
+    path = tmp_path / "refdata.bin"
+    path.write_bytes(b"not a reference file")
+
+    assert ReferenceDB(str(path)).airline("BR") is None
+
+
+def test_load_csv_prefers_active_rows(tmp_path):
+    path = tmp_path / "airlines.csv"
+    path.write_text(
+        "id,name,iata,icao,active\n"
+        "1,Defunct,BR,XBR,N\n"
+        "2,EVA Air,BR,EVA,Y\n"
+        "3,Unknown,-,\\N,Y\n",
+        encoding="utf-8",
+    )
+
+    assert load_csv(str(path)) == {"BR": "EVA Air", "XBR": "Defunct", "EVA": "EVA Air"}
+
+
+def test_built_in_names_take_precedence_over_the_file(db_path, monkeypatch):
+    monkeypatch.setattr(airline, "reference_db", ReferenceDB(db_path))
+
+    assert airline.lookup_airline("BR") == airline.AIRLINE_CODES["BR"]
+    assert airline.lookup_airline("LH") == "Lufthansa"
+    assert airline.lookup_airline("ZZ") == "其他航空(ZZ)"
+    assert airline.lookup_aircraft("B38M") == "Boeing 737 MAX 8"
@@ -0,0 +1,98 @@
+import pytest
+
+from api.util import resilience
+from api.util.resilience import CircuitBreaker, CircuitOpenError
+from tests.clock import FakeClock
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(resilience, "time", clock)
+    return clock
+
+
+def fail(breaker, times):
+    for _ in range(times):
+        breaker.before_call()
+        breaker.record_failure()
+
+
+def test_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker("upstream", failure_threshold=3, reset_timeout=30)
+    fail(breaker, 2)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    fail(breaker, 1)
+
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError) as error:
+        breaker.before_call()
+    assert error.value.retry_after == 30
+
+
+def test_success_resets_the_failure_count(clock):
+    breaker = CircuitBreaker("upstream", failure_threshold=3)
+    fail(breaker, 2)
+    breaker.before_call()
+    breaker.record_success(0.1)
+    fail(breaker, 2)
+
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_allows_a_single_probe(clock):
+    breaker = CircuitBreaker("upstream", failure_threshold=1, reset_timeout=30)
+    fail(breaker, 1)
+    clock.advance(30)
+
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_successful_probe_closes_the_circuit(clock):
+    breaker = CircuitBreaker("upstream", failure_threshold=1, reset_timeout=30)
+    fail(breaker, 1)
+    clock.advance(30)
+
+    breaker.before_call()
+    breaker.record_success(0.1)
+
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.before_call()
+
+
+def test_failed_probe_reopens_the_circuit(clock):
+    breaker = CircuitBreaker("upstream", failure_threshold=5, reset_timeout=30)
+    fail(breaker, 5)
+    clock.advance(30)
+
+    fail(breaker, 1)
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.stats()["opened"] == 2
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_slow_calls_count_as_failures(clock):
+    breaker = CircuitBreaker("upstream", failure_threshold=2, slow_call_threshold=5)
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_success(6)
+
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_release_frees_the_probe_without_changing_state(clock):
+    breaker = CircuitBreaker("upstream", failure_threshold=1, reset_timeout=30)
+    fail(breaker, 1)
+    clock.advance(30)
+    breaker.before_call()
+
+    breaker.release()
+
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.before_call()
@@ -0,0 +1,138 @@
+import threading
+import time
+
+import pytest
+
+from api.util import search
+from api.util.quota import BATCH, INTERACTIVE, QuotaExceededError
+from api.util.search import SingleFlight, SingleFlightTimeout
+
+
+def run_in_thread(fn):
+    result = {}
+
+    def target():
+        try:
+            result["value"] = fn()
+        except BaseException as e:
+            result["error"] = e
+
+    thread = threading.Thread(target=target)
+    thread.start()
+    return thread, result
+
+
+def test_concurrent_calls_share_one_execution():
+    group = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        release.wait(5)
+        return "offers"
+
+    leader, leader_result = run_in_thread(lambda: group.do("k", slow))
+    while not group.stats()["in_flight"]:
+        time.sleep(0.001)
+    follower, follower_result = run_in_thread(lambda: group.do("k", slow))
+    while group.stats()["coalesced"] < 1:
+        time.sleep(0.001)
+    release.set()
+    leader.join()
+    follower.join()
+
+    assert calls == [1]
+    assert leader_result["value"] == follower_result["value"] == "offers"
+
+
+def test_follower_gives_up_at_its_deadline():
+    group = SingleFlight()
+    release = threading.Event()
+    leader, _ = run_in_thread(lambda: group.do("k", lambda: release.wait(5)))
+    while not group.stats()["in_flight"]:
+        time.sleep(0.001)
+
+    started = time.monotonic()
+    with pytest.raises(SingleFlightTimeout):
+        group.do("k", lambda: None, timeout=0.05)
+    assert time.monotonic() - started < 1
+
+    release.set()
+    leader.join()
+
+
+def test_leader_error_is_raised_to_followers():
+    group = SingleFlight()
+    release = threading.Event()
+
+    def failing():
+        release.wait(5)
+        raise RuntimeError("upstream down")
+
+    leader, leader_result = run_in_thread(lambda: group.do("k", failing))
+    while not group.stats()["in_flight"]:
+        time.sleep(0.001)
+    follower, follower_result = run_in_thread(lambda: group.do("k", failing))
+    while group.stats()["coalesced"] < 1:
+        time.sleep(0.001)
+    release.set()
+    leader.join()
+    follower.join()
+
+    assert isinstance(leader_result["error"], RuntimeError)
+    assert follower_result["error"] is leader_result["error"]
+
+
+def test_interactive_search_is_not_coalesced_onto_a_batch_leader(monkeypatch):
+    monkeypatch.setattr(search, "search_flight_group", SingleFlight())
+    monkeypatch.setattr(search.offer_cache, "get", lambda key: None)
+    monkeypatch.setattr(search.offer_cache, "get_stale", lambda key: None)
+    release = threading.Event()
+    priorities = []
+
+    def call_upstream(amadeus, search_params, key, priority):
+        priorities.append(priority)
+        if priority == BATCH:
+            release.wait(5)
+        return [priority]
+
+    monkeypatch.setattr(search, "call_upstream", call_upstream)
+    params = {"originLocationCode": "TPE", "destinationLocationCode": "NRT"}
+
+    batch, batch_result = run_in_thread(
+        lambda: search.fetch_offers(None, params, BATCH)
+    )
+    while not priorities:
+        time.sleep(0.001)
+    assert search.fetch_offers(None, params, INTERACTIVE) == [INTERACTIVE]
+
+    release.set()
+    batch.join()
+    assert batch_result["value"] == [BATCH]
+
+
+def test_follower_timeout_surfaces_as_quota_error(monkeypatch):
+    monkeypatch.setattr(search, "search_flight_group", SingleFlight())
+    monkeypatch.setattr(search.offer_cache, "get", lambda key: None)
+    monkeypatch.setattr(search.offer_cache, "get_stale", lambda key: None)
+    monkeypatch.setattr(search, "UPSTREAM_TIMEOUT", 0)
+    monkeypatch.setitem(search.amadeus_quota.timeouts, INTERACTIVE, 0.05)
+    release = threading.Event()
+    started = threading.Event()
+
+    def call_upstream(amadeus, search_params, key, priority):
+        started.set()
+        release.wait(5)
+        return []
+
+    monkeypatch.setattr(search, "call_upstream", call_upstream)
+    params = {"originLocationCode": "TPE", "destinationLocationCode": "NRT"}
+    leader, _ = run_in_thread(lambda: search.fetch_offers(None, params))
+    started.wait(5)
+
+    with pytest.raises(QuotaExceededError):
+        search.fetch_offers(None, params)
+
+    release.set()
+    leader.join()
@@ -0,0 +1,91 @@
+import pytest
+
+from api.util import watchlist
+from api.util.watchlist import WatchStore, run_price_watch
+
+
+def make_offer(price):
+    return {"price": {"grandTotal": str(price)}}
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = WatchStore(str(tmp_path / "watchlist.db"))
+    monkeypatch.setattr(watchlist, "watch_store", store)
+    return store
+
+
+@pytest.fixture
+def searches(monkeypatch):
+    """以固定價格取代 Amadeus 查詢，並記錄每次查詢的參數"""
+    calls = []
+    prices = {"NRT": 4000, "KIX": 9000}
+
+    def fetch_offers(amadeus, search_params, priority, allow_stale=True):
+        calls.append(search_params)
+        return [make_offer(prices[search_params["destinationLocationCode"]])]
+
+    monkeypatch.setattr(watchlist, "fetch_offers", fetch_offers)
+    return calls
+
+
+def add(store, user_id, destination, max_price):
+    return store.add(user_id, "TPE", destination, "2099-12-01", max_price)
+
+
+def test_watches_sharing_a_search_are_queried_once_and_notified_together(
+    store, searches
+):
+    add(store, "Ua", "NRT", 5000)
+    add(store, "Ub", "NRT", 4500)
+    add(store, "Uc", "NRT", 3000)  # 門檻低於目前價格，不通知
+    add(store, "Ua", "KIX", 8000)  # 價格高於門檻
+    notifications = []
+
+    summary = run_price_watch(
+        None, lambda user_ids, watch, price: notifications.append((user_ids, price))
+    )
+
+    assert len(searches) == 2
+    assert notifications == [(["Ua", "Ub"], 4000.0)]
+    assert summary == {
+        "groups": 2,
+        "watches": 4,
+        "notified": 2,
+        "errors": 0,
+        "expired": 0,
+    }
+
+
+def test_users_are_not_notified_again_until_the_price_drops(store, searches):
+    add(store, "Ua", "NRT", 5000)
+    notifications = []
+
+    def notify(user_ids, watch, price):
+        notifications.append(user_ids)
+
+    run_price_watch(None, notify)
+    run_price_watch(None, notify)
+
+    assert notifications == [["Ua"]]
+
+
+def test_failed_notification_is_retried_next_run(store, searches):
+    add(store, "Ua", "NRT", 5000)
+
+    def failing_notify(user_ids, watch, price):
+        raise RuntimeError("LINE unavailable")
+
+    assert run_price_watch(None, failing_notify)["errors"] == 1
+    notifications = []
+    run_price_watch(None, lambda user_ids, watch, price: notifications.append(user_ids))
+    assert notifications == [["Ua"]]
+
+
+def test_expired_watches_are_purged(store, searches):
+    store.add("Ua", "TPE", "NRT", "2000-01-01", 5000)
+
+    summary = run_price_watch(None, lambda *args: None)
+
+    assert summary["expired"] == 1
+    assert searches == []